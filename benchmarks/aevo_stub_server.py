@@ -0,0 +1,206 @@
+"""
+Local stand-in for the Aevo API, serving synthetic data with the real
+pagination fields. Use it for end-to-end load tests (see load_test.py).
+
+    python -m benchmarks.aevo_stub_server --port 8081 --ideas 20000 --latency-ms 150 --error-rate 0.02
+
+Then point the app at it:
+
+    BASE_URL=http://127.0.0.1:8081 API_TOKEN=stub uvicorn src.api.server:app --port 8000
+
+Endpoints:
+    GET /webapi/api/ApiExterna/v2/GetIdeias   filtros={DataCriacao*|DataAtualizacao*, itensPorPagina, pagina}
+    GET /webapi/api/apiExterna/Usuarios       filtros={Ativo, DepartamentoId?} & pagina
+    GET /__stub/stats                         upstream call counters (used by load_test.py)
+    POST /__stub/reset                        zeroes the counters
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Query, Response
+
+from benchmarks.synthetic_data import DatasetConfig, generate_users, iter_ideas
+
+DATE_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+class StubOptions:
+    """Injectable behaviour of the stand-in."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        max_ideas_per_page: int = 1000,
+        users_per_page: int = 100,
+        seed: int = 7
+    ):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_ideas_per_page = max_ideas_per_page
+        self.users_per_page = users_per_page
+        self.seed = seed
+
+
+class StubData:
+    """Synthetic tenant, with every idea pre-encoded so pages are cheap to serve."""
+
+    def __init__(self, config: DatasetConfig):
+        self.users = generate_users(config)
+        self.user_bytes = [json.dumps(u, ensure_ascii=False).encode("utf-8") for u in self.users]
+
+        self.idea_bytes: List[bytes] = []
+        self.created: List[datetime] = []
+        self.updated: List[datetime] = []
+        for idea in iter_ideas(config, self.users):
+            self.idea_bytes.append(json.dumps(idea, ensure_ascii=False).encode("utf-8"))
+            self.created.append(datetime.fromisoformat(idea["CriadoEm"]))
+            self.updated.append(datetime.fromisoformat(idea["DataAtualizacao"]))
+
+        # Janelas filtradas recentes (cada página da mesma busca reusa a seleção)
+        self._selections: "OrderedDict[Tuple, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def select_ideas(self, filters: Dict[str, Any]) -> List[int]:
+        if "DataAtualizacaoInicio" in filters:
+            dates, start, end = self.updated, filters["DataAtualizacaoInicio"], filters.get("DataAtualizacaoTermino")
+        else:
+            dates, start, end = self.created, filters.get("DataCriacaoInicio"), filters.get("DataCriacaoTermino")
+        key = (id(dates), start, end)
+
+        with self._lock:
+            if key in self._selections:
+                self._selections.move_to_end(key)
+                return self._selections[key]
+
+        low = datetime.strptime(start, DATE_FMT) if start else datetime.min
+        high = datetime.strptime(end, DATE_FMT) if end else datetime.max
+        selected = [i for i, dt in enumerate(dates) if low <= dt <= high]
+
+        with self._lock:
+            self._selections[key] = selected
+            while len(self._selections) > 64:
+                self._selections.popitem(last=False)
+        return selected
+
+    def select_users(self, department_id: Optional[int]) -> List[int]:
+        return [
+            i for i, u in enumerate(self.users)
+            if department_id is None or u["Departamento"]["Id"] == department_id
+        ]
+
+
+def create_app(config: DatasetConfig, options: StubOptions) -> FastAPI:
+    data = StubData(config)
+    rng = random.Random(options.seed)
+    stats = Counter()
+    app = FastAPI(title="Aevo API stand-in")
+
+    async def simulate_upstream(kind: str) -> Optional[Response]:
+        stats[f"{kind}_requests"] += 1
+        delay = options.latency_ms + rng.uniform(0, options.latency_jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if options.error_rate and rng.random() < options.error_rate:
+            stats[f"{kind}_errors"] += 1
+            return Response(status_code=options.error_status, content=b"stub injected error")
+        return None
+
+    @app.get("/webapi/api/ApiExterna/v2/GetIdeias")
+    async def get_ideas(token: str = Query(...), filtros: str = Query("{}")):
+        error = await simulate_upstream("ideas")
+        if error is not None:
+            return error
+
+        filters = json.loads(filtros)
+        per_page = max(1, min(int(filters.get("itensPorPagina", 1000)), options.max_ideas_per_page))
+        page = max(1, int(filters.get("pagina", 1)))
+
+        selected = data.select_ideas(filters)
+        total_pages = max(1, -(-len(selected) // per_page))
+        chunk = selected[(page - 1) * per_page: page * per_page]
+
+        body = (
+            b'{"sucesso":true,"mensagem":null,"resultado":[' + b",".join(data.idea_bytes[i] for i in chunk) + b"],"
+            + f'"numeroPaginas":{total_pages},"paginaAtual":{page},"itensPorPagina":{per_page}}}'.encode()
+        )
+        return Response(content=body, media_type="application/json")
+
+    @app.get("/webapi/api/apiExterna/Usuarios")
+    async def get_users(token: str = Query(...), filtros: str = Query("{}"), pagina: int = Query(1)):
+        error = await simulate_upstream("users")
+        if error is not None:
+            return error
+
+        filters = json.loads(filtros)
+        selected = data.select_users(filters.get("DepartamentoId"))
+        per_page = options.users_per_page
+        total_pages = max(1, -(-len(selected) // per_page))
+        chunk = selected[(pagina - 1) * per_page: pagina * per_page]
+
+        body = (
+            b'{"sucesso":true,"mensagem":null,"resultado":[' + b",".join(data.user_bytes[i] for i in chunk) + b"],"
+            + f'"numeroTotalPaginas":{total_pages},"paginaAtual":{pagina}}}'.encode()
+        )
+        return Response(content=body, media_type="application/json")
+
+    @app.get("/__stub/stats")
+    def get_stats():
+        return {"ideas": len(data.idea_bytes), "users": len(data.users), **stats}
+
+    @app.post("/__stub/reset")
+    def reset_stats():
+        stats.clear()
+        return {"reset": True}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Aevo API stand-in with synthetic data.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--ideas", type=int, default=20_000)
+    parser.add_argument("--departments", type=int, default=40)
+    parser.add_argument("--users-per-department", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed delay added to every call")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Extra random delay in [0, jitter]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--max-ideas-per-page", type=int, default=1000, help="Caps 'itensPorPagina'")
+    parser.add_argument("--users-per-page", type=int, default=100)
+    args = parser.parse_args()
+
+    config = DatasetConfig(
+        ideas=args.ideas,
+        departments=args.departments,
+        users_per_department=args.users_per_department,
+        seed=args.seed
+    )
+    options = StubOptions(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        max_ideas_per_page=args.max_ideas_per_page,
+        users_per_page=args.users_per_page
+    )
+    print(f"[AevoStub] Generating {args.ideas:,} ideas...")
+    uvicorn.run(create_app(config, options), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Load-test harness: drives the running FastAPI app at a fixed concurrency and
+reports latency percentiles plus the upstream calls the run caused.
+
+    python -m benchmarks.aevo_stub_server --port 8081 --latency-ms 150 &
+    BASE_URL=http://127.0.0.1:8081 API_TOKEN=stub uvicorn src.api.server:app --port 8000 &
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --stub http://127.0.0.1:8081 \\
+        --concurrency 50 --requests 2000
+
+Requests are spread over department, batch and individual report endpoints
+(see --mix). Upstream counts come from the stand-in's /__stub/stats, sampled
+before and after the run.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# Peso relativo de cada tipo de requisição no mix padrão
+DEFAULT_MIX = "department=6,departments=1,user=3"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    unknown = set(mix) - {"department", "departments", "user"}
+    if unknown:
+        raise ValueError(f"Unknown request kinds in --mix: {sorted(unknown)}")
+    return mix
+
+
+def build_paths(
+    rng: random.Random,
+    count: int,
+    mix: Dict[str, int],
+    departments: List[int],
+    matriculas: List[str],
+    year: int
+) -> List[Tuple[str, str]]:
+    """Pre-builds (kind, path) pairs so path generation is not timed."""
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    paths = []
+    for kind in rng.choices(kinds, weights=weights, k=count):
+        if kind == "department":
+            path = f"/analytics/department/{rng.choice(departments)}?year={year}"
+        elif kind == "departments":
+            ids = ",".join(str(d) for d in rng.sample(departments, min(5, len(departments))))
+            path = f"/analytics/departments?year={year}&department_ids={ids}"
+        else:
+            path = f"/analytics/user/{rng.choice(matriculas)}?year={year}"
+        paths.append((kind, path))
+    return paths
+
+
+async def stub_stats(client: httpx.AsyncClient, stub: Optional[str]) -> Counter:
+    if not stub:
+        return Counter()
+    response = await client.get(f"{stub.rstrip('/')}/__stub/stats")
+    response.raise_for_status()
+    return Counter({k: v for k, v in response.json().items() if k.endswith(("_requests", "_errors"))})
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    departments = list(range(1, args.departments + 1))
+    matriculas = [str(100000 + n) for n in range(args.departments * args.users_per_department)]
+    paths = build_paths(rng, args.requests, parse_mix(args.mix), departments, matriculas, args.year)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        ready = await client.get("/health/ready")
+        if ready.status_code != 200:
+            print(f"[LoadTest] App not ready ({ready.status_code}): {ready.text}")
+            return 1
+
+        # Aquecimento opcional (preenche caches antes da medição)
+        for _, path in paths[:args.warmup]:
+            await client.get(path)
+
+        before = await stub_stats(client, args.stub)
+        latencies: Dict[str, List[float]] = {}
+        statuses: Counter = Counter()
+        queue = iter(paths)
+
+        async def worker():
+            for kind, path in queue:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.setdefault(kind, []).append(time.perf_counter() - started)
+                statuses[status] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        after = await stub_stats(client, args.stub)
+
+    print(f"\n{args.requests:,} requests, concurrency {args.concurrency}, {elapsed:.2f}s "
+          f"({args.requests / elapsed:,.1f} req/s)")
+    print(f"\n{'kind':<12} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = sorted(latencies.items()) + [("all", [v for values in latencies.values() for v in values])]
+    for kind, values in rows:
+        values = sorted(values)
+        print(f"{kind:<12} {len(values):>7} {percentile(values, 50) * 1000:>9.1f} "
+              f"{percentile(values, 95) * 1000:>9.1f} {percentile(values, 99) * 1000:>9.1f} "
+              f"{(values[-1] if values else 0) * 1000:>9.1f}")
+
+    print("\nStatus codes: " + ", ".join(f"{s}={n}" for s, n in sorted(statuses.items())))
+    if args.stub:
+        upstream = after - before
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(upstream.items())) or "none"
+        print(f"Upstream calls during run: {calls}")
+
+    failures = sum(n for s, n in statuses.items() if not s.startswith(("2", "3")))
+    return 1 if failures and args.fail_on_errors else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test of the analytics API (use with aevo_stub_server).")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="Base URL of the FastAPI app")
+    parser.add_argument("--stub", default="http://127.0.0.1:8081", help="Base URL of the Aevo stand-in ('' to skip upstream counts)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=0, help="Requests sent sequentially before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights per kind: department, departments, user")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--departments", type=int, default=40, help="Must match the stand-in's dataset")
+    parser.add_argument("--users-per-department", type=int, default=25, help="Must match the stand-in's dataset")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fail-on-errors", action="store_true", help="Exit 1 when any request is not 2xx/3xx")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
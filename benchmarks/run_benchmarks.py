@@ -0,0 +1,201 @@
+"""
+Benchmark suite for the report services on synthetic data.
+
+    python -m benchmarks.run_benchmarks --sizes 10000,100000
+    python -m benchmarks.run_benchmarks --sizes 10000,100000 --save-baseline
+    python -m benchmarks.run_benchmarks --sizes 1000000 --repeat 1
+
+Each case is timed 'repeat' times (best run is kept) and then run once more
+under tracemalloc for its peak memory. When a baseline file exists, any case
+slower or heavier than baseline * (1 + tolerance) is reported and the process
+exits with status 1. Baselines are machine-specific: record them on the
+machine that runs the comparison (none is committed). Used as a gate, pass
+--require-baseline: a missing baseline file, size or case then fails (status 2)
+instead of being skipped.
+
+    python -m benchmarks.run_benchmarks --sizes 10000,100000 --require-baseline
+Generating 1M ideas keeps ~1.5 GB of page bytes in memory.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+# Benchmarks não chamam o Aevo, mas src.config exige as variáveis
+os.environ.setdefault("BASE_URL", "http://benchmark.invalid")
+os.environ.setdefault("API_TOKEN", "benchmark")
+
+from pydantic import TypeAdapter
+
+from src.models.user_model import User
+from src.models.analytics_models import BatchDepartmentReport
+from src.services.analytics_service import analytics_service
+from src.services.individual_report_service import individual_report_service
+from src.services.idea_index import IdeaIndex
+from src.services.idea_service import FULL_PAGE_ADAPTER, LEAN_PAGE_ADAPTER
+from src.services.stage_classifier import stage_classifier
+from src.services.user_directory import UserDirectory
+
+from benchmarks.synthetic_data import DatasetConfig, generate_users, iter_idea_pages_json
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+TARGETS = dict(plr_target_per_user=4, dept_individual_target=14, monthly_target_aggregate=67, weekly_target_aggregate=15)
+
+# Diferenças menores que isso são ruído de medição, não regressão
+MIN_SECONDS_DELTA = 0.005
+MIN_PEAK_MB_DELTA = 1.0
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """Returns (best seconds over 'repeat' runs, peak MB of one traced run)."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def run_size(size: int, repeat: int, seed: int) -> Dict[str, Dict[str, float]]:
+    config = DatasetConfig(ideas=size, seed=seed)
+    target_year = config.end_year
+
+    print(f"\n== {size:,} ideas: generating data...")
+    users_raw = generate_users(config)
+    users = TypeAdapter(List[User]).validate_python(users_raw)
+    pages = list(iter_idea_pages_json(config, users_raw))
+    total_mb = sum(len(p) for p in pages) / (1024 * 1024)
+    print(f"   {len(users):,} users, {len(pages)} pages ({total_mb:,.0f} MB of JSON)")
+
+    # Dados compartilhados pelos casos (preparados fora da medição)
+    ideas = [idea for body in pages for idea in LEAN_PAGE_ADAPTER.validate_json(body).result]
+    stage_classifier.annotate(ideas)
+    index = IdeaIndex(ideas)
+    directory = UserDirectory(users)
+    users_by_department = {dept_id: list(members) for dept_id, members in directory.by_department.items()}
+    dept_users = max(users_by_department.values(), key=len)
+    person = dept_users[0]
+    batch_report = BatchDepartmentReport(
+        target_year=target_year,
+        reports=analytics_service.generate_batch_department_reports(users_by_department, [ideas], target_year, **TARGETS),
+        departments_without_users=[]
+    )
+
+    def validate(adapter):
+        for body in pages:
+            stage_classifier.annotate(adapter.validate_json(body).result)
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "validate_full_pages": lambda: validate(FULL_PAGE_ADAPTER),
+        "validate_lean_pages": lambda: validate(LEAN_PAGE_ADAPTER),
+        "build_idea_index": lambda: IdeaIndex(ideas),
+        "department_summary_scan": lambda: analytics_service.generate_department_summary(dept_users, ideas, target_year),
+        "department_summary_indexed": lambda: analytics_service.generate_department_summary(dept_users, ideas, target_year, index=index),
+        "creation_ranking_indexed": lambda: analytics_service.generate_creation_ranking(dept_users, ideas, target_year, **TARGETS, index=index),
+        "combined_report_indexed": lambda: analytics_service.generate_combined_report_from_index(dept_users, index, target_year, **TARGETS),
+        "batch_department_reports": lambda: analytics_service.generate_batch_department_reports(users_by_department, [ideas], target_year, **TARGETS),
+        "individual_report": lambda: individual_report_service.generate_report(users, ideas, target_year, person.username, index=index, directory=directory),
+        "individual_reports_team": lambda: individual_report_service.generate_reports(dept_users, index.ideas_related_to(u.id for u in dept_users), target_year),
+        "serialize_batch_report": lambda: batch_report.model_dump_json(),
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        seconds, peak_mb = measure(fn, repeat)
+        results[name] = {"seconds": round(seconds, 5), "peak_mb": round(peak_mb, 2)}
+        print(f"   {name:<28} {seconds * 1000:>10.1f} ms {peak_mb:>10.1f} MB peak")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    baseline: Dict[str, Any],
+    tolerance: float
+) -> Tuple[List[str], List[str]]:
+    """Returns (regressions, cases missing from the baseline)."""
+    regressions, missing = [], []
+    for size, cases in results.items():
+        for name, current in cases.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                missing.append(f"{size} {name}")
+                continue
+            limit = reference["seconds"] * (1 + tolerance)
+            if current["seconds"] > limit and current["seconds"] - reference["seconds"] > MIN_SECONDS_DELTA:
+                regressions.append(f"{size} {name}: {current['seconds']:.4f}s > {reference['seconds']:.4f}s baseline")
+            limit = reference["peak_mb"] * (1 + tolerance)
+            if current["peak_mb"] > limit and current["peak_mb"] - reference["peak_mb"] > MIN_PEAK_MB_DELTA:
+                regressions.append(f"{size} {name}: {current['peak_mb']:.1f} MB > {reference['peak_mb']:.1f} MB baseline")
+    return regressions, missing
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the analytics/report services on synthetic data.")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated idea counts (e.g. 10000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown/growth over baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="Gate mode: fail (status 2) when the baseline file, a size or a case is missing")
+    args = parser.parse_args()
+
+    # Falha antes de gastar minutos gerando dados
+    if args.require_baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (required). Record one with --save-baseline on this machine.")
+        return 2
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = {str(size): run_size(size, args.repeat, args.seed) for size in sizes}
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions, missing = compare(results, json.load(f), args.tolerance)
+
+    if missing:
+        print(f"\n{'MISSING' if args.require_baseline else 'Not in baseline (skipped)'}:")
+        for line in missing:
+            print(f"  - {line}")
+
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    if missing and args.require_baseline:
+        return 2
+
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Deterministic generator of realistic Aevo payloads (same shape and aliases as
+the API), used by the benchmark suite. The same config + seed always yields
+the same users and ideas.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+# Fluxo típico de uma ideia (rótulos reais do Aevo, com e sem acento)
+STAGE_FLOW = [
+    (1, "Em Análise"),
+    (2, "Aguardando Aprovadores"),
+    (3, "Aprovação do Gestor"),
+    (4, "Em Implantação"),
+    (5, "Em Execução"),
+    (6, "Aguardando Validação"),
+    (7, "Implantada"),
+    (8, "Validada"),
+    (9, "Concluída"),
+]
+CLOSED_STATES = [(10, "Cancelada"), (11, "Reprovada")]
+
+WORDS = (
+    "melhoria processo linha produção redução custo segurança qualidade energia "
+    "manutenção setup logística estoque automação ergonomia desperdício tempo"
+).split()
+
+
+class DatasetConfig:
+    """Size and shape of a synthetic dataset."""
+
+    def __init__(
+        self,
+        ideas: int = 10_000,
+        departments: int = 40,
+        users_per_department: int = 25,
+        stages_per_idea: int = 6,
+        max_implementers: int = 3,
+        start_year: int = 2024,
+        end_year: int = 2025,
+        closed_ratio: float = 0.1,
+        seed: int = 42
+    ):
+        self.ideas = ideas
+        self.departments = departments
+        self.users_per_department = users_per_department
+        self.stages_per_idea = min(stages_per_idea, len(STAGE_FLOW))
+        self.max_implementers = max_implementers
+        self.start_year = start_year
+        self.end_year = end_year
+        self.closed_ratio = closed_ratio
+        self.seed = seed
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def generate_users(config: DatasetConfig) -> List[Dict[str, Any]]:
+    """Active users ('Usuarios' payload)."""
+    rng = random.Random(config.seed)
+    users = []
+    for dept in range(1, config.departments + 1):
+        for n in range(config.users_per_department):
+            number = (dept - 1) * config.users_per_department + n
+            users.append({
+                "Id": f"user-{number:07d}",
+                "Name": f"Colaborador {number}",
+                "UserName": f"{100000 + number}",
+                "Email": f"colaborador{number}@example.com",
+                "Cargo": rng.choice(["Operador", "Técnico", "Analista", "Supervisor", "Engenheiro"]),
+                "Departamento": {
+                    "Id": dept,
+                    "Nome": f"Departamento {dept}",
+                    "Ativa": True
+                },
+                "CriadoEm": "2023-01-02T08:00:00",
+                "Ativo": True
+            })
+    return users
+
+
+def iter_ideas(config: DatasetConfig, users: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yields 'GetIdeias' idea payloads one by one (constant memory)."""
+    rng = random.Random(config.seed + 1)
+    first_day = datetime(config.start_year, 1, 1)
+    span_days = (datetime(config.end_year, 12, 31) - first_day).days
+
+    for idea_id in range(1, config.ideas + 1):
+        creator = rng.choice(users)
+        created_at = first_day + timedelta(days=rng.randrange(span_days), hours=rng.randrange(8, 18))
+
+        implementers = rng.sample(users, rng.randint(0, config.max_implementers))
+
+        # Quantas etapas a ideia já percorreu
+        progress = rng.randint(1, config.stages_per_idea)
+        flow = STAGE_FLOW[:progress]
+        closed = rng.random() < config.closed_ratio
+        if closed:
+            flow = flow + [rng.choice(CLOSED_STATES)]
+
+        stages = []
+        entered = created_at
+        for position, (state_id, label) in enumerate(flow):
+            is_current = position == len(flow) - 1
+            left = None if is_current else entered + timedelta(days=rng.randint(1, 20), hours=rng.randrange(24))
+            stages.append({
+                "FluxoId": 1,
+                "EstadoId": state_id,
+                "IdeiaId": idea_id,
+                "DataEntrada": _fmt(entered),
+                "DataSaida": _fmt(left) if left else None,
+                "DiasNaEtapa": (left - entered).days if left else None,
+                "LabelPt": label,
+                "LabelEn": None,
+                "Observacao": None
+            })
+            if left:
+                entered = left
+
+        state_id, state_name = flow[-1]
+        title = " ".join(rng.choice(WORDS) for _ in range(5)).capitalize()
+        yield {
+            "Id": idea_id,
+            "Estado": state_name,
+            "EstadoId": state_id,
+            "DataAtualizacao": _fmt(entered),
+            "CriadoEm": _fmt(created_at),
+            "Titulo": title,
+            "Descricao": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "Beneficio": " ".join(rng.choice(WORDS) for _ in range(15)),
+            "ValorRetorno": round(rng.random() * 50_000, 2),
+            "PercentualConcluido": round(100 * progress / len(STAGE_FLOW), 1),
+            "ElaboradorId": creator["Id"],
+            "Elaborador": {
+                "Name": creator["Name"],
+                "Email": creator["Email"],
+                "Username": creator["UserName"],
+                "DepartamentoId": creator["Departamento"]["Id"],
+                "Ativo": True
+            },
+            "Departamento": {"Id": creator["Departamento"]["Id"], "Nome": creator["Departamento"]["Nome"], "Ativo": True},
+            "Colaboradores": [],
+            "ResponsaveisImplantacao": [
+                {"IdeiaId": idea_id, "Id": imp["Id"], "Name": imp["Name"]} for imp in implementers
+            ],
+            "CamposAdicionais": [],
+            "CriteriosClassificacaoItens": [],
+            "AnexosIdeia": [],
+            "Etapas": stages
+        }
+
+
+def iter_idea_pages_json(config: DatasetConfig, users: List[Dict[str, Any]], page_size: int = 1000) -> Iterator[bytes]:
+    """Yields raw 'GetIdeias' response bodies (envelope + page of ideas), as the API sends them."""
+    total_pages = max(1, -(-config.ideas // page_size))
+    page, current = [], 1
+    for idea in iter_ideas(config, users):
+        page.append(idea)
+        if len(page) == page_size:
+            yield _page_body(page, current, total_pages, page_size)
+            page, current = [], current + 1
+    if page or current == 1:
+        yield _page_body(page, current, total_pages, page_size)
+
+
+def _page_body(ideas: List[Dict[str, Any]], current: int, total_pages: int, page_size: int) -> bytes:
+    return json.dumps({
+        "resultado": ideas,
+        "numeroPaginas": total_pages,
+        "paginaAtual": current,
+        "itensPorPagina": page_size
+    }, ensure_ascii=False).encode("utf-8")
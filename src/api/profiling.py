@@ -0,0 +1,43 @@
+import cProfile
+import hmac
+import io
+import pstats
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Header, HTTPException, Query
+
+from src.config import Config
+
+# Linhas do relatório (funções mais caras por tempo acumulado)
+PROFILE_TOP_FUNCTIONS = 40
+
+
+def profiling_requested(
+    profile: bool = Query(False, description="Admin only: run the request under cProfile and return the profile"),
+    x_admin_token: Optional[str] = Header(default=None)
+) -> bool:
+    """
+    Dependency for '?profile=true'. Requires the X-Admin-Token header to match
+    Config.ADMIN_TOKEN; profiling is disabled while ADMIN_TOKEN is unset.
+    """
+    if not profile:
+        return False
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (ADMIN_TOKEN not configured)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, Config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Admin-Token header")
+    return True
+
+
+def run_profiled(fn: Callable[[], Any]) -> Tuple[Any, str]:
+    """
+    Runs fn under cProfile (deterministic, current thread only: call it inside
+    the worker thread that does the work). Returns (result, pstats report).
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn)
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_FUNCTIONS)
+    return result, report.getvalue()
@@ -0,0 +1,23 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed.
+    Default response class of the app, so it renders the health, metrics and error
+    bodies. The analytics report routes do NOT go through it: their bodies are
+    serialized once by Pydantic (model_dump_json), cached as bytes and sent as a
+    plain Response (see analytics_router._cached_report_response).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
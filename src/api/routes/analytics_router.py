@@ -1,72 +1,298 @@
-from fastapi import APIRouter, HTTPException, Query
+import logging
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Callable
 
 # Services
 from src.services.analytics_service import analytics_service
-from src.services.external_user_service import external_user_service
-from src.services.idea_service import idea_service
+from src.services.individual_report_service import individual_report_service
+from src.services.snapshot_service import snapshot_service, Snapshot
+from src.services.report_cache import report_cache, build_etag, etag_matches, fingerprint
+from src.services.metrics import metrics, phase
+from src.api.profiling import profiling_requested, run_profiled
 
 # Models
 # IMPORTANTE: Importe o novo modelo combinado e o CreationAnalytics
-from src.models.analytics_models import DepartmentAnalytics, CreationAnalytics, CombinedDepartmentReport
+from src.models.analytics_models import DepartmentAnalytics, CreationAnalytics, CombinedDepartmentReport, BatchDepartmentReport
+from src.models.individual_report_models import IndividualUserReport, BatchIndividualReport
 
 router = APIRouter(prefix="/analytics", tags=["Department Analytics"])
 
+logger = logging.getLogger(__name__)
+
+# Dica: Em produção, você pode querer mover essas metas "hardcoded" para variáveis de ambiente ou configs
+REPORT_TARGETS = {
+    "plr_target_per_user": 4,
+    "dept_individual_target": 14,
+    "monthly_target_aggregate": 67,
+    "weekly_target_aggregate": 15
+}
+
 # MUDANÇA 1: O response_model agora é o Combinado
 @router.get("/department/{department_id}", response_model=CombinedDepartmentReport)
 async def get_department_analytics(
-    department_id: int, 
-    year: int = Query(..., description="The target year for analysis (e.g., 2025)")
+    department_id: int,
+    year: int = Query(..., description="The target year for analysis (e.g., 2025)"),
+    if_none_match: Optional[str] = Header(default=None),
+    profile: bool = Depends(profiling_requested)
 ):
     """
     Generates a complete performance report (Execution + Creation) for a specific department.
+    Responses carry an ETag tied to the data snapshot; send it back in If-None-Match to get a 304.
+    A Server-Timing header breaks the time down into users, ideas, analytics and serialize.
     """
     try:
-        print(f"[API] Request received: Dept {department_id}, Year {year}")
+        logger.info("Request received: Dept %s, Year %s", department_id, year)
+
+        # 1. Current snapshot (refreshed in background: no Aevo calls here)
+        with phase("users"):
+            snapshot = _current_snapshot()
+            dept_users = snapshot.department_users(department_id)
 
-        # 1. Fetch Users
-        dept_users = external_user_service.get_users_by_department_recursive(department_id)
-        
         if not dept_users:
             raise HTTPException(status_code=404, detail=f"No users found for Department {department_id}")
 
-        # 2. Fetch Ideas (Starting 2024)
-        PROGRAM_START_DATE = datetime(2024, 1, 1)
-        end_date = datetime.now()
+        # 2. Generate Execution + Creation/Ranking Reports in a single pass over the department's ideas
+        # Cálculos são CPU-bound: rodam no threadpool para não travar o event loop
+        # Retorna um objeto compatível com CombinedDepartmentReport:
+        # { "execution_analytics": {...}, "creation_analytics": {...} }
+        return await _cached_report_response(
+            cache_key=("department", department_id, year, tuple(REPORT_TARGETS.items())),
+            version=_data_version(snapshot, dept_users),
+            if_none_match=if_none_match,
+            build_report=lambda: analytics_service.generate_combined_report_from_index(
+                department_users=dept_users,
+                index=snapshot.index,
+                target_year=year,
+                **REPORT_TARGETS
+            ),
+            profile=profile
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Importante: O log (com traceback) ajuda a debugar, mas o raise retorna o erro pro cliente (Postman/Browser)
+        logger.exception("Report failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/departments", response_model=BatchDepartmentReport)
+async def get_departments_analytics(
+    year: int = Query(..., description="The target year for analysis (e.g., 2025)"),
+    department_ids: str = Query("all", description="Comma-separated department ids (e.g., 3,7,12) or 'all'"),
+    if_none_match: Optional[str] = Header(default=None),
+    profile: bool = Depends(profiling_requested)
+):
+    """
+    Generates the combined report for many departments at once.
+    Users and ideas come from the current snapshot and every report is built in a single pass.
+    """
+    try:
+        logger.info("Batch request received: Depts %s, Year %s", department_ids, year)
+
+        try:
+            requested_ids = None if department_ids.strip().lower() == "all" else {
+                int(d) for d in department_ids.split(",") if d.strip()
+            }
+        except ValueError:
+            raise HTTPException(status_code=422, detail="department_ids must be 'all' or a comma-separated list of integers")
 
-        print(f"[API] Fetching ideas from {PROGRAM_START_DATE} to {end_date}")
-        all_ideas = idea_service.get_ideas_by_period(PROGRAM_START_DATE, end_date)
+        # 1. Users already grouped by department in the current snapshot (O(1) per department)
+        with phase("users"):
+            snapshot = _current_snapshot()
+            directory = snapshot.directory
+            users_by_department = {}
+            for dept_id in (directory.by_department if requested_ids is None else requested_ids):
+                users = directory.department_users(dept_id)
+                if users:
+                    users_by_department[dept_id] = users
 
-        # 3. Generate Execution Report
-        report_execution = analytics_service.generate_department_summary(
-            department_users=dept_users,
-            all_ideas=all_ideas,
-            target_year=year
+        # 2. Read only the ideas related to the selected users
+        index = snapshot.index
+        selected_users = list({u.id: u for users in users_by_department.values() for u in users}.values())
+
+        def build_batch_report() -> BatchDepartmentReport:
+            with phase("ideas"):
+                related_ideas = index.ideas_related_to(
+                    (u.id for u in selected_users),
+                    creation_months=analytics_service.creation_months(year)
+                )
+
+            # 3. One pass over the ideas for every department
+            reports = analytics_service.generate_batch_department_reports(
+                users_by_department=users_by_department,
+                idea_pages=[related_ideas],
+                target_year=year,
+                **REPORT_TARGETS,
+                index=index
+            )
+            return BatchDepartmentReport(
+                target_year=year,
+                reports=reports,
+                departments_without_users=sorted((requested_ids or set()) - set(users_by_department))
+            )
+
+        requested_key = "all" if requested_ids is None else tuple(sorted(requested_ids))
+        return await _cached_report_response(
+            cache_key=("departments", requested_key, year, tuple(REPORT_TARGETS.items())),
+            version=_data_version(snapshot, selected_users),
+            if_none_match=if_none_match,
+            build_report=build_batch_report,
+            profile=profile
         )
-        
-        # 4. Generate Creation/Ranking Report
-        # Dica: Em produção, você pode querer mover essas metas "hardcoded" para variáveis de ambiente ou configs
-        report_creation = analytics_service.generate_creation_ranking(
-            department_users=dept_users,
-            all_ideas=all_ideas,
-            target_year=year,
-            plr_target_per_user=4,
-            dept_individual_target=14,
-            monthly_target_aggregate=67,
-            weekly_target_aggregate=15
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Report failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/user/{matricula}", response_model=IndividualUserReport, tags=["Individual Reports"])
+async def get_user_report(
+    matricula: str,
+    year: int = Query(..., description="The target year for analysis (e.g., 2025)"),
+    if_none_match: Optional[str] = Header(default=None),
+    profile: bool = Depends(profiling_requested)
+):
+    """
+    Individual report (created ideas + pending/completed implementations) for one matricula.
+    """
+    try:
+        logger.info("Individual request received: Matricula %s, Year %s", matricula, year)
+
+        with phase("users"):
+            snapshot = _current_snapshot()
+            user = snapshot.directory.get_by_username(matricula)
+        if user is None:
+            raise HTTPException(status_code=404, detail=f"User with matricula '{matricula}' not found")
+
+        return await _cached_report_response(
+            cache_key=("user", matricula, year),
+            version=_data_version(snapshot, [user]),
+            if_none_match=if_none_match,
+            build_report=lambda: _individual_reports(snapshot, [user], year)[matricula],
+            profile=profile
         )
 
-        # MUDANÇA 2: Retornar um objeto compatível com CombinedDepartmentReport
-        # Isso cria um JSON: { "execution_analytics": {...}, "creation_analytics": {...} }
-        return CombinedDepartmentReport(
-            execution_analytics=report_execution,
-            creation_analytics=report_creation
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Report failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/users", response_model=BatchIndividualReport, tags=["Individual Reports"])
+async def get_users_reports(
+    year: int = Query(..., description="The target year for analysis (e.g., 2025)"),
+    matriculas: str = Query(..., description="Comma-separated matriculas (e.g., 1001,1002,1003)"),
+    if_none_match: Optional[str] = Header(default=None),
+    profile: bool = Depends(profiling_requested)
+):
+    """
+    Individual reports for many matriculas, built in a single pass over their ideas.
+    """
+    try:
+        requested = list(dict.fromkeys(m.strip() for m in matriculas.split(",") if m.strip()))
+        if not requested:
+            raise HTTPException(status_code=422, detail="matriculas must be a comma-separated list")
+
+        logger.info("Individual batch request received: %d matriculas, Year %s", len(requested), year)
+
+        with phase("users"):
+            snapshot = _current_snapshot()
+            users, not_found = [], []
+            for matricula in requested:
+                user = snapshot.directory.get_by_username(matricula)
+                if user is None:
+                    not_found.append(matricula)
+                else:
+                    users.append(user)
+
+        def build_batch_report() -> BatchIndividualReport:
+            reports = _individual_reports(snapshot, users, year)
+            return BatchIndividualReport(target_year=year, reports=reports, matriculas_not_found=not_found)
+
+        return await _cached_report_response(
+            cache_key=("users", tuple(requested), year),
+            version=_data_version(snapshot, users),
+            if_none_match=if_none_match,
+            build_report=build_batch_report,
+            profile=profile
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"[API Error] {str(e)}")
-        # Importante: O print ajuda a debugar no console, mas o raise retorna o erro pro cliente (Postman/Browser)
-        import traceback
-        traceback.print_exc() 
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
\ No newline at end of file
+        logger.exception("Report failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+# =========================================================================
+# HELPERS (Snapshot + Cache + ETag)
+# =========================================================================
+
+def _current_snapshot() -> Snapshot:
+    snapshot = snapshot_service.current()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Data snapshot is still loading", headers={"Retry-After": "30"})
+    return snapshot
+
+def _data_version(snapshot: Snapshot, users) -> str:
+    """
+    Snapshot version of the ideas + fingerprint of the users that shape the report.
+    Includes today's date because the weekly timeline is relative to 'now'.
+    """
+    users_version = fingerprint(sorted((u.id, u.full_name) for u in users))
+    return f"{snapshot.ideas_version}:{users_version}:{datetime.now().date().isoformat()}"
+
+def _individual_reports(snapshot: Snapshot, users, year: int):
+    # Individual reports only count ideas CREATED in the target year
+    with phase("ideas"):
+        ideas = snapshot.index.ideas_related_to((u.id for u in users), creation_months=[(year, m) for m in range(1, 13)])
+    with metrics.time("analytics_stage_seconds", phase="analytics", stage="individual_reports"):
+        return individual_report_service.generate_reports(users=users, ideas=ideas, target_year=year)
+
+def _build_body(build_report: Callable) -> bytes:
+    # model_dump_json (serializer do pydantic-core) e não orjson: medido mais rápido
+    # que orjson.dumps(report.model_dump()) num relatório em lote de ~4 MB
+    report = build_report()
+    with phase("serialize"):
+        return report.model_dump_json().encode("utf-8")
+
+async def _cached_report_response(
+    cache_key,
+    version: str,
+    if_none_match: Optional[str],
+    build_report: Callable,
+    profile: bool = False
+) -> Response:
+    """
+    Returns 304 when the client already has this version, the cached JSON body
+    when available, or builds + caches the report otherwise.
+    With profile=True (admin), the report is rebuilt under cProfile, bypassing
+    cache and ETag, and the profile is returned as text instead of the report.
+    """
+    report = cache_key[0]
+    etag = build_etag(cache_key, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if profile:
+        _, stats = await run_in_threadpool(lambda: run_profiled(lambda: _build_body(build_report)))
+        return PlainTextResponse(stats, headers={"Cache-Control": "no-store"})
+
+    if etag_matches(if_none_match, etag):
+        metrics.inc("report_not_modified_total", report=report)
+        return Response(status_code=304, headers=headers)
+
+    with phase("cache"):
+        body = report_cache.get((cache_key, version))
+    if body is None:
+        started = time.perf_counter()
+        body = await run_in_threadpool(lambda: _build_body(build_report))
+        metrics.observe("report_build_seconds", time.perf_counter() - started, report=report)
+        report_cache.set((cache_key, version), body)
+    else:
+        logger.debug("Report cache hit: %s", cache_key)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,87 @@
+import logging
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, Iterator
+
+# Services
+from src.services.excel_service import excel_service
+from src.services.idea_store_service import idea_store_service
+from src.services.snapshot_service import snapshot_service
+
+# Models
+from src.models.idea_models import Idea
+
+router = APIRouter(prefix="/export", tags=["Exports"])
+
+logger = logging.getLogger(__name__)
+
+# Colunas da planilha de ideias (ordem = ordem das colunas)
+IDEA_EXPORT_COLUMNS = [
+    "Id", "Titulo", "Estado", "CriadoEm", "DataAtualizacao",
+    "Elaborador", "ElaboradorMatricula", "Departamento", "Campanha", "Tema",
+    "Implantadores", "ValorRetorno", "PercentualConcluido"
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+@router.get("/ideas")
+def export_ideas(
+    start: date = Query(..., description="First creation date (e.g., 2025-01-01)"),
+    end: date = Query(..., description="Last creation date, inclusive (e.g., 2025-12-31)"),
+    format: str = Query("xlsx", pattern="^(csv|xlsx)$", description="'csv' or 'xlsx'")
+):
+    """
+    Exports every idea CREATED in the period as CSV or XLSX.
+    Rows are read page by page from the local idea store, so memory stays flat
+    and nothing is left in 'output/'. Only CSV is streamed (bytes go out as rows
+    are written); XLSX is buffered to a temporary file and sent once complete,
+    so prefer CSV for large periods.
+    """
+    if end < start:
+        raise HTTPException(status_code=422, detail="'end' must be on or after 'start'")
+    if not snapshot_service.is_ready:
+        raise HTTPException(status_code=503, detail="Data snapshot is still loading", headers={"Retry-After": "30"})
+
+    logger.info("Export request received: %s to %s (%s)", start, end, format)
+
+    pages = idea_store_service.iter_idea_pages(datetime.combine(start, time.min), datetime.combine(end, time.max))
+    rows = _idea_rows(pages)
+
+    if format == "csv":
+        body = excel_service.stream_csv(rows, IDEA_EXPORT_COLUMNS)
+    else:
+        body = excel_service.buffered_xlsx(rows, IDEA_EXPORT_COLUMNS, sheet_title="Ideias")
+
+    filename = f"ideas_{start:%Y%m%d}_{end:%Y%m%d}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+def _idea_rows(pages: Iterable[Iterable[Idea]]) -> Iterator[Dict[str, Any]]:
+    for page in pages:
+        for idea in page:
+            yield {
+                "Id": idea.id,
+                "Titulo": idea.title,
+                "Estado": idea.current_stage_name,
+                "CriadoEm": idea.created_at,
+                "DataAtualizacao": idea.updated_at,
+                "Elaborador": idea.creator.name if idea.creator else None,
+                "ElaboradorMatricula": idea.creator.username if idea.creator else None,
+                "Departamento": idea.department.name if idea.department else None,
+                "Campanha": idea.campaign.name if idea.campaign else None,
+                "Tema": idea.theme.name if idea.theme else None,
+                "Implantadores": ", ".join(imp.name for imp in idea.implementers if imp.name),
+                "ValorRetorno": idea.return_value,
+                "PercentualConcluido": idea.completion_percentage
+            }
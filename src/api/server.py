@@ -1,15 +1,43 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
 
 # Import Routers
-from src.api.routes import analytics_router
+from src.api.routes import analytics_router, export_router
+from src.api.responses import FastJSONResponse
+from src.services.http_client import upstream_client
+from src.services.idea_store_service import idea_store_service
+from src.services.metrics import metrics, server_timing_header, track_request_phases
+from src.services.report_cache import report_cache
+from src.services.single_flight import upstream_flight
+from src.services.snapshot_service import snapshot_service
+from src.logging_config import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: load the data snapshot in background. The app serves right away:
+    # report routes answer 503 (Retry-After) until the first refresh succeeds
+    await snapshot_service.start()
+    logger.info("Snapshot refresh started; report routes return 503 until it is ready.")
+    yield
+    # Shutdown: stop the refresher and close pooled upstream connections
+    await snapshot_service.stop()
+    await upstream_client.close()
 
 # App Configuration
 app = FastAPI(
     title="Aevo Deep Fetch Analytics API",
     description="API to extract, process, and analyze innovation data from Aevo.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS (Allow frontend to access)
@@ -21,13 +49,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    End-to-end latency per route template (e.g. /analytics/department/{department_id}).
+    Routes that record phases (users, ideas, analytics, serialize...) also get a
+    Server-Timing header with the breakdown plus the total.
+    """
+    started = time.perf_counter()
+    with track_request_phases() as phases:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    metrics.observe(
+        "http_request_seconds",
+        elapsed,
+        route=getattr(route, "path", "unmatched"),
+        method=request.method,
+        status=str(response.status_code)
+    )
+    if phases:
+        phases["total"] = elapsed
+        response.headers["Server-Timing"] = server_timing_header(phases)
+    return response
+
 # Register Routes
 app.include_router(analytics_router.router)
+app.include_router(export_router.router)
 
 @app.get("/")
 def health_check():
     return {"status": "running", "message": "Welcome to Aevo Deep Fetch API. Go to /docs for Swagger."}
 
+@app.get("/health/snapshot")
+def snapshot_health():
+    """Age and refresh duration of the in-memory data snapshot."""
+    return snapshot_service.status()
+
+@app.get("/health/ready")
+def readiness():
+    """503 until the first snapshot is loaded (use as readiness probe)."""
+    status = snapshot_service.status()
+    return FastJSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/health/idea-partitions")
+def idea_partitions_health():
+    """Last validation of each creation-month partition of the idea store."""
+    return idea_store_service.partition_status()
+
+@app.get("/health/upstream")
+def upstream_health():
+    """Per-host connection pool and retry metrics for the Aevo API client."""
+    return upstream_client.get_pool_metrics()
+
+@app.get("/health/single-flight")
+def single_flight_health():
+    """How many upstream fetches ran vs. were coalesced into an in-flight one."""
+    return upstream_flight.stats()
+
+@app.get("/health/cache")
+def cache_health():
+    """Hit/miss counters of the report response cache."""
+    return report_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus scrape endpoint (upstream, validation, analytics stages, cache and request latency)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _collect_runtime_gauges():
+    snapshot = snapshot_service.status()
+    yield "snapshot_ready", {}, 1 if snapshot["ready"] else 0
+    if snapshot["ready"]:
+        yield "snapshot_age_seconds", {}, snapshot["age_seconds"]
+        yield "snapshot_ideas", {}, snapshot["ideas"]
+        yield "snapshot_users", {}, snapshot["users"]
+
+    cache = report_cache.stats()
+    yield "report_cache_entries", {}, cache["entries"]
+    yield "report_cache_hit_ratio", {}, cache["hit_rate"]
+
+    flight = upstream_flight.stats()
+    yield "single_flight_calls", {"result": "executed"}, flight["executed"]
+    yield "single_flight_calls", {"result": "coalesced"}, flight["coalesced"]
+
+    for host, values in upstream_client.get_pool_metrics().items():
+        if "in_flight" in values:
+            yield "upstream_in_flight", {"host": host}, values["in_flight"]
+
+metrics.register_collector(_collect_runtime_gauges)
+
 # Entry point for running directly
 if __name__ == "__main__":
     # Reload=True allows auto-restart when you change code
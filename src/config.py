@@ -8,6 +8,48 @@ class Config:
     BASE_URL = os.getenv("BASE_URL")
     API_TOKEN = os.getenv("API_TOKEN")
 
+    # Local SQLite store used for incremental idea syncs
+    IDEA_STORE_PATH = os.getenv("IDEA_STORE_PATH", "data/ideas.sqlite3")
+
+    # Arrow IPC copy of the in-memory index (optional, needs pyarrow) for fast restarts
+    IDEA_SNAPSHOT_PATH = os.getenv("IDEA_SNAPSHOT_PATH", "data/ideas.arrow")
+
+    # Idea store partitions (creation month): the last N months are "hot" and fully re-fetched
+    # often; closed months are only probed (idea count) once in a while. Bounded work per sync.
+    IDEA_PARTITION_HOT_MONTHS = int(os.getenv("IDEA_PARTITION_HOT_MONTHS", "2"))
+    IDEA_PARTITION_HOT_REVALIDATE_SECONDS = float(os.getenv("IDEA_PARTITION_HOT_REVALIDATE_SECONDS", "3600"))
+    IDEA_PARTITION_CLOSED_REVALIDATE_SECONDS = float(os.getenv("IDEA_PARTITION_CLOSED_REVALIDATE_SECONDS", "604800"))
+    IDEA_PARTITION_MAX_PER_SYNC = int(os.getenv("IDEA_PARTITION_MAX_PER_SYNC", "3"))
+
+    # Max number of pages requested in parallel from the Aevo API
+    UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "8"))
+
+    # Shared upstream HTTP client (pooling, timeouts, retries)
+    UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "16"))
+    UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "10"))
+    UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "60"))
+    UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+    UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"))
+    UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "10"))
+
+    # Report response cache (LRU + TTL)
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256"))
+    REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "300"))
+
+    # Cached user directory (all active users + department tree)
+    USER_DIRECTORY_TTL_SECONDS = float(os.getenv("USER_DIRECTORY_TTL_SECONDS", "900"))
+
+    # In-memory snapshot refreshed in background (request handlers never call Aevo inline)
+    SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "300"))
+    SNAPSHOT_RETRY_SECONDS = float(os.getenv("SNAPSHOT_RETRY_SECONDS", "30"))
+
+    # Logging: level (DEBUG shows per-page upstream logs) and format ('json' or 'text')
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+    # Token for admin-only request options (e.g. '?profile=true'); unset disables them
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
     @staticmethod
     def validate():
         if not Config.BASE_URL or not Config.API_TOKEN:
@@ -0,0 +1,68 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+from src.config import Config
+
+# Atributos padrão do LogRecord: o resto veio de 'extra=' e vira campo estruturado
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg + every field passed via extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development; extra fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{k}={v}" for k, v in record.__dict__.items() if k not in _RECORD_ATTRIBUTES)
+        return f"{line} {fields}" if fields else line
+
+
+def configure_logging() -> None:
+    """
+    Routes every 'src.*' logger through a QueueHandler: callers only enqueue the
+    record and a background QueueListener thread formats and writes to stdout,
+    so request threads never block on stdout I/O. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(StructuredFormatter() if Config.LOG_FORMAT == "json" else TextFormatter())
+
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger = logging.getLogger("src")
+    logger.handlers = [logging.handlers.QueueHandler(records)]
+    logger.setLevel(Config.LOG_LEVEL.upper())
+    logger.propagate = False
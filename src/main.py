@@ -1,7 +1,10 @@
 from datetime import datetime
-from src.services.idea_service import idea_service
+from src.logging_config import configure_logging
+from src.services.idea_store_service import idea_store_service
 
 def main():
+    configure_logging()
+
     # 1. Define the period (Example: Last Month)
     start_period = datetime(2025, 1, 1, 0, 0, 0)
     end_period = datetime(2025, 12, 31, 23, 59, 59)
@@ -9,8 +12,8 @@ def main():
     print(f"Starting fetch for period: {start_period} to {end_period}")
 
     try:
-        # Call the service passing ONLY the period
-        all_ideas = idea_service.get_ideas_by_period(start_period, end_period)
+        # Call the service passing ONLY the period (stored months are read locally)
+        all_ideas = idea_store_service.get_ideas_for_period(start_period, end_period)
 
         # Process results
         print("\n--- Summary ---")
@@ -66,4 +66,11 @@ class CreationAnalytics(BaseModel):
 
 class CombinedDepartmentReport(BaseModel):
     execution_analytics: DepartmentAnalytics
-    creation_analytics: CreationAnalytics
\ No newline at end of file
+    creation_analytics: CreationAnalytics
+
+class BatchDepartmentReport(BaseModel):
+    target_year: int
+    # department_id -> relatório combinado
+    reports: Dict[int, CombinedDepartmentReport]
+    # Departamentos pedidos que não possuem usuários ativos
+    departments_without_users: List[int] = Field(default_factory=list)
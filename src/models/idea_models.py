@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union, Generic, TypeVar
 from datetime import datetime
 
 # --- Support Models (Nested Objects) ---
@@ -89,6 +89,9 @@ class Stage(BaseModel):
     
     observation: Optional[str] = Field(default=None, alias="Observacao")
 
+    # Derived at ingestion by StageClassifier (StagePhase flags). Not serialized.
+    phase: Optional[int] = Field(default=None, exclude=True)
+
 # --- Main Model ---
 
 class Idea(BaseModel):
@@ -130,6 +133,69 @@ class Idea(BaseModel):
     attachments: List[Attachment] = Field(default_factory=list, alias="AnexosIdeia")
     stages: List[Stage] = Field(default_factory=list, alias="Etapas")
 
+    # Derived at ingestion by StageClassifier (StatusCategory). Not serialized.
+    status_category: Optional[str] = Field(default=None, exclude=True)
+
     class Config:
         populate_by_name = True
-        extra = "ignore" # Ignora campos extras que não mapeamos para não dar erro
\ No newline at end of file
+        extra = "ignore" # Ignora campos extras que não mapeamos para não dar erro
+
+# --- Lean Projection (Analytics) ---
+
+class AnalyticsStage(BaseModel):
+    """
+    Projection of Stage with only the fields read by the analytics services.
+    """
+    flow_id: Optional[int] = Field(default=None, alias="FluxoId")
+    state_id: Optional[int] = Field(default=None, alias="EstadoId")
+    start_date: Optional[datetime] = Field(default=None, alias="DataEntrada")
+    end_date: Optional[datetime] = Field(default=None, alias="DataSaida")
+    label_pt: Optional[str] = Field(default=None, alias="LabelPt")
+
+    phase: Optional[int] = Field(default=None, exclude=True)
+
+class AnalyticsIdea(BaseModel):
+    """
+    Projection of Idea used by AnalyticsService and IndividualReportService.
+    Heavy fields (description, benefit, attachments, criteria, additional fields,
+    collaborators, nested campaign/department/theme) are skipped during validation.
+    Use Idea when the full record is needed.
+    """
+    id: int = Field(alias="Id")
+
+    # Status Info
+    current_stage_name: Optional[str] = Field(default=None, alias="Estado")
+    current_stage_id: int = Field(alias="EstadoId")
+
+    # Dates
+    updated_at: datetime = Field(alias="DataAtualizacao")
+    created_at: datetime = Field(alias="CriadoEm")
+
+    title: Optional[str] = Field(default=None, alias="Titulo")
+    creator_id: Optional[str] = Field(default=None, alias="ElaboradorId")
+
+    implementers: List[Implementer] = Field(default_factory=list, alias="ResponsaveisImplantacao")
+    stages: List[AnalyticsStage] = Field(default_factory=list, alias="Etapas")
+
+    status_category: Optional[str] = Field(default=None, exclude=True)
+
+    class Config:
+        populate_by_name = True
+        extra = "ignore"
+
+# Qualquer uma das duas representações serve para os relatórios
+IdeaLike = Union[Idea, AnalyticsIdea]
+
+# --- API Envelope (GetIdeias v2) ---
+
+IdeaT = TypeVar("IdeaT", Idea, AnalyticsIdea)
+
+class IdeaPage(BaseModel, Generic[IdeaT]):
+    """
+    One page of GetIdeias. Validated straight from the response bytes
+    (IdeaPage[Idea] or IdeaPage[AnalyticsIdea]).
+    """
+    result: Optional[List[IdeaT]] = Field(default=None, alias="resultado")
+    total_pages: Optional[int] = Field(default=1, alias="numeroPaginas")
+    current_page: Optional[int] = Field(default=1, alias="paginaAtual")
+    items_per_page: Optional[int] = Field(default=0, alias="itensPorPagina")
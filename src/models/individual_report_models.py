@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List
 # Importamos objetos básicos compartilhados (Status e Info da Ideia)
 from src.models.analytics_models import StatusDistribution, IdeaBasicInfo
 
@@ -21,4 +21,12 @@ class IndividualUserReport(BaseModel):
     
     completed_implementation_count: int
     # Opcional: Lista das concluídas se quiser exibir no futuro
-    # completed_implementation_list: List[IdeaBasicInfo] = []
\ No newline at end of file
+    # completed_implementation_list: List[IdeaBasicInfo] = []
+
+class BatchIndividualReport(BaseModel):
+    """
+    Relatórios individuais de várias matrículas, calculados em uma única passada.
+    """
+    target_year: int
+    reports: Dict[str, IndividualUserReport]
+    matriculas_not_found: List[str]
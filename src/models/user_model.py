@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class DepartmentInfo(BaseModel):
@@ -33,4 +33,13 @@ class User(BaseModel):
     is_active: bool = Field(alias="Ativo")
 
     class Config:
-        populate_by_name = True
\ No newline at end of file
+        populate_by_name = True
+
+class UserPage(BaseModel):
+    """
+    One page of apiExterna/Usuarios, validated straight from the response bytes.
+    """
+    success: bool = Field(default=False, alias="sucesso")
+    message: Optional[str] = Field(default=None, alias="mensagem")
+    result: Optional[List[User]] = Field(default=None, alias="resultado")
+    total_pages: Optional[int] = Field(default=1, alias="numeroTotalPaginas")
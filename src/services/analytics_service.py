@@ -1,9 +1,15 @@
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Dict, Optional, Tuple, Set, Iterable
+import numpy as np
 from collections import defaultdict, Counter
-from datetime import datetime, timedelta
+from datetime import date, datetime
 
 from src.models.user_model import User
-from src.models.idea_models import Idea
+from src.models.idea_models import IdeaLike
+from src.services.stage_classifier import stage_classifier
+from src.services.idea_index import IdeaIndex
+from src.services.idea_rollups import FUNNEL_METRICS, MONTH, WEEK, PeriodKey
+from src.services.idea_table import IdeaTable, monthly_counts, weekly_counts, week_labels, week_window, to_epoch_day
+from src.services.metrics import metrics
 from src.models.analytics_models import (
     DepartmentAnalytics, 
     UserRankingEntry, 
@@ -13,22 +19,29 @@ from src.models.analytics_models import (
     CreationAnalytics, 
     UserCreationStats, 
     IdeaBasicInfo, 
-    TimelineComparison
+    TimelineComparison,
+    CombinedDepartmentReport
 )
 
 class AnalyticsService:
-    
-    # --- CONSTANTES ---
-    APPROVAL_KEYWORDS = ["aprovadores", "aprovacao", "aprovação"]
-    IN_IMPLEMENTATION_KEYWORDS = ["em implantacao", "em implantação", "execucao", "execução"]
-    IMPLEMENTATION_KEYWORDS = ["implantada", "implantação", "implantacao", "validada", "concluida"]
 
     # =========================================================================
     # PART 1: FUNÇÕES GRANULARES (REUTILIZÁVEIS)
     # =========================================================================
 
-    def filter_ideas_by_implementer_dept(self, all_ideas: List[Idea], dept_user_ids: Set[str]) -> List[Idea]:
-        """Retorna apenas ideias onde pelo menos um implantador pertence ao set de IDs fornecido."""
+    def filter_ideas_by_implementer_dept(
+        self,
+        all_ideas: List[IdeaLike],
+        dept_user_ids: Set[str],
+        index: Optional[IdeaIndex] = None
+    ) -> List[IdeaLike]:
+        """
+        Retorna apenas ideias onde pelo menos um implantador pertence ao set de IDs fornecido.
+        Com 'index' (construído sobre all_ideas), consulta o índice em vez de varrer tudo.
+        """
+        if index is not None:
+            return index.ideas_implemented_by(dept_user_ids)
+
         relevant_ideas = []
         for idea in all_ideas:
             for imp in idea.implementers:
@@ -37,97 +50,59 @@ class AnalyticsService:
                     break
         return relevant_ideas
 
-    def calculate_status_distribution(self, ideas: List[Idea]) -> List[StatusDistribution]:
+    def calculate_status_distribution(self, ideas: List[IdeaLike]) -> List[StatusDistribution]:
         """Calcula a porcentagem de distribuição dos status para uma lista de ideias."""
-        total = len(ideas)
-        if total == 0:
-            return []
-            
         counter = Counter([idea.current_stage_name or "Sem Status" for idea in ideas])
-        
-        dist = [
-            StatusDistribution(
-                status_title=k, 
-                count=v, 
-                percentage=round((v / total) * 100, 2)
-            )
-            for k, v in counter.items()
-        ]
-        dist.sort(key=lambda x: x.percentage, reverse=True)
-        return dist
+        return self._counter_to_distribution(counter, len(ideas))
 
-    def rank_implementers(self, ideas: List[Idea], dept_user_ids: Set[str], dept_user_map: Dict[str, str]) -> List[UserRankingEntry]:
+    def rank_implementers(self, ideas: List[IdeaLike], dept_user_ids: Set[str], dept_user_map: Dict[str, str]) -> List[UserRankingEntry]:
         """Gera o ranking de usuários que atuaram como implantadores nas ideias fornecidas."""
         user_ideas_map = defaultdict(list)
 
         for idea in ideas:
-            status = idea.current_stage_name or "Sem Status"
-            for imp in idea.implementers:
-                if imp.user_id in dept_user_ids:
-                    user_ideas_map[imp.user_id].append(
-                        IdeaStatusSummary(title=idea.title or "Sem Título", status=status)
-                    )
+            self._add_implementer_entries(idea, dept_user_ids, user_ideas_map)
         
-        ranking = [
-            UserRankingEntry(
-                user_name=dept_user_map.get(uid, f"User {uid}"), 
-                total_ideas=len(l), 
-                ideas_summary=l
-            )
-            for uid, l in user_ideas_map.items()
-        ]
-        ranking.sort(key=lambda x: x.total_ideas, reverse=True)
-        return ranking
+        return self._build_implementer_ranking(user_ideas_map, dept_user_map)
 
-    def calculate_implementation_timelines(self, ideas: List[Idea], target_year: int) -> Tuple[List[TimelineMetric], List[TimelineMetric]]:
+    def calculate_implementation_timelines(
+        self,
+        ideas: List[IdeaLike],
+        target_year: int,
+        table: Optional[IdeaTable] = None,
+        index: Optional[IdeaIndex] = None,
+        dept_user_ids: Optional[Set[str]] = None
+    ) -> Tuple[List[TimelineMetric], List[TimelineMetric]]:
         """
         Processa o funil de execução (Envio -> Validação -> Conclusão).
         Retorna tupla: (monthly_timeline, weekly_timeline)
+        Se 'table' (construída com build_idea_table) for informada, as datas já
+        convertidas são reaproveitadas e a contagem é vetorizada.
+        Sem 'table', 'index' + 'dept_user_ids' somam os rollups do índice
+        (ideas deve ser index.ideas_implemented_by(dept_user_ids)).
         """
-        now = datetime.now()
-        ten_weeks_ago = now - timedelta(weeks=10)
+        if table is None and index is not None and dept_user_ids is not None:
+            monthly_data, weekly_data = self._rollup_funnel_buckets(index, dept_user_ids, target_year, datetime.now())
+            return (self._dict_to_timeline_metric_list(monthly_data), self._dict_to_timeline_metric_list(weekly_data))
 
-        # Inicializar Buckets
-        monthly_data = {f"{target_year}-{m:02d}": {"sent": 0, "sent_val": 0, "validated": 0} for m in range(1, 13)}
-        weekly_data = {}
-        for i in range(10):
-            d = now - timedelta(weeks=i)
-            weekly_data[f"{d.isocalendar().year}-W{d.isocalendar().week:02d}"] = {"sent": 0, "sent_val": 0, "validated": 0}
-
-        for idea in ideas:
-            # Identificar Etapas
-            stage_aprovadores = None
-            stage_em_implantacao = None
-            stage_implantada = None
-
-            for stage in idea.stages:
-                label = (stage.label_pt or "").lower()
-                if any(k in label for k in self.APPROVAL_KEYWORDS):
-                    stage_aprovadores = stage
-                if any(k in label for k in self.IN_IMPLEMENTATION_KEYWORDS):
-                    stage_em_implantacao = stage
-                if any(k in label for k in self.IMPLEMENTATION_KEYWORDS):
-                    stage_implantada = stage
-
-            # Preencher Buckets
-            if stage_aprovadores and self._is_valid_date(stage_aprovadores.end_date):
-                self._add_to_buckets(stage_aprovadores.end_date.replace(tzinfo=None), "sent", monthly_data, weekly_data, target_year, ten_weeks_ago)
-
-            if stage_em_implantacao and self._is_valid_date(stage_em_implantacao.end_date):
-                self._add_to_buckets(stage_em_implantacao.end_date.replace(tzinfo=None), "sent_val", monthly_data, weekly_data, target_year, ten_weeks_ago)
-
-            if stage_implantada and self._is_valid_date(stage_implantada.start_date):
-                self._add_to_buckets(stage_implantada.start_date.replace(tzinfo=None), "validated", monthly_data, weekly_data, target_year, ten_weeks_ago)
+        if table is None:
+            table = self.build_idea_table(ideas)
+            rows = slice(None)
+        else:
+            rows = table.rows_for(ideas)
 
+        monthly_data, weekly_data = self._funnel_buckets(
+            table.sent_day[rows], table.sent_val_day[rows], table.validated_day[rows], target_year, datetime.now()
+        )
         return (self._dict_to_timeline_metric_list(monthly_data), self._dict_to_timeline_metric_list(weekly_data))
 
     def rank_creators(
         self, 
         department_users: List[User], 
-        all_ideas: List[Idea], 
+        all_ideas: List[IdeaLike], 
         target_year: int,
         plr_target: int,
-        dept_target: int
+        dept_target: int,
+        index: Optional[IdeaIndex] = None
     ) -> List[UserCreationStats]:
         """
         Rankeia usuários por ideias criadas no ano alvo. 
@@ -138,75 +113,59 @@ class AnalyticsService:
             u.id: {"user_name": u.full_name, "ideas": []} 
             for u in department_users
         }
+
+        if index is not None:
+            all_ideas = index.ideas_created_by(user_stats_map.keys(), year=target_year)
         
         # Preencher com ideias
         for idea in all_ideas:
-            if not idea.created_at or not idea.creator_id:
-                continue
-            
-            created_at = idea.created_at.replace(tzinfo=None)
-            
-            # Filtro: Ano Alvo e Usuário pertence ao mapa (departamento)
-            if created_at.year == target_year and idea.creator_id in user_stats_map:
-                user_stats_map[idea.creator_id]["ideas"].append(
-                    IdeaBasicInfo(
-                        id=idea.id,
-                        title=idea.title or "Sem Título",
-                        status=idea.current_stage_name or "Unknown"
-                    )
-                )
+            self._add_creator_entry(idea, user_stats_map, target_year)
 
-        # Converter para Lista de Objetos
-        ranking_list = []
-        for uid, data in user_stats_map.items():
-            total = len(data["ideas"])
-            ranking_list.append(UserCreationStats(
-                user_id=uid,
-                user_name=data["user_name"],
-                total_sent=total,
-                has_submitted_idea=(total > 0),
-                hit_plr_target=(total >= plr_target),
-                hit_dept_individual_target=(total >= dept_target),
-                ideas=data["ideas"]
-            ))
-        
-        ranking_list.sort(key=lambda x: x.total_sent, reverse=True)
-        return ranking_list
+        return self._build_creator_ranking(user_stats_map, plr_target, dept_target)
 
-    def calculate_creation_counts(self, all_ideas: List[Idea], dept_user_ids: Set[str], target_year: int) -> Tuple[Dict, Dict]:
+    def calculate_creation_counts(
+        self,
+        all_ideas: List[IdeaLike],
+        dept_user_ids: Set[str],
+        target_year: int,
+        table: Optional[IdeaTable] = None,
+        index: Optional[IdeaIndex] = None
+    ) -> Tuple[Dict, Dict]:
         """
         Retorna dicionários com contagem crua de criação de ideias por mês e semana.
         Útil para montar timelines depois.
+        Se 'table' for informada, ela deve ter sido construída a partir de all_ideas.
+        Sem 'table', um 'index' responde pelos rollups (soma por usuário e período).
         """
-        now = datetime.now()
-        ten_weeks_ago = now - timedelta(weeks=10)
-        
-        monthly_data = {f"{target_year}-{m:02d}": 0 for m in range(1, 13)}
-        weekly_data = {}
-        for i in range(10):
-            d = now - timedelta(weeks=i)
-            weekly_data[f"{d.isocalendar().year}-W{d.isocalendar().week:02d}"] = 0
+        if table is None and index is not None:
+            return self._rollup_count_buckets(index, dept_user_ids, target_year, datetime.now())
 
-        for idea in all_ideas:
-            if not idea.created_at or idea.creator_id not in dept_user_ids:
-                continue
-            
-            created_at = idea.created_at.replace(tzinfo=None)
-
-            # Mensal (Ano Alvo)
-            if created_at.year == target_year:
-                m_key = created_at.strftime("%Y-%m")
-                if m_key in monthly_data:
-                    monthly_data[m_key] += 1
-            
-            # Semanal (Últimas 10)
-            if created_at >= ten_weeks_ago:
-                iso_y, iso_w, _ = created_at.isocalendar()
-                w_key = f"{iso_y}-W{iso_w:02d}"
-                if w_key in weekly_data:
-                    weekly_data[w_key] += 1
-                    
-        return monthly_data, weekly_data
+        if table is None:
+            table = self.build_idea_table(all_ideas)
+
+        created_days = table.created_day[table.rows_created_by(dept_user_ids)]
+        return self._count_buckets(created_days, target_year, datetime.now())
+
+    def creation_months(self, target_year: int, now: Optional[datetime] = None) -> Set[Tuple[int, int]]:
+        """
+        (year, month) pairs whose CREATED ideas can show up in the creation analytics:
+        the 12 months of target_year plus the months touched by the weekly window.
+        Execution analytics are not limited by date (they read every implemented idea).
+        """
+        months = {(target_year, m) for m in range(1, 13)}
+        first_day, last_day = week_window(now or datetime.now())
+        current = date(first_day.year, first_day.month, 1)
+        while current <= last_day:
+            months.add((current.year, current.month))
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        return months
+
+    def build_idea_table(self, ideas: Iterable[IdeaLike]) -> IdeaTable:
+        """
+        Converte as ideias UMA vez para o formato colunar usado nas contagens vetorizadas.
+        Reutilize a tabela entre relatórios do mesmo conjunto de ideias.
+        """
+        return IdeaTable.from_ideas(ideas, self._funnel_dates)
 
     # =========================================================================
     # PART 2: ORQUESTRADORES DE RELATÓRIO
@@ -215,8 +174,10 @@ class AnalyticsService:
     def generate_department_summary(
         self, 
         department_users: List[User], 
-        all_ideas: List[Idea],
-        target_year: int
+        all_ideas: List[IdeaLike],
+        target_year: int,
+        table: Optional[IdeaTable] = None,
+        index: Optional[IdeaIndex] = None
     ) -> DepartmentAnalytics:
         
         # 1. Preparar IDs
@@ -224,12 +185,17 @@ class AnalyticsService:
         dept_user_map = {u.id: u.full_name for u in department_users}
         
         # 2. Filtrar
-        relevant_ideas = self.filter_ideas_by_implementer_dept(all_ideas, dept_user_ids)
+        with metrics.time("analytics_stage_seconds", phase="ideas", stage="summary_filter"):
+            relevant_ideas = self.filter_ideas_by_implementer_dept(all_ideas, dept_user_ids, index)
         
         # 3. Calcular Componentes usando funções granulares
-        ranking = self.rank_implementers(relevant_ideas, dept_user_ids, dept_user_map)
-        dist = self.calculate_status_distribution(relevant_ideas)
-        m_timeline, w_timeline = self.calculate_implementation_timelines(relevant_ideas, target_year)
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="summary_ranking"):
+            ranking = self.rank_implementers(relevant_ideas, dept_user_ids, dept_user_map)
+            dist = self.calculate_status_distribution(relevant_ideas)
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="summary_timelines"):
+            m_timeline, w_timeline = self.calculate_implementation_timelines(
+                relevant_ideas, target_year, table, index, dept_user_ids
+            )
 
         # 4. Montar Objeto
         return DepartmentAnalytics(
@@ -243,64 +209,269 @@ class AnalyticsService:
     def generate_creation_ranking(
         self,
         department_users: List[User],
-        all_ideas: List[Idea],
+        all_ideas: List[IdeaLike],
         target_year: int,
         plr_target_per_user: int,
         dept_individual_target: int,
         monthly_target_aggregate: int,
-        weekly_target_aggregate: int
+        weekly_target_aggregate: int,
+        table: Optional[IdeaTable] = None,
+        index: Optional[IdeaIndex] = None
     ) -> CreationAnalytics:
         
         dept_user_ids = {u.id for u in department_users}
         
         # 1. Ranking Individual
-        user_ranking = self.rank_creators(
-            department_users, all_ideas, target_year, plr_target_per_user, dept_individual_target
-        )
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="creation_ranking"):
+            user_ranking = self.rank_creators(
+                department_users, all_ideas, target_year, plr_target_per_user, dept_individual_target, index
+            )
         
         # 2. Contagens de Tempo
-        raw_monthly, raw_weekly = self.calculate_creation_counts(all_ideas, dept_user_ids, target_year)
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="creation_counts"):
+            raw_monthly, raw_weekly = self.calculate_creation_counts(all_ideas, dept_user_ids, target_year, table, index)
         
         # 3. Transformar Contagens em Objetos de Comparação com Meta
-        monthly_timeline = [
-            TimelineComparison(period=k, total_sent=v, target=monthly_target_aggregate, hit_target=(v >= monthly_target_aggregate))
-            for k, v in raw_monthly.items()
-        ]
-        monthly_timeline.sort(key=lambda x: x.period)
-
-        weekly_timeline = [
-            TimelineComparison(period=k, total_sent=v, target=weekly_target_aggregate, hit_target=(v >= weekly_target_aggregate))
-            for k, v in raw_weekly.items()
-        ]
-        weekly_timeline.sort(key=lambda x: x.period)
-
         return CreationAnalytics(
             target_year=target_year,
             user_ranking=user_ranking,
-            monthly_timeline=monthly_timeline,
-            weekly_timeline=weekly_timeline
+            monthly_timeline=self._counts_to_timeline_comparison(raw_monthly, monthly_target_aggregate),
+            weekly_timeline=self._counts_to_timeline_comparison(raw_weekly, weekly_target_aggregate)
         )
 
+    def generate_combined_report(
+        self,
+        department_users: List[User],
+        idea_pages: Iterable[List[IdeaLike]],
+        target_year: int,
+        plr_target_per_user: int,
+        dept_individual_target: int,
+        monthly_target_aggregate: int,
+        weekly_target_aggregate: int,
+        index: Optional[IdeaIndex] = None
+    ) -> CombinedDepartmentReport:
+        """
+        Builds Execution + Creation analytics in ONE pass over a stream of idea pages.
+        Only the current page needs to be in memory.
+        With 'index' (the pages must come from it), timelines come from its rollups.
+        """
+        aggregator = DepartmentReportAggregator(
+            self,
+            department_users=department_users,
+            target_year=target_year,
+            plr_target_per_user=plr_target_per_user,
+            dept_individual_target=dept_individual_target,
+            monthly_target_aggregate=monthly_target_aggregate,
+            weekly_target_aggregate=weekly_target_aggregate,
+            index=index
+        )
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="combined_aggregate"):
+            for page in idea_pages:
+                aggregator.add_page(page)
+
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="combined_build"):
+            return aggregator.build()
+
+    def generate_combined_report_from_index(
+        self,
+        department_users: List[User],
+        index: IdeaIndex,
+        target_year: int,
+        plr_target_per_user: int,
+        dept_individual_target: int,
+        monthly_target_aggregate: int,
+        weekly_target_aggregate: int
+    ) -> CombinedDepartmentReport:
+        """
+        Same report as generate_combined_report, but only the department's ideas are
+        read from the index: everything its users implemented, plus what they created
+        inside the creation window (creation_months). Timelines are summed from the
+        index rollups.
+        """
+        with metrics.time("analytics_stage_seconds", phase="ideas", stage="index_lookup"):
+            dept_ideas = index.ideas_related_to(
+                (u.id for u in department_users),
+                creation_months=self.creation_months(target_year)
+            )
+        return self.generate_combined_report(
+            department_users,
+            [dept_ideas],
+            target_year,
+            plr_target_per_user,
+            dept_individual_target,
+            monthly_target_aggregate,
+            weekly_target_aggregate,
+            index
+        )
+
+    def generate_batch_department_reports(
+        self,
+        users_by_department: Dict[int, List[User]],
+        idea_pages: Iterable[List[IdeaLike]],
+        target_year: int,
+        plr_target_per_user: int,
+        dept_individual_target: int,
+        monthly_target_aggregate: int,
+        weekly_target_aggregate: int,
+        index: Optional[IdeaIndex] = None
+    ) -> Dict[int, CombinedDepartmentReport]:
+        """
+        Builds a CombinedDepartmentReport for every department in ONE pass over the ideas.
+        Each idea is routed only to the departments of its creator and implementers.
+        With 'index' (the pages must come from it), timelines come from its rollups.
+        """
+        aggregators = {
+            dept_id: DepartmentReportAggregator(
+                self,
+                department_users=users,
+                target_year=target_year,
+                plr_target_per_user=plr_target_per_user,
+                dept_individual_target=dept_individual_target,
+                monthly_target_aggregate=monthly_target_aggregate,
+                weekly_target_aggregate=weekly_target_aggregate,
+                index=index
+            )
+            for dept_id, users in users_by_department.items()
+        }
+        dept_by_user = {u.id: dept_id for dept_id, users in users_by_department.items() for u in users}
+
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="batch_aggregate"):
+            for page in idea_pages:
+                ideas_by_dept = defaultdict(list)
+                for idea in page:
+                    depts = {dept_by_user.get(imp.user_id) for imp in idea.implementers}
+                    depts.add(dept_by_user.get(idea.creator_id))
+                    depts.discard(None)
+                    for dept_id in depts:
+                        ideas_by_dept[dept_id].append(idea)
+
+                for dept_id, dept_ideas in ideas_by_dept.items():
+                    aggregators[dept_id].add_page(dept_ideas)
+
+        with metrics.time("analytics_stage_seconds", phase="analytics", stage="batch_build"):
+            return {dept_id: aggregator.build() for dept_id, aggregator in aggregators.items()}
+
     # =========================================================================
     # PART 3: HELPERS PRIVADOS
     # =========================================================================
 
-    def _is_valid_date(self, dt: Optional[datetime]) -> bool:
-        if not dt or dt.year < 1900: return False
-        return True
-
-    def _add_to_buckets(self, dt, key, monthly, weekly, target_year, week_cutoff):
-        # Mensal
-        if dt.year == target_year:
-            m_key = dt.strftime("%Y-%m")
-            if m_key in monthly:
-                monthly[m_key][key] += 1
-        # Semanal
-        if dt >= week_cutoff:
-            iso_y, iso_w, _ = dt.isocalendar()
-            w_key = f"{iso_y}-W{iso_w:02d}"
-            if w_key in weekly:
-                weekly[w_key][key] += 1
+    def _funnel_dates(self, idea: IdeaLike) -> Tuple[Optional[datetime], Optional[datetime], Optional[datetime]]:
+        """
+        Datas do funil de uma ideia: (enviada p/ implantação, enviada p/ validação, validada).
+        Datas inválidas viram None. (Mesma regra usada pelos rollups do IdeaIndex.)
+        """
+        return stage_classifier.funnel_dates(idea)
+
+    def _add_implementer_entries(self, idea: IdeaLike, dept_user_ids: Set[str], user_ideas_map: Dict[str, List[IdeaStatusSummary]]):
+        status = idea.current_stage_name or "Sem Status"
+        for imp in idea.implementers:
+            if imp.user_id in dept_user_ids:
+                user_ideas_map[imp.user_id].append(
+                    IdeaStatusSummary(title=idea.title or "Sem Título", status=status)
+                )
+
+    def _add_creator_entry(self, idea: IdeaLike, user_stats_map: Dict[str, Dict], target_year: int):
+        if not idea.created_at or not idea.creator_id:
+            return
+        
+        created_at = idea.created_at.replace(tzinfo=None)
+        
+        # Filtro: Ano Alvo e Usuário pertence ao mapa (departamento)
+        if created_at.year == target_year and idea.creator_id in user_stats_map:
+            user_stats_map[idea.creator_id]["ideas"].append(
+                IdeaBasicInfo(
+                    id=idea.id,
+                    title=idea.title or "Sem Título",
+                    status=idea.current_stage_name or "Unknown"
+                )
+            )
+
+    def _count_buckets(self, days: np.ndarray, target_year: int, now: datetime) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Conta datas (em dias epoch) por mês do ano alvo e pelas últimas 10 semanas ISO."""
+        m_counts = monthly_counts(days, target_year)
+        w_labels, w_counts = weekly_counts(days, now)
+
+        monthly = {f"{target_year}-{m:02d}": int(m_counts[m - 1]) for m in range(1, 13)}
+        weekly = {label: int(count) for label, count in zip(w_labels, w_counts)}
+        return monthly, weekly
+
+    def _funnel_buckets(self, sent_days, sent_val_days, validated_days, target_year: int, now: datetime):
+        """Monta os buckets {"sent", "sent_val", "validated"} por mês e semana."""
+        monthly, weekly = {}, {}
+        for key, days in (("sent", sent_days), ("sent_val", sent_val_days), ("validated", validated_days)):
+            m_counts, w_counts = self._count_buckets(days, target_year, now)
+            for period, count in m_counts.items():
+                monthly.setdefault(period, {})[key] = count
+            for period, count in w_counts.items():
+                weekly.setdefault(period, {})[key] = count
+        return monthly, weekly
+
+    def _rollup_periods(self, target_year: int, now: datetime) -> Tuple[List[str], List[str], List[PeriodKey]]:
+        """Labels of the 12 months and 10 weeks used by _count_buckets, plus their rollup keys (months first)."""
+        first_month = (target_year - 1970) * 12
+        month_labels = [f"{target_year}-{m:02d}" for m in range(1, 13)]
+        labels, weeks = week_labels(now)
+        periods = [(MONTH, first_month + i) for i in range(12)] + [(WEEK, w) for w in weeks]
+        return month_labels, labels, periods
+
+    def _rollup_count_buckets(self, index: IdeaIndex, user_ids: Set[str], target_year: int, now: datetime) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Same result as _count_buckets over the ideas user_ids created, from the index rollups."""
+        month_labels, labels, periods = self._rollup_periods(target_year, now)
+        counts = index.creation_counts(user_ids, periods)
+        return dict(zip(month_labels, counts[:12])), dict(zip(labels, counts[12:]))
+
+    def _rollup_funnel_buckets(self, index: IdeaIndex, user_ids: Set[str], target_year: int, now: datetime):
+        """Same result as _funnel_buckets over the ideas user_ids implemented, from the index rollups."""
+        month_labels, labels, periods = self._rollup_periods(target_year, now)
+        series = index.funnel_counts(user_ids, periods)
+        buckets = [{metric: series[metric][i] for metric in FUNNEL_METRICS} for i in range(len(periods))]
+        return dict(zip(month_labels, buckets[:12])), dict(zip(labels, buckets[12:]))
+
+    def _counter_to_distribution(self, counter: Counter, total: int) -> List[StatusDistribution]:
+        if total == 0:
+            return []
+
+        dist = [
+            StatusDistribution(
+                status_title=k, 
+                count=v, 
+                percentage=round((v / total) * 100, 2)
+            )
+            for k, v in counter.items()
+        ]
+        dist.sort(key=lambda x: x.percentage, reverse=True)
+        return dist
+
+    def _build_implementer_ranking(self, user_ideas_map: Dict[str, List[IdeaStatusSummary]], dept_user_map: Dict[str, str]) -> List[UserRankingEntry]:
+        ranking = [
+            UserRankingEntry(
+                user_name=dept_user_map.get(uid, f"User {uid}"), 
+                total_ideas=len(l), 
+                ideas_summary=l
+            )
+            for uid, l in user_ideas_map.items()
+        ]
+        ranking.sort(key=lambda x: x.total_ideas, reverse=True)
+        return ranking
+
+    def _build_creator_ranking(self, user_stats_map: Dict[str, Dict], plr_target: int, dept_target: int) -> List[UserCreationStats]:
+        # Converter para Lista de Objetos
+        ranking_list = []
+        for uid, data in user_stats_map.items():
+            total = len(data["ideas"])
+            ranking_list.append(UserCreationStats(
+                user_id=uid,
+                user_name=data["user_name"],
+                total_sent=total,
+                has_submitted_idea=(total > 0),
+                hit_plr_target=(total >= plr_target),
+                hit_dept_individual_target=(total >= dept_target),
+                ideas=data["ideas"]
+            ))
+        
+        ranking_list.sort(key=lambda x: x.total_sent, reverse=True)
+        return ranking_list
+
 
     def _dict_to_timeline_metric_list(self, d):
         lst = [
@@ -315,4 +486,121 @@ class AnalyticsService:
         lst.sort(key=lambda x: x.period)
         return lst
 
-analytics_service = AnalyticsService()
\ No newline at end of file
+    def _counts_to_timeline_comparison(self, counts: Dict[str, int], target: int) -> List[TimelineComparison]:
+        timeline = [
+            TimelineComparison(period=k, total_sent=v, target=target, hit_target=(v >= target))
+            for k, v in counts.items()
+        ]
+        timeline.sort(key=lambda x: x.period)
+        return timeline
+
+
+class DepartmentReportAggregator:
+    """
+    Accumulator that fuses every step of generate_department_summary and
+    generate_creation_ranking into a single pass: feed ideas with add()/add_page()
+    and call build() once the stream is exhausted.
+    With 'index', the timelines are summed from its rollups in build() and add()
+    skips the per-idea date work (the fed ideas must come from that index).
+    """
+
+    def __init__(
+        self,
+        service: AnalyticsService,
+        department_users: List[User],
+        target_year: int,
+        plr_target_per_user: int,
+        dept_individual_target: int,
+        monthly_target_aggregate: int,
+        weekly_target_aggregate: int,
+        now: Optional[datetime] = None,
+        index: Optional[IdeaIndex] = None
+    ):
+        self.service = service
+        self.index = index
+        self.target_year = target_year
+        self.plr_target_per_user = plr_target_per_user
+        self.dept_individual_target = dept_individual_target
+        self.monthly_target_aggregate = monthly_target_aggregate
+        self.weekly_target_aggregate = weekly_target_aggregate
+
+        self.now = now or datetime.now()
+
+        self.dept_user_ids = {u.id for u in department_users}
+        self.dept_user_map = {u.id: u.full_name for u in department_users}
+
+        # Execução (ideias com implantador do departamento)
+        self.total_relevant = 0
+        self.status_counter = Counter()
+        self.implementer_ideas = defaultdict(list)
+
+        # Criação (ideias criadas pelo departamento)
+        self.creator_stats = {u.id: {"user_name": u.full_name, "ideas": []} for u in department_users}
+
+        # Datas (dias epoch) acumuladas por página em blocos NumPy; contadas de forma vetorizada no build()
+        self._pending_days = {"sent": [], "sent_val": [], "validated": [], "created": []}
+        self._day_chunks = {key: [] for key in self._pending_days}
+
+    def add(self, idea: IdeaLike) -> None:
+        service = self.service
+        # Com índice, as datas (funil e criação) já estão somadas nos rollups
+        count_days = self.index is None
+
+        if any(imp.user_id in self.dept_user_ids for imp in idea.implementers):
+            self.total_relevant += 1
+            self.status_counter[idea.current_stage_name or "Sem Status"] += 1
+            service._add_implementer_entries(idea, self.dept_user_ids, self.implementer_ideas)
+
+            if count_days:
+                sent, sent_val, validated = service._funnel_dates(idea)
+                self._pending_days["sent"].append(to_epoch_day(sent))
+                self._pending_days["sent_val"].append(to_epoch_day(sent_val))
+                self._pending_days["validated"].append(to_epoch_day(validated))
+
+        if idea.creator_id in self.dept_user_ids:
+            service._add_creator_entry(idea, self.creator_stats, self.target_year)
+            if count_days:
+                self._pending_days["created"].append(to_epoch_day(idea.created_at))
+
+    def add_page(self, ideas: Iterable[IdeaLike]) -> None:
+        for idea in ideas:
+            self.add(idea)
+        self._flush_days()
+
+    def build(self) -> CombinedDepartmentReport:
+        service = self.service
+        if self.index is not None:
+            exec_monthly, exec_weekly = service._rollup_funnel_buckets(self.index, self.dept_user_ids, self.target_year, self.now)
+            creation_monthly, creation_weekly = service._rollup_count_buckets(self.index, self.dept_user_ids, self.target_year, self.now)
+        else:
+            self._flush_days()
+            days = {key: np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32) for key, chunks in self._day_chunks.items()}
+            exec_monthly, exec_weekly = service._funnel_buckets(
+                days["sent"], days["sent_val"], days["validated"], self.target_year, self.now
+            )
+            creation_monthly, creation_weekly = service._count_buckets(days["created"], self.target_year, self.now)
+
+        execution = DepartmentAnalytics(
+            total_ideas_analyzed=self.total_relevant,
+            user_ranking=service._build_implementer_ranking(self.implementer_ideas, self.dept_user_map),
+            status_distribution=service._counter_to_distribution(self.status_counter, self.total_relevant),
+            monthly_timeline=service._dict_to_timeline_metric_list(exec_monthly),
+            weekly_timeline=service._dict_to_timeline_metric_list(exec_weekly)
+        )
+
+        creation = CreationAnalytics(
+            target_year=self.target_year,
+            user_ranking=service._build_creator_ranking(self.creator_stats, self.plr_target_per_user, self.dept_individual_target),
+            monthly_timeline=service._counts_to_timeline_comparison(creation_monthly, self.monthly_target_aggregate),
+            weekly_timeline=service._counts_to_timeline_comparison(creation_weekly, self.weekly_target_aggregate)
+        )
+
+        return CombinedDepartmentReport(execution_analytics=execution, creation_analytics=creation)
+
+    def _flush_days(self) -> None:
+        for key, pending in self._pending_days.items():
+            if pending:
+                self._day_chunks[key].append(np.array(pending, dtype=np.int32))
+                self._pending_days[key] = []
+
+analytics_service = AnalyticsService()
@@ -1,13 +1,27 @@
+import csv
+import io
+import logging
+import tempfile
 import pandas as pd
-from typing import List, Dict, Any
+from openpyxl import Workbook
+from typing import List, Dict, Any, Iterable, Iterator
 import os
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class ExcelService:
     """
     Service responsible for generating Excel (.xlsx) files from data lists.
+    For HTTP downloads without files in 'output/':
+    - stream_csv truly streams (first bytes go out with the first rows);
+    - buffered_xlsx is buffered to a temporary file and only sent once complete
+      (a zip container cannot be emitted before its last row is written).
     """
 
+    STREAM_CHUNK_BYTES = 64 * 1024
+    CSV_FLUSH_ROWS = 500
+
     def create_excel_from_list(self, data: List[Dict[str, Any]], filename_prefix: str = "report") -> str:
         """
         Generates an Excel file from a list of dictionaries.
@@ -20,7 +34,7 @@ class ExcelService:
             str: The path to the generated file.
         """
         if not data:
-            print("[ExcelService] Warning: No data provided to generate Excel.")
+            logger.warning("No data provided to generate Excel.")
             return ""
 
         try:
@@ -39,11 +53,66 @@ class ExcelService:
             # index=False removes the generic row numbers (0, 1, 2...)
             df.to_excel(file_path, index=False, engine='openpyxl')
             
-            print(f"[ExcelService] Excel file created successfully: {file_path}")
+            logger.info("Excel file created successfully: %s", file_path)
             return file_path
 
         except Exception as e:
-            print(f"[ExcelService] Failed to create Excel: {e}")
+            logger.error("Failed to create Excel: %s", e)
             raise e
 
-excel_service = ExcelService()
\ No newline at end of file
+    def stream_csv(self, rows: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[bytes]:
+        """
+        Yields a UTF-8 CSV (with BOM, so Excel detects the encoding) in chunks of
+        CSV_FLUSH_ROWS rows. Only the current chunk is held in memory.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        buffer.write("\ufeff")
+        writer.writerow(columns)
+
+        for count, row in enumerate(rows, start=1):
+            writer.writerow([self._cell_value(row.get(column)) for column in columns])
+            if count % self.CSV_FLUSH_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue().encode("utf-8")
+
+    def buffered_xlsx(self, rows: Iterable[Dict[str, Any]], columns: List[str], sheet_title: str = "Report") -> Iterator[bytes]:
+        """
+        Yields a single-sheet .xlsx in STREAM_CHUNK_BYTES chunks. NOT streamed:
+        every row is written (openpyxl write-only workbook, so memory stays flat)
+        and the whole file is assembled in an anonymous temporary file before the
+        first chunk is yielded. Time to first byte is the full export time and
+        the complete file sits on disk until the download ends.
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=sheet_title)
+
+        sheet.append(columns)
+        count = 0
+        for row in rows:
+            sheet.append([self._cell_value(row.get(column)) for column in columns])
+            count += 1
+
+        with tempfile.TemporaryFile() as archive:
+            workbook.save(archive)
+            archive.seek(0)
+            while True:
+                chunk = archive.read(self.STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+
+        logger.info("Sent buffered xlsx with %d rows.", count, extra={"rows": count})
+
+    @staticmethod
+    def _cell_value(value: Any) -> Any:
+        # openpyxl não aceita datetime com timezone
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            return value.replace(tzinfo=None)
+        return value
+
+excel_service = ExcelService()
@@ -1,79 +1,163 @@
-import requests
+import asyncio
 import json
-from typing import List
-from pydantic import TypeAdapter
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Optional
+from pydantic import TypeAdapter, ValidationError
 
 from src.config import Config
-from src.models.user_model import User
+from src.models.user_model import User, UserPage
+from src.services.http_client import upstream_client
+from src.services.metrics import metrics
+from src.services.single_flight import upstream_flight
+
+# Criado uma vez: valida o envelope da página direto dos bytes da resposta
+USER_PAGE_ADAPTER = TypeAdapter(UserPage)
+
+ENDPOINT = "Usuarios"
+
+logger = logging.getLogger(__name__)
 
 class ExternalUserService:
     """
     Service to fetch users and convert them directly into Pydantic models.
+    Every fetch has a blocking version and an async (*_async) version.
+    Concurrent fetches of the same department share one upstream pull (single-flight).
     """
 
-    def get_users_by_department_recursive(self, department_id: int, current_page: int = 1, accumulated_users: List[User] = None) -> List[User]:
+    def get_users_by_department_recursive(self, department_id: Optional[int]) -> List[User]:
         """
-        Recursively fetches users and returns a list of validated User objects.
+        Fetches every page of users and returns a list of validated User objects.
+        department_id=None fetches active users from every department.
         """
-        if accumulated_users is None:
-            accumulated_users = []
+        users = upstream_flight.do(("users", department_id), lambda: self._fetch_users(department_id))
+        return list(users)
+
+    def get_all_active_users(self) -> List[User]:
+        """Fetches every active user of the tenant (all departments)."""
+        return self.get_users_by_department_recursive(None)
+
+    async def get_all_active_users_async(self) -> List[User]:
+        """Async version of get_all_active_users."""
+        return await self.get_users_by_department_async(None)
 
+    async def get_users_by_department_async(self, department_id: Optional[int]) -> List[User]:
+        """Async version of get_users_by_department_recursive."""
+        users = await upstream_flight.do_async(("users", department_id), lambda: self._fetch_users_async(department_id))
+        return list(users)
+
+    def _fetch_users(self, department_id: Optional[int]) -> List[User]:
+        """
+        Page 1 tells us 'numeroTotalPaginas'; pages 2..N are requested in parallel
+        (bounded by Config.UPSTREAM_MAX_CONCURRENCY) and merged in page order.
+        """
         try:
-            # 1. Prepare Request
-            filters = {
-                "DepartamentoId": department_id,
-                "Ativo": 1
-            }
-            
-            params = {
-                "token": Config.API_TOKEN,
-                "filtros": json.dumps(filters),
-                "pagina": current_page
-            }
-
-            print(f"[ExternalUserService] Fetching page {current_page} for Dept {department_id}...")
-
-            # 2. Execute Request
-            url = f"{Config.BASE_URL}/webapi/api/apiExterna/Usuarios"
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            api_data = response.json()
-
-            # 3. Check 'sucesso' flag from supplier description
-            if not api_data.get("sucesso"):
-                raise Exception(f"API Error: {api_data.get('mensagem')}")
+            accumulated_users, total_pages = self._fetch_page(department_id, 1)
+            metrics.observe("upstream_fetch_pages", total_pages, endpoint=ENDPOINT)
 
-            # 4. Data Conversion (Dict -> Pydantic Model)
-            raw_list = api_data.get("resultado", [])
-            
-            # Use TypeAdapter for efficient list validation (Pydantic V2 recommended way)
-            # This ensures every item in the list matches the User schema
-            user_adapter = TypeAdapter(List[User])
-            new_users = user_adapter.validate_python(raw_list)
-            
-            # Alternatively, simple list comprehension works too:
-            # new_users = [User(**item) for item in raw_list]
-
-            accumulated_users.extend(new_users)
-
-            # 5. Recursion Logic
-            total_pages = api_data.get("numeroTotalPaginas", 1)
-            current_api_page = api_data.get("paginaAtual", 1)
-
-            if current_api_page < total_pages:
-                return self.get_users_by_department_recursive(
-                    department_id, 
-                    current_page + 1, 
-                    accumulated_users
-                )
-
-            print(f"[ExternalUserService] Finished. Retrieved {len(accumulated_users)} User objects.")
+            if total_pages > 1:
+                workers = max(1, min(Config.UPSTREAM_MAX_CONCURRENCY, total_pages - 1))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for page_users, _ in executor.map(
+                        lambda page: self._fetch_page(department_id, page),
+                        range(2, total_pages + 1)
+                    ):
+                        accumulated_users.extend(page_users)
+
+            logger.info("Finished. Retrieved %d User objects.", len(accumulated_users), extra={"users": len(accumulated_users)})
             return accumulated_users
 
         except Exception as e:
-            print(f"[ExternalUserService] Failed: {e}")
+            logger.error("Fetch failed: %s", e)
             raise
 
-external_user_service = ExternalUserService()
\ No newline at end of file
+    async def _fetch_users_async(self, department_id: Optional[int]) -> List[User]:
+        """Async version of _fetch_users."""
+        try:
+            accumulated_users, total_pages = await self._fetch_page_async(department_id, 1)
+            metrics.observe("upstream_fetch_pages", total_pages, endpoint=ENDPOINT)
+
+            if total_pages > 1:
+                semaphore = asyncio.Semaphore(max(1, Config.UPSTREAM_MAX_CONCURRENCY))
+
+                async def fetch_limited(page: int):
+                    async with semaphore:
+                        return await self._fetch_page_async(department_id, page)
+
+                pages = await asyncio.gather(*(fetch_limited(p) for p in range(2, total_pages + 1)))
+                for page_users, _ in pages:
+                    accumulated_users.extend(page_users)
+
+            logger.info("Finished. Retrieved %d User objects.", len(accumulated_users), extra={"users": len(accumulated_users)})
+            return accumulated_users
+
+        except Exception as e:
+            logger.error("Fetch failed: %s", e)
+            raise
+
+    def _fetch_page(self, department_id: Optional[int], current_page: int) -> Tuple[List[User], int]:
+        """Fetches a single page of users. Returns (users, total_pages)."""
+        url, params = self._build_request(department_id, current_page)
+
+        response = upstream_client.get(url, params=params)
+        response.raise_for_status()
+        
+        return self._parse_page(response.content)
+
+    async def _fetch_page_async(self, department_id: Optional[int], current_page: int) -> Tuple[List[User], int]:
+        """Async version of _fetch_page."""
+        url, params = self._build_request(department_id, current_page)
+
+        response = await upstream_client.get_async(url, params=params)
+        response.raise_for_status()
+
+        # Validação em worker thread: não segura o event loop
+        return await asyncio.to_thread(self._parse_page, response.content)
+
+    def _build_request(self, department_id: Optional[int], current_page: int) -> Tuple[str, Dict[str, Any]]:
+        # 1. Prepare Request
+        filters = {"Ativo": 1}
+        if department_id is not None:
+            filters = {"DepartamentoId": department_id, **filters}
+        
+        params = {
+            "token": Config.API_TOKEN,
+            "filtros": json.dumps(filters),
+            "pagina": current_page
+        }
+
+        logger.debug("Fetching page %d for Dept %s...", current_page, department_id if department_id is not None else "ALL",
+                     extra={"page": current_page})
+
+        # 2. Endpoint
+        url = f"{Config.BASE_URL}/webapi/api/apiExterna/Usuarios"
+
+        return url, params
+
+    def _parse_page(self, content: bytes) -> Tuple[List[User], int]:
+        # 3. Data Conversion (bytes -> Pydantic Model), without an intermediate dict tree
+        started = time.perf_counter()
+        try:
+            page = USER_PAGE_ADAPTER.validate_json(content)
+        except ValidationError:
+            # Failed responses may carry a 'resultado' that doesn't match User
+            api_data = json.loads(content)
+            if isinstance(api_data, dict) and not api_data.get("sucesso"):
+                raise Exception(f"API Error: {api_data.get('mensagem')}")
+            raise
+        finally:
+            metrics.observe("validation_seconds", time.perf_counter() - started, model="UserPage")
+
+        # 4. Check 'sucesso' flag from supplier description
+        if not page.success:
+            raise Exception(f"API Error: {page.message}")
+
+        # 5. Pagination info
+        users = page.result or []
+        metrics.inc("validation_items_total", len(users), model="UserPage")
+        metrics.inc("upstream_pages_total", endpoint=ENDPOINT)
+        # 'numeroTotalPaginas': null vale como página única
+        return users, page.total_pages or 1
+
+external_user_service = ExternalUserService()
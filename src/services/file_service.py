@@ -1,7 +1,6 @@
 import os
 import logging
 
-# Configure basic logging if not already configured globally
 logger = logging.getLogger(__name__)
 
 class FileService:
@@ -22,13 +21,13 @@ class FileService:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-                print(f"[FileService] File deleted: {file_path}")
+                logger.info("File deleted: %s", file_path)
                 return True
             else:
-                print(f"[FileService] File not found (nothing to delete): {file_path}")
+                logger.info("File not found (nothing to delete): %s", file_path)
                 return True
         except Exception as e:
-            print(f"[FileService] Error deleting file {file_path}: {e}")
+            logger.error("Error deleting file %s: %s", file_path, e)
             return False
 
 file_service = FileService()
\ No newline at end of file
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import Config
+from src.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class UpstreamClient:
+    """
+    Process-wide HTTP layer for the Aevo API, shared by every upstream service.
+
+    - One pooled requests.Session (blocking code) and one httpx.AsyncClient per event loop
+      (async code), both keeping connections alive between pages and requests.
+    - gzip/deflate negotiated through 'Accept-Encoding'.
+    - Connect/read timeouts from Config.
+    - Jittered exponential retries for GETs on connection errors, timeouts and 429/5xx.
+    - Per-host counters exposed by get_pool_metrics(); per-endpoint latency/bytes in /metrics.
+      Byte counts are wire bytes (compressed), not the decoded body size.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    DEFAULT_HEADERS = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+
+    def __init__(self):
+        self._session: Optional[requests.Session] = None
+        # httpx.AsyncClient fica preso ao loop em que abriu conexões: um por event loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._host_metrics: Dict[str, Dict[str, float]] = defaultdict(self._empty_metrics)
+
+    # =========================================================================
+    # PART 1: REQUISIÇÕES
+    # =========================================================================
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """Blocking GET with pooling, timeouts and retries. Caller checks the status."""
+        host, endpoint = self._target(url)
+        session = self._get_session()
+        timeout = (Config.UPSTREAM_CONNECT_TIMEOUT, Config.UPSTREAM_READ_TIMEOUT)
+
+        for attempt in range(Config.UPSTREAM_MAX_RETRIES + 1):
+            is_last = attempt == Config.UPSTREAM_MAX_RETRIES
+            started = self._start_request(host)
+            try:
+                response = session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._finish_request(host, endpoint, started, outcome=e.__class__.__name__, error=True)
+                if is_last:
+                    raise
+                logger.warning("%s attempt %d failed (%s). Retrying...", host, attempt + 1, e.__class__.__name__,
+                               extra={"endpoint": endpoint, "attempt": attempt + 1})
+            else:
+                self._finish_request(host, endpoint, started, outcome=str(response.status_code),
+                                     error=response.status_code >= 500, size=self._wire_size(response))
+                if response.status_code not in self.RETRY_STATUSES or is_last:
+                    return response
+                logger.warning("%s attempt %d returned %d. Retrying...", host, attempt + 1, response.status_code,
+                               extra={"endpoint": endpoint, "attempt": attempt + 1})
+
+            self._count_retry(host, endpoint)
+            time.sleep(self._backoff_delay(attempt))
+
+    async def get_async(self, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """Async version of get()."""
+        host, endpoint = self._target(url)
+        client = self._get_async_client()
+
+        for attempt in range(Config.UPSTREAM_MAX_RETRIES + 1):
+            is_last = attempt == Config.UPSTREAM_MAX_RETRIES
+            started = self._start_request(host)
+            try:
+                response = await client.get(url, params=params)
+            except httpx.TransportError as e:
+                self._finish_request(host, endpoint, started, outcome=e.__class__.__name__, error=True)
+                if is_last:
+                    raise
+                logger.warning("%s attempt %d failed (%s). Retrying...", host, attempt + 1, e.__class__.__name__,
+                               extra={"endpoint": endpoint, "attempt": attempt + 1})
+            else:
+                # Bytes recebidos na rede (comprimidos), não o corpo já descomprimido
+                self._finish_request(host, endpoint, started, outcome=str(response.status_code),
+                                     error=response.status_code >= 500, size=response.num_bytes_downloaded)
+                if response.status_code not in self.RETRY_STATUSES or is_last:
+                    return response
+                logger.warning("%s attempt %d returned %d. Retrying...", host, attempt + 1, response.status_code,
+                               extra={"endpoint": endpoint, "attempt": attempt + 1})
+
+            self._count_retry(host, endpoint)
+            await asyncio.sleep(self._backoff_delay(attempt))
+
+    # =========================================================================
+    # PART 2: MÉTRICAS E CICLO DE VIDA
+    # =========================================================================
+
+    def get_pool_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-host request counters, plus urllib3 pool stats for the blocking session
+        (connections opened, requests served, idle connections).
+        """
+        with self._lock:
+            per_host = {host: dict(values) for host, values in self._host_metrics.items()}
+
+        for host, values in per_host.items():
+            total = values["requests"]
+            values["avg_latency_ms"] = round(values.pop("total_seconds") / total * 1000, 2) if total else 0.0
+
+        if self._session is not None:
+            # Same adapter is mounted for http:// and https://
+            pool_manager = self._session.get_adapter("https://").poolmanager
+            for key in list(pool_manager.pools.keys()):
+                pool = pool_manager.pools.get(key)
+                if pool is None:
+                    continue
+                # Same key format as urlsplit().netloc (port only when non-default)
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                entry = per_host.setdefault(host, {})
+                entry["sync_pool"] = {
+                    "connections_opened": pool.num_connections,
+                    "requests_served": pool.num_requests,
+                    # urllib3 pre-fills the queue with None placeholders: count real connections only
+                    "idle_connections": sum(1 for conn in pool.pool.queue if conn is not None) if pool.pool is not None else 0,
+                    "max_size": Config.UPSTREAM_POOL_SIZE
+                }
+
+        return per_host
+
+    async def close(self) -> None:
+        """
+        Closes the async client of the running loop and the blocking session.
+        Clients of other loops are dropped: they can only be closed from their own loop.
+        """
+        with self._lock:
+            client = self._async_clients.get(asyncio.get_running_loop())
+            self._async_clients.clear()
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+        if self._session is not None:
+            self._session.close()
+        self._session = None
+
+    # =========================================================================
+    # PART 3: HELPERS PRIVADOS
+    # =========================================================================
+
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=4,
+                        pool_maxsize=Config.UPSTREAM_POOL_SIZE,
+                        max_retries=0  # Retries are handled here, with jitter and metrics
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self.DEFAULT_HEADERS)
+                    self._session = session
+        return self._session
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # Criado sob demanda dentro do loop que vai usá-lo (servidor, asyncio.run de scripts/testes)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    headers=self.DEFAULT_HEADERS,
+                    timeout=httpx.Timeout(Config.UPSTREAM_READ_TIMEOUT, connect=Config.UPSTREAM_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=Config.UPSTREAM_POOL_SIZE,
+                        max_keepalive_connections=Config.UPSTREAM_POOL_SIZE
+                    )
+                )
+        return client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Exponential backoff with "full jitter": random value in [0, min(max, base * 2^attempt)]
+        ceiling = min(Config.UPSTREAM_BACKOFF_MAX, Config.UPSTREAM_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _wire_size(response: requests.Response) -> int:
+        """
+        Body bytes as received (before gzip/deflate decoding): what urllib3 read
+        from the socket, else Content-Length, else the decoded size (urllib3
+        does not count chunked bodies without a length).
+        """
+        try:
+            wire = int(response.raw.tell())
+        except (AttributeError, TypeError, ValueError):
+            wire = 0
+        if wire:
+            return wire
+        length = response.headers.get("Content-Length")
+        return int(length) if length and length.isdigit() else len(response.content)
+
+    @staticmethod
+    def _target(url: str) -> Tuple[str, str]:
+        """(host, endpoint): endpoint is the last path segment, e.g. 'GetIdeias' or 'Usuarios'."""
+        parts = urlsplit(url)
+        return parts.netloc, parts.path.rstrip("/").rsplit("/", 1)[-1]
+
+    def _start_request(self, host: str) -> float:
+        with self._lock:
+            self._host_metrics[host]["in_flight"] += 1
+        return time.perf_counter()
+
+    def _finish_request(self, host: str, endpoint: str, started: float, outcome: str, error: bool = False, size: int = 0) -> None:
+        elapsed = time.perf_counter() - started
+        metrics.observe("upstream_request_seconds", elapsed, endpoint=endpoint, outcome=outcome)
+        if size:
+            metrics.observe("upstream_response_bytes", size, endpoint=endpoint)
+        with self._lock:
+            host_metrics = self._host_metrics[host]
+            host_metrics["in_flight"] -= 1
+            host_metrics["requests"] += 1
+            host_metrics["total_seconds"] += elapsed
+            host_metrics["bytes_received"] += size
+            if error:
+                host_metrics["errors"] += 1
+
+    def _count_retry(self, host: str, endpoint: str) -> None:
+        metrics.inc("upstream_retries_total", endpoint=endpoint)
+        with self._lock:
+            self._host_metrics[host]["retries"] += 1
+
+    @staticmethod
+    def _empty_metrics() -> Dict[str, float]:
+        return {"requests": 0, "errors": 0, "retries": 0, "in_flight": 0, "bytes_received": 0, "total_seconds": 0.0}
+
+upstream_client = UpstreamClient()
@@ -0,0 +1,286 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, MutableMapping, Optional, Set, Tuple
+
+import numpy as np
+
+from src.models.idea_models import IdeaLike
+from src.services.idea_rollups import IdeaRollups, PeriodKey
+from src.services.idea_table import NO_CODE, NO_DATE, IdeaTable
+
+
+class LazyIdeaMap(MutableMapping):
+    """
+    id -> idea map whose base ideas stay as rows of a columnar source (the
+    memory-mapped Arrow snapshot) and only become models when read.
+    Ideas set afterwards (upserts) override the base rows.
+
+    'source' needs load(rows) -> models and take(rows) -> rows as stored.
+    Materialized base rows are cached and shared between copies (base rows never change).
+    """
+
+    def __init__(self, source=None, base_rows: Optional[Dict[int, int]] = None):
+        self.source = source
+        self.base_rows: Dict[int, int] = base_rows if base_rows is not None else {}
+        self.overrides: Dict[int, IdeaLike] = {}
+        self._cache: Dict[int, IdeaLike] = {}
+
+    def __getitem__(self, idea_id: int) -> IdeaLike:
+        idea = self.overrides.get(idea_id)
+        if idea is not None:
+            return idea
+        row = self.base_rows[idea_id]
+        idea = self._cache.get(idea_id)
+        if idea is None:
+            idea = self._cache[idea_id] = self.source.load([row])[0]
+        return idea
+
+    def __setitem__(self, idea_id: int, idea: IdeaLike) -> None:
+        self.overrides[idea_id] = idea
+        self.base_rows.pop(idea_id, None)
+
+    def __delitem__(self, idea_id: int) -> None:
+        if self.overrides.pop(idea_id, None) is None:
+            del self.base_rows[idea_id]
+
+    def get(self, idea_id: int, default=None):
+        if idea_id not in self:
+            return default
+        return self[idea_id]
+
+    def __contains__(self, idea_id) -> bool:
+        return idea_id in self.overrides or idea_id in self.base_rows
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.base_rows
+        yield from self.overrides
+
+    def __len__(self) -> int:
+        return len(self.base_rows) + len(self.overrides)
+
+    def get_many(self, idea_ids: List[int]) -> List[IdeaLike]:
+        """Ideas in the given order, materializing the missing base rows in one batch."""
+        overrides, cache = self.overrides, self._cache
+        missing = [i for i in idea_ids if i not in overrides and i not in cache]
+        if missing:
+            rows = [self.base_rows[i] for i in missing]
+            cache.update(zip(missing, self.source.load(rows)))
+        return [overrides[i] if i in overrides else cache[i] for i in idea_ids]
+
+    def copy(self) -> "LazyIdeaMap":
+        clone = LazyIdeaMap(self.source, dict(self.base_rows))
+        clone.overrides = dict(self.overrides)
+        clone._cache = self._cache
+        return clone
+
+    def base_table(self):
+        """Base rows still in use, as stored in the source (None without a source)."""
+        if self.source is None:
+            return None
+        return self.source.take(sorted(self.base_rows.values()))
+
+
+class IdeaIndex:
+    """
+    In-memory snapshot of ideas with inverted indexes:
+    - implementer user_id  -> idea ids
+    - creator_id           -> idea ids
+    - (year, month) created -> idea ids
+    - current_stage_id     -> idea ids
+    plus per-user/per-period rollups (IdeaRollups) for the report timelines.
+
+    Queries return ideas ordered by id (the same order the store reads them),
+    so reports built from the index match reports built from a full scan.
+    upsert()/remove() apply incremental changes and bump 'version'.
+    from_table() builds it from columns, leaving the ideas themselves unmaterialized.
+    """
+
+    def __init__(self, ideas: Iterable[IdeaLike] = ()):
+        self.ideas_by_id = LazyIdeaMap()
+        self.by_implementer: Dict[str, Set[int]] = defaultdict(set)
+        self.by_creator: Dict[str, Set[int]] = defaultdict(set)
+        self.by_creation_month: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self.by_stage: Dict[int, Set[int]] = defaultdict(set)
+        self.rollups = IdeaRollups()
+        self.version = 0
+        self._lock = threading.RLock()
+
+        self.upsert(ideas)
+
+    def __len__(self) -> int:
+        return len(self.ideas_by_id)
+
+    @classmethod
+    def from_table(cls, table: IdeaTable, source) -> "IdeaIndex":
+        """
+        Index over the rows of 'table' (a columnar view of 'source', see LazyIdeaMap):
+        inverted indexes and rollups come from the columns; ideas are only
+        validated into models when a query returns them.
+        """
+        index = cls()
+        ids = table.ids.tolist()
+        users = list(table.user_codes)
+        index.ideas_by_id = LazyIdeaMap(source, {idea_id: row for row, idea_id in enumerate(ids)})
+
+        for row, code in zip(table.implementer_row.tolist(), table.implementer_code.tolist()):
+            index.by_implementer[users[code]].add(ids[row])
+        for idea_id, code in zip(ids, table.creator_code.tolist()):
+            if code != NO_CODE:
+                index.by_creator[users[code]].add(idea_id)
+
+        months = table.created_day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        for idea_id, day, month in zip(ids, table.created_day.tolist(), months.tolist()):
+            if day != NO_DATE:
+                index.by_creation_month[(1970 + month // 12, month % 12 + 1)].add(idea_id)
+        for idea_id, stage_id in zip(ids, table.stage_id.tolist()):
+            index.by_stage[stage_id].add(idea_id)
+
+        index.rollups.add_table(table)
+        index.version = 1 if ids else 0
+        return index
+
+    # =========================================================================
+    # PART 1: MANUTENÇÃO
+    # =========================================================================
+
+    def upsert(self, ideas: Iterable[IdeaLike]) -> int:
+        """Adds or replaces ideas, updating every index. Returns how many were applied."""
+        applied = 0
+        with self._lock:
+            for idea in ideas:
+                previous = self.ideas_by_id.get(idea.id)
+                if previous is not None:
+                    self._unindex(previous)
+                self.ideas_by_id[idea.id] = idea
+                self._index(idea)
+                applied += 1
+            if applied:
+                self.version += 1
+        return applied
+
+    def remove(self, idea_ids: Iterable[int]) -> int:
+        """Drops ideas (deleted upstream) from every index. Returns how many were removed."""
+        removed = 0
+        with self._lock:
+            for idea_id in idea_ids:
+                idea = self.ideas_by_id.pop(idea_id, None)
+                if idea is not None:
+                    self._unindex(idea)
+                    removed += 1
+            if removed:
+                self.version += 1
+        return removed
+
+    def copy(self) -> "IdeaIndex":
+        """
+        Independent copy (ideas are shared, index sets are not). Used to hand out
+        a frozen snapshot while this index keeps receiving upserts.
+        """
+        with self._lock:
+            clone = IdeaIndex()
+            clone.ideas_by_id = self.ideas_by_id.copy()
+            for name in ("by_implementer", "by_creator", "by_creation_month", "by_stage"):
+                source = getattr(self, name)
+                setattr(clone, name, defaultdict(set, {key: set(ids) for key, ids in source.items()}))
+            clone.rollups = self.rollups.copy()
+            clone.version = self.version
+            return clone
+
+    def _index(self, idea: IdeaLike) -> None:
+        for imp in idea.implementers:
+            if imp.user_id:
+                self.by_implementer[imp.user_id].add(idea.id)
+        if idea.creator_id:
+            self.by_creator[idea.creator_id].add(idea.id)
+        if idea.created_at:
+            self.by_creation_month[(idea.created_at.year, idea.created_at.month)].add(idea.id)
+        self.by_stage[idea.current_stage_id].add(idea.id)
+        self.rollups.add(idea)
+
+    def _unindex(self, idea: IdeaLike) -> None:
+        for imp in idea.implementers:
+            if imp.user_id:
+                self._discard(self.by_implementer, imp.user_id, idea.id)
+        if idea.creator_id:
+            self._discard(self.by_creator, idea.creator_id, idea.id)
+        if idea.created_at:
+            self._discard(self.by_creation_month, (idea.created_at.year, idea.created_at.month), idea.id)
+        self._discard(self.by_stage, idea.current_stage_id, idea.id)
+        self.rollups.remove(idea)
+
+    @staticmethod
+    def _discard(index: Dict, key, idea_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(idea_id)
+            if not ids:
+                del index[key]
+
+    # =========================================================================
+    # PART 2: CONSULTAS
+    # =========================================================================
+
+    def all_ideas(self) -> List[IdeaLike]:
+        with self._lock:
+            return self.ideas_by_id.get_many(sorted(self.ideas_by_id))
+
+    def ideas_implemented_by(self, user_ids: Iterable[str]) -> List[IdeaLike]:
+        """Ideas with at least one implementer in user_ids."""
+        return self._collect(self.by_implementer, user_ids)
+
+    def ideas_created_by(self, user_ids: Iterable[str], year: Optional[int] = None) -> List[IdeaLike]:
+        ideas = self._collect(self.by_creator, user_ids)
+        if year is not None:
+            ideas = [i for i in ideas if i.created_at.year == year]
+        return ideas
+
+    def ideas_created_in(self, year: int, month: Optional[int] = None) -> List[IdeaLike]:
+        months = [month] if month else range(1, 13)
+        return self._collect(self.by_creation_month, [(year, m) for m in months])
+
+    def ideas_in_stage(self, stage_ids: Iterable[int]) -> List[IdeaLike]:
+        return self._collect(self.by_stage, stage_ids)
+
+    def ideas_related_to(
+        self,
+        user_ids: Iterable[str],
+        creation_months: Optional[Iterable[Tuple[int, int]]] = None
+    ) -> List[IdeaLike]:
+        """
+        Ideas created OR implemented by any of user_ids (everything a department report reads).
+        With 'creation_months' ((year, month) pairs), ideas they only CREATED are limited to
+        those months; ideas they implemented are always returned.
+        """
+        user_ids = list(user_ids)
+        with self._lock:
+            created = self._union(self.by_creator, user_ids)
+            if creation_months is not None:
+                # Filtra pelas ideias do usuário (O(criadas)), não pela união dos meses (O(tenant))
+                # (pelos índices de mês, sem materializar as ideias descartadas)
+                months = [self.by_creation_month.get(m, ()) for m in set(creation_months)]
+                created = {i for i in created if any(i in ids for ids in months)}
+            ids = self._union(self.by_implementer, user_ids) | created
+            return self.ideas_by_id.get_many(sorted(ids))
+
+    def creation_counts(self, user_ids: Iterable[str], periods: List[PeriodKey]) -> List[int]:
+        """Ideas created by user_ids per period, summed from the rollups."""
+        with self._lock:
+            return self.rollups.creation_counts(user_ids, periods)
+
+    def funnel_counts(self, user_ids: Iterable[str], periods: List[PeriodKey]) -> Dict[str, List[int]]:
+        """Funnel events (sent / sent_val / validated) of the ideas user_ids implemented, per period."""
+        with self._lock:
+            return self.rollups.funnel_counts(user_ids, periods)
+
+    def _collect(self, index: Dict, keys: Iterable) -> List[IdeaLike]:
+        with self._lock:
+            return self.ideas_by_id.get_many(sorted(self._union(index, keys)))
+
+    @staticmethod
+    def _union(index: Dict, keys: Iterable) -> Set[int]:
+        ids: Set[int] = set()
+        for key in keys:
+            found = index.get(key)
+            if found:
+                ids |= found
+        return ids
@@ -0,0 +1,177 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from src.models.idea_models import IdeaLike
+from src.services.idea_table import NO_CODE, NO_DATE, IdeaTable, periods_of
+from src.services.stage_classifier import stage_classifier
+
+# Período: (MONTH, meses desde 1970-01) ou (WEEK, semanas ISO desde 1970), os mesmos buckets de idea_table
+MONTH = "M"
+WEEK = "W"
+PeriodKey = Tuple[str, int]
+
+FUNNEL_METRICS = ("sent", "sent_val", "validated")
+
+
+class IdeaRollups:
+    """
+    Materialized counts per (user, period, metric), kept up to date by IdeaIndex
+    as ideas are upserted/removed, so report timelines cost users x periods
+    instead of a pass over the ideas:
+    - created: creator_id -> {period: ideas created}
+    - funnel:  implementer group -> {(metric, period): ideas sent / sent_val / validated}
+
+    Funnel counts are keyed by the idea's SET of implementers (its group) rather
+    than by each implementer: summing the groups that touch a department counts
+    an idea with two implementers in that department once, exactly like a scan.
+    """
+
+    def __init__(self):
+        self.created: Dict[str, Counter] = defaultdict(Counter)
+        self.funnel: Dict[Tuple[str, ...], Counter] = defaultdict(Counter)
+        self.group_sizes: Counter = Counter()
+        self.groups_by_user: Dict[str, Set[Tuple[str, ...]]] = defaultdict(set)
+
+    # =========================================================================
+    # PART 1: MANUTENÇÃO
+    # =========================================================================
+
+    def add(self, idea: IdeaLike) -> None:
+        self._apply(idea, 1)
+
+    def remove(self, idea: IdeaLike) -> None:
+        """Reverts add(idea); the idea must be the same version that was added."""
+        self._apply(idea, -1)
+
+    def add_table(self, table: IdeaTable) -> None:
+        """Same as add() for every row of a columnar IdeaTable (no models needed)."""
+        users = list(table.user_codes)
+
+        created = (table.creator_code != NO_CODE) & (table.created_day != NO_DATE)
+        for kind, keys in zip((MONTH, WEEK), self._periods(table.created_day[created])):
+            for code, key, count in self._pair_counts(table.creator_code[created], keys):
+                self.created[users[code]][(kind, key)] += count
+
+        # Grupo de implantadores de cada linha (tupla ordenada, como em _apply)
+        members: Dict[int, Set[str]] = defaultdict(set)
+        for row, code in zip(table.implementer_row.tolist(), table.implementer_code.tolist()):
+            members[row].add(users[code])
+        group_codes: Dict[Tuple[str, ...], int] = {}
+        codes = [group_codes.setdefault(tuple(sorted(user_ids)), len(group_codes)) for user_ids in members.values()]
+        row_group = np.full(len(table), NO_CODE, dtype=np.int64)
+        row_group[np.fromiter(members, dtype=np.int64, count=len(members))] = codes
+        groups = list(group_codes)
+
+        for metric, days in zip(FUNNEL_METRICS, (table.sent_day, table.sent_val_day, table.validated_day)):
+            selected = (row_group != NO_CODE) & (days != NO_DATE)
+            for kind, keys in zip((MONTH, WEEK), self._periods(days[selected])):
+                for code, key, count in self._pair_counts(row_group[selected], keys):
+                    self.funnel[groups[code]][(metric, kind, key)] += count
+
+        for code, size in enumerate(np.bincount(row_group[row_group != NO_CODE], minlength=len(groups)).tolist()):
+            self.group_sizes[groups[code]] += size
+            for user_id in groups[code]:
+                self.groups_by_user[user_id].add(groups[code])
+
+    @staticmethod
+    def _periods(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(month indexes, week indexes) of epoch days, the buckets of periods_of()."""
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        return months, (days.astype(np.int64) + 3) // 7
+
+    @staticmethod
+    def _pair_counts(owners: np.ndarray, keys: np.ndarray) -> Iterable[Tuple[int, int, int]]:
+        """(owner, key, count) of every distinct (owner, key) pair."""
+        # owner nos 32 bits altos, key (int32, pode ser negativa) nos baixos
+        pairs = (owners.astype(np.int64) << 32) | (keys.astype(np.int64) & 0xFFFFFFFF)
+        unique, counts = np.unique(pairs, return_counts=True)
+        keys = (unique & 0xFFFFFFFF).astype(np.uint32).view(np.int32)
+        return zip((unique >> 32).tolist(), keys.tolist(), counts.tolist())
+
+    def copy(self) -> "IdeaRollups":
+        clone = IdeaRollups()
+        clone.created = defaultdict(Counter, {user: Counter(counts) for user, counts in self.created.items()})
+        clone.funnel = defaultdict(Counter, {group: Counter(counts) for group, counts in self.funnel.items()})
+        clone.group_sizes = Counter(self.group_sizes)
+        clone.groups_by_user = defaultdict(set, {user: set(groups) for user, groups in self.groups_by_user.items()})
+        return clone
+
+    def _apply(self, idea: IdeaLike, sign: int) -> None:
+        if idea.creator_id and idea.created_at:
+            month, week = periods_of(idea.created_at)
+            self._bump(self.created, idea.creator_id, (MONTH, month), (WEEK, week), sign)
+
+        group = tuple(sorted({imp.user_id for imp in idea.implementers if imp.user_id}))
+        if not group:
+            return
+
+        for metric, dt in zip(FUNNEL_METRICS, stage_classifier.funnel_dates(idea)):
+            if dt is not None:
+                month, week = periods_of(dt)
+                self._bump(self.funnel, group, (metric, MONTH, month), (metric, WEEK, week), sign)
+
+        # Grupos sem ideias saem do índice por usuário (memória proporcional aos dados atuais)
+        self.group_sizes[group] += sign
+        if self.group_sizes[group] > 0:
+            for user_id in group:
+                self.groups_by_user[user_id].add(group)
+        else:
+            del self.group_sizes[group]
+            for user_id in group:
+                self._discard(self.groups_by_user, user_id, group)
+
+    @staticmethod
+    def _bump(table: Dict, owner, month_key: tuple, week_key: tuple, sign: int) -> None:
+        counts = table[owner]
+        for key in (month_key, week_key):
+            value = counts.get(key, 0) + sign
+            if value:
+                counts[key] = value
+            else:
+                del counts[key]
+        if not counts:
+            del table[owner]
+
+    @staticmethod
+    def _discard(index: Dict, key, value) -> None:
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
+
+    # =========================================================================
+    # PART 2: CONSULTAS
+    # =========================================================================
+
+    def creation_counts(self, user_ids: Iterable[str], periods: List[PeriodKey]) -> List[int]:
+        """Ideas created by user_ids in each period (aligned with 'periods')."""
+        totals = [0] * len(periods)
+        for user_id in set(user_ids):
+            counts = self.created.get(user_id)
+            if counts:
+                for i, period in enumerate(periods):
+                    totals[i] += counts.get(period, 0)
+        return totals
+
+    def funnel_counts(self, user_ids: Iterable[str], periods: List[PeriodKey]) -> Dict[str, List[int]]:
+        """
+        {metric: counts aligned with 'periods'} over the ideas with at least one
+        implementer in user_ids (each idea counted once).
+        """
+        groups: Set[Tuple[str, ...]] = set()
+        for user_id in set(user_ids):
+            groups |= self.groups_by_user.get(user_id, set())
+
+        totals = {metric: [0] * len(periods) for metric in FUNNEL_METRICS}
+        for group in groups:
+            counts = self.funnel.get(group)
+            if not counts:
+                continue
+            for metric in FUNNEL_METRICS:
+                row = totals[metric]
+                for i, (kind, index) in enumerate(periods):
+                    row[i] += counts.get((metric, kind, index), 0)
+        return totals
@@ -1,95 +1,270 @@
-import requests
+import asyncio
 import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+from typing import List, Dict, Any, Tuple, Iterator
 from pydantic import TypeAdapter
 
 from src.config import Config
-from src.models.idea_models import Idea
+from src.models.idea_models import Idea, AnalyticsIdea, IdeaLike, IdeaPage
+from src.services.http_client import upstream_client
+from src.services.metrics import metrics
+from src.services.single_flight import upstream_flight
+from src.services.stage_classifier import stage_classifier
+
+# Criados uma vez: validam o envelope da página direto dos bytes da resposta
+FULL_PAGE_ADAPTER = TypeAdapter(IdeaPage[Idea])
+LEAN_PAGE_ADAPTER = TypeAdapter(IdeaPage[AnalyticsIdea])
+
+ENDPOINT = "GetIdeias"
+
+logger = logging.getLogger(__name__)
 
 class IdeaService:
     """
     Service responsible for fetching Idea data from the external API.
+    Every fetch has a blocking version and an async (*_async) version.
+    Pass lean=True to validate the slim AnalyticsIdea projection instead of the full Idea.
+    Concurrent fetches of the same window share one upstream pull (single-flight).
     """
 
-    def get_ideas_by_period(
-        self, 
-        start_date: datetime, 
-        end_date: datetime, 
-        page: int = 1, 
-        accumulated_ideas: List[Idea] = None
-    ) -> List[Idea]:
-        
-        if accumulated_ideas is None:
+    DATE_FMT = "%Y-%m-%d %H:%M:%S"
+
+    # =========================================================================
+    # PART 1: API PÚBLICA
+    # =========================================================================
+
+    def get_ideas_by_period(self, start_date: datetime, end_date: datetime, lean: bool = False) -> List[IdeaLike]:
+        """
+        Fetches every idea CREATED inside the given period.
+        """
+        return self._fetch_ideas(self._creation_filters(start_date, end_date), lean)
+
+    def get_ideas_updated_since(self, updated_since: datetime, updated_until: datetime, lean: bool = False) -> List[IdeaLike]:
+        """
+        Fetches every idea whose 'DataAtualizacao' falls inside the given period.
+        Used by the local idea store for incremental syncs.
+        """
+        return self._fetch_ideas(self._update_filters(updated_since, updated_until), lean)
+
+    def iter_idea_pages(self, start_date: datetime, end_date: datetime, lean: bool = False) -> Iterator[List[IdeaLike]]:
+        """
+        Streaming version of get_ideas_by_period: yields validated pages in order
+        instead of accumulating the whole period in memory.
+        """
+        return self._iter_pages(self._creation_filters(start_date, end_date), lean)
+
+    def count_ideas_by_period(self, start_date: datetime, end_date: datetime) -> int:
+        """
+        Number of ideas CREATED inside the given period, from a single 1-item page
+        ('numeroPaginas' is then the item count). Cheap probe for closed month partitions.
+        """
+        url, params = self._build_request(self._creation_filters(start_date, end_date), 1, items_per_page=1)
+        response = upstream_client.get(url, params=params)
+        response.raise_for_status()
+        return self._count_from_page(response.content)
+
+    async def get_ideas_by_period_async(self, start_date: datetime, end_date: datetime, lean: bool = False) -> List[IdeaLike]:
+        """Async version of get_ideas_by_period."""
+        return await self._fetch_ideas_async(self._creation_filters(start_date, end_date), lean)
+
+    async def get_ideas_updated_since_async(self, updated_since: datetime, updated_until: datetime, lean: bool = False) -> List[IdeaLike]:
+        """Async version of get_ideas_updated_since."""
+        return await self._fetch_ideas_async(self._update_filters(updated_since, updated_until), lean)
+
+    async def count_ideas_by_period_async(self, start_date: datetime, end_date: datetime) -> int:
+        """Async version of count_ideas_by_period."""
+        url, params = self._build_request(self._creation_filters(start_date, end_date), 1, items_per_page=1)
+        response = await upstream_client.get_async(url, params=params)
+        response.raise_for_status()
+        return self._count_from_page(response.content)
+
+    # =========================================================================
+    # PART 2: PAGINAÇÃO
+    # =========================================================================
+
+    def _fetch_ideas(self, base_filters: Dict[str, Any], lean: bool = False) -> List[IdeaLike]:
+        """Materializes every page of the window; concurrent identical calls share one pull."""
+        ideas = upstream_flight.do(self._flight_key(base_filters, lean), lambda: self._collect_pages(base_filters, lean))
+        return list(ideas)
+
+    async def _fetch_ideas_async(self, base_filters: Dict[str, Any], lean: bool = False) -> List[IdeaLike]:
+        """Async version of _fetch_ideas."""
+        ideas = await upstream_flight.do_async(self._flight_key(base_filters, lean), lambda: self._collect_pages_async(base_filters, lean))
+        return list(ideas)
+
+    @staticmethod
+    def _flight_key(base_filters: Dict[str, Any], lean: bool) -> Tuple:
+        return ("ideas", tuple(sorted(base_filters.items())), lean)
+
+    def _collect_pages(self, base_filters: Dict[str, Any], lean: bool = False) -> List[IdeaLike]:
+        """Materializes every page from _iter_pages into a single list."""
+        try:
             accumulated_ideas = []
+            for page_ideas in self._iter_pages(base_filters, lean):
+                accumulated_ideas.extend(page_ideas)
 
+            logger.info("Finished. Total ideas retrieved: %d", len(accumulated_ideas), extra={"ideas": len(accumulated_ideas)})
+            return accumulated_ideas
+
+        except Exception as e:
+            logger.error("Fetch failed: %s", e)
+            raise
+
+    def _iter_pages(self, base_filters: Dict[str, Any], lean: bool = False) -> Iterator[List[IdeaLike]]:
+        """
+        Fetches page 1 to discover 'numeroPaginas', then requests pages 2..N in
+        parallel (bounded by Config.UPSTREAM_MAX_CONCURRENCY), yielding them in page order.
+        At most 'concurrency' pages are held in memory at any time.
+        """
+        first_page_ideas, total_pages = self._fetch_page(base_filters, 1, lean)
+        metrics.observe("upstream_fetch_pages", total_pages, endpoint=ENDPOINT)
+        yield first_page_ideas
+
+        if total_pages <= 1:
+            return
+
+        workers = max(1, min(Config.UPSTREAM_MAX_CONCURRENCY, total_pages - 1))
+        executor = ThreadPoolExecutor(max_workers=workers)
         try:
-            date_fmt = "%Y-%m-%d %H:%M:%S"
-            
-            # --- CORRECTION IS HERE ---
-            # We construct the filters dictionary including pagination inside it,
-            # matching the "Example of filter" from the documentation.
-            filters = {
-                "DataCriacaoInicio": start_date.strftime(date_fmt),
-                "DataCriacaoTermino": end_date.strftime(date_fmt),
-                "itensPorPagina": 1000,  # Moved inside the JSON object
-                "pagina": page           # Moved inside the JSON object
-            }
-
-            # Serialize without spaces to be safe
-            filters_json = json.dumps(filters, separators=(',', ':'))
-
-            # The 'params' sent to requests now mostly contains the token and the huge filter string
-            params = {
-                "token": Config.API_TOKEN,
-                "filtros": filters_json
-            }
-
-            # Safety check for URL construction
-            if "webapi" in Config.BASE_URL:
-                 url = f"{Config.BASE_URL.rstrip('/')}/v2/GetIdeias"
-            else:
-                 url = f"{Config.BASE_URL.rstrip('/')}/webapi/api/ApiExterna/v2/GetIdeias"
-            
-            # Debug URL to confirm params are correct
-            req_debug = requests.Request('GET', url, params=params).prepare()
-            print(f"[IdeaService] Requesting URL: {req_debug.url}")
-
-            response = requests.Session().send(req_debug)
-            response.raise_for_status()
-            
-            data = response.json()
-
-            # --- Extract Results ---
-            raw_ideas_list = data.get("resultado", [])
-            
-            if raw_ideas_list:
-                adapter = TypeAdapter(List[Idea])
-                new_ideas = adapter.validate_python(raw_ideas_list)
-                accumulated_ideas.extend(new_ideas)
-
-            # --- Check Pagination ---
-            # Even though we sent 1000, we check what the API returned just in case
-            returned_items_per_page = data.get("itensPorPagina", 0) 
-            total_pages = data.get("numeroPaginas", 1)
-            current_page_api = data.get("paginaAtual", 1)
-
-            print(f"[IdeaService] Page {current_page_api}/{total_pages} fetched. "
-                  f"Items this page: {len(raw_ideas_list)} (Configured: {returned_items_per_page})")
-
-            if current_page_api < total_pages:
-                return self.get_ideas_by_period(
-                    start_date, 
-                    end_date, 
-                    page + 1, 
-                    accumulated_ideas
-                )
-
-            print(f"[IdeaService] Finished. Total ideas retrieved: {len(accumulated_ideas)}")
+            pending = deque()
+            next_page = 2
+
+            while next_page <= total_pages or pending:
+                # Sliding window: keep 'workers' pages in flight
+                while next_page <= total_pages and len(pending) < workers:
+                    pending.append(executor.submit(self._fetch_page, base_filters, next_page, lean))
+                    next_page += 1
+
+                page_ideas, _ = pending.popleft().result()
+                yield page_ideas
+        finally:
+            # Consumidor parou antes do fim (ex.: cliente do export desconectou): close() não
+            # espera as páginas em voo; as que ainda não começaram são canceladas
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _collect_pages_async(self, base_filters: Dict[str, Any], lean: bool = False) -> List[IdeaLike]:
+        """Same strategy as _collect_pages, using the shared async client and a semaphore."""
+        try:
+            first_page_ideas, total_pages = await self._fetch_page_async(base_filters, 1, lean)
+            metrics.observe("upstream_fetch_pages", total_pages, endpoint=ENDPOINT)
+            accumulated_ideas = list(first_page_ideas)
+
+            if total_pages > 1:
+                semaphore = asyncio.Semaphore(max(1, Config.UPSTREAM_MAX_CONCURRENCY))
+
+                async def fetch_limited(page: int):
+                    async with semaphore:
+                        return await self._fetch_page_async(base_filters, page, lean)
+
+                # gather() returns results in argument order, so pages are merged in order
+                pages = await asyncio.gather(*(fetch_limited(p) for p in range(2, total_pages + 1)))
+                for page_ideas, _ in pages:
+                    accumulated_ideas.extend(page_ideas)
+
+            logger.info("Finished. Total ideas retrieved: %d", len(accumulated_ideas), extra={"ideas": len(accumulated_ideas)})
             return accumulated_ideas
 
         except Exception as e:
-            print(f"[IdeaService] Error: {e}")
+            logger.error("Fetch failed: %s", e)
             raise
 
-idea_service = IdeaService()
\ No newline at end of file
+    def _fetch_page(self, base_filters: Dict[str, Any], page: int, lean: bool = False) -> Tuple[List[IdeaLike], int]:
+        """Fetches a single page. Returns (ideas, total_pages)."""
+        url, params = self._build_request(base_filters, page)
+        logger.debug("Requesting page %d", page, extra={"page": page})
+
+        response = upstream_client.get(url, params=params)
+        response.raise_for_status()
+        
+        return self._parse_page(response.content, lean)
+
+    async def _fetch_page_async(self, base_filters: Dict[str, Any], page: int, lean: bool = False) -> Tuple[List[IdeaLike], int]:
+        """Async version of _fetch_page."""
+        url, params = self._build_request(base_filters, page)
+        logger.debug("Requesting page %d (async)", page, extra={"page": page})
+
+        response = await upstream_client.get_async(url, params=params)
+        response.raise_for_status()
+
+        # Validação + classificação de até 1000 ideias é CPU: fora do event loop
+        return await asyncio.to_thread(self._parse_page, response.content, lean)
+
+    # =========================================================================
+    # PART 3: HELPERS PRIVADOS
+    # =========================================================================
+
+    def _creation_filters(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        return {
+            "DataCriacaoInicio": start_date.strftime(self.DATE_FMT),
+            "DataCriacaoTermino": end_date.strftime(self.DATE_FMT),
+        }
+
+    def _update_filters(self, updated_since: datetime, updated_until: datetime) -> Dict[str, Any]:
+        return {
+            "DataAtualizacaoInicio": updated_since.strftime(self.DATE_FMT),
+            "DataAtualizacaoTermino": updated_until.strftime(self.DATE_FMT),
+        }
+
+    def _build_request(self, base_filters: Dict[str, Any], page: int, items_per_page: int = 1000) -> Tuple[str, Dict[str, Any]]:
+        # --- CORRECTION IS HERE ---
+        # We construct the filters dictionary including pagination inside it,
+        # matching the "Example of filter" from the documentation.
+        filters = {
+            **base_filters,
+            "itensPorPagina": items_per_page,  # Moved inside the JSON object
+            "pagina": page           # Moved inside the JSON object
+        }
+
+        # Serialize without spaces to be safe
+        filters_json = json.dumps(filters, separators=(',', ':'))
+
+        # The 'params' sent to requests now mostly contains the token and the huge filter string
+        params = {
+            "token": Config.API_TOKEN,
+            "filtros": filters_json
+        }
+
+        # Safety check for URL construction
+        if "webapi" in Config.BASE_URL:
+             url = f"{Config.BASE_URL.rstrip('/')}/v2/GetIdeias"
+        else:
+             url = f"{Config.BASE_URL.rstrip('/')}/webapi/api/ApiExterna/v2/GetIdeias"
+
+        return url, params
+
+    def _parse_page(self, content: bytes, lean: bool = False) -> Tuple[List[IdeaLike], int]:
+        # --- Validate Results (bytes -> models, sem dicts intermediários) ---
+        # Projeção enxuta valida só os campos usados nos relatórios
+        model = "IdeaPage[AnalyticsIdea]" if lean else "IdeaPage[Idea]"
+        started = time.perf_counter()
+        page = (LEAN_PAGE_ADAPTER if lean else FULL_PAGE_ADAPTER).validate_json(content)
+        metrics.observe("validation_seconds", time.perf_counter() - started, model=model)
+
+        new_ideas = page.result or []
+        stage_classifier.annotate(new_ideas)
+        metrics.inc("validation_items_total", len(new_ideas), model=model)
+        metrics.inc("upstream_pages_total", endpoint=ENDPOINT)
+
+        # --- Check Pagination ---
+        # Even though we sent 1000, we check what the API returned just in case
+        returned_items_per_page = page.items_per_page
+        # 'numeroPaginas': null (ou ausente) vale como página única: sempre int daqui em diante
+        total_pages = page.total_pages or 1
+        current_page_api = page.current_page
+
+        logger.debug("Page %s/%s fetched. Items this page: %d (Configured: %s)",
+                     current_page_api, total_pages, len(new_ideas), returned_items_per_page,
+                     extra={"page": current_page_api, "total_pages": total_pages, "bytes": len(content)})
+
+        return new_ideas, total_pages
+
+    def _count_from_page(self, content: bytes) -> int:
+        ideas, total_pages = self._parse_page(content, lean=True)
+        # Com 1 item por página, numeroPaginas == total de ideias (período vazio ainda reporta 1 página)
+        return total_pages if ideas else 0
+
+idea_service = IdeaService()
@@ -0,0 +1,337 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow é opcional: sem ele o índice é reconstruído a partir do SQLite
+    pa = None
+    pc = None
+    ipc = None
+
+from pydantic import TypeAdapter
+
+from src.models.idea_models import AnalyticsIdea
+from src.services.idea_table import EPOCH_ORDINAL, NO_CODE, NO_DATE, IdeaTable
+from src.services.metrics import metrics
+from src.services.stage_classifier import StagePhase, stage_classifier
+
+FORMAT_VERSION = "1"
+
+# Colunas usam os aliases da API: as linhas são validadas como o payload original
+IDEA_LIST_ADAPTER = TypeAdapter(List[AnalyticsIdea])
+DATE_FIELDS = ("CriadoEm", "DataAtualizacao")
+STAGE_DATE_FIELDS = ("DataEntrada", "DataSaida")
+OFFSET_SUFFIX = "_offset"
+
+MICROS_PER_DAY = 86_400_000_000
+# API usa '0001-01-01' como "sem data": datas de funil antes de 1900 são ignoradas (ver StageClassifier)
+FIRST_VALID_DAY = datetime(1900, 1, 1).toordinal() - EPOCH_ORDINAL
+
+logger = logging.getLogger(__name__)
+
+def _schema():
+    # Datas: horário de parede + offset em minutos (None = sem timezone), para reconstruir exatamente
+    stage = pa.struct([
+        ("FluxoId", pa.int64()),
+        ("EstadoId", pa.int64()),
+        ("DataEntrada", pa.timestamp("us")),
+        ("DataEntrada_offset", pa.int32()),
+        ("DataSaida", pa.timestamp("us")),
+        ("DataSaida_offset", pa.int32()),
+        ("LabelPt", pa.string()),
+        ("phase", pa.int32()),
+    ])
+    implementer = pa.struct([
+        ("IdeiaId", pa.int64()),
+        ("Id", pa.string()),
+        ("Name", pa.string()),
+    ])
+    return pa.schema([
+        ("Id", pa.int64()),
+        ("EstadoId", pa.int64()),
+        ("Estado", pa.string()),
+        ("status_category", pa.string()),
+        ("Titulo", pa.string()),
+        ("ElaboradorId", pa.string()),
+        ("CriadoEm", pa.timestamp("us")),
+        ("CriadoEm_offset", pa.int32()),
+        ("DataAtualizacao", pa.timestamp("us")),
+        ("DataAtualizacao_offset", pa.int32()),
+        ("ResponsaveisImplantacao", pa.list_(implementer)),
+        ("Etapas", pa.list_(stage)),
+    ])
+
+
+class IdeaSnapshotFile:
+    """
+    Arrow IPC file with the lean (AnalyticsIdea) projection of every stored idea.
+    Lets a restart rebuild the in-memory index from a memory-mapped columnar
+    file instead of re-validating every JSON payload from SQLite.
+    Writes go to a temp file + os.replace, so concurrent readers (other
+    processes) always see a complete file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def save(self, ideas: Iterable[AnalyticsIdea], high_water_mark: Optional[datetime], kept=None) -> bool:
+        """
+        Writes 'ideas' plus 'kept' (rows of a previously loaded file still in use,
+        see ArrowIdeaSource.take) so unchanged ideas are copied without becoming models.
+        """
+        if not self.available:
+            return False
+
+        rows = [self._to_row(idea) for idea in ideas]
+        schema = _schema().with_metadata({
+            "format_version": FORMAT_VERSION,
+            "high_water_mark": high_water_mark.isoformat() if high_water_mark else ""
+        })
+        table = pa.Table.from_pylist(rows, schema=schema)
+        if kept is not None and kept.num_rows:
+            table = pa.concat_tables([kept.replace_schema_metadata(schema.metadata), table])
+        # Um único record batch: a leitura mapeia cada coluna sem cópia
+        table = table.combine_chunks()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, self.path)
+
+        logger.info("Saved %d ideas to %s", table.num_rows, self.path)
+        return True
+
+    def discard(self) -> None:
+        """
+        Removes the file. Used when stored ideas changed without a newer
+        'DataAtualizacao' (the file's high-water mark could not tell them apart).
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def load(self) -> Optional[Tuple[IdeaTable, "ArrowIdeaSource"]]:
+        """
+        Returns (columns, source) or None when there is no usable file.
+        The IdeaTable columns come straight from the memory-mapped arrays; the
+        ideas are only validated into models through the source, on demand.
+        """
+        if not self.available or not os.path.exists(self.path):
+            return None
+
+        try:
+            with pa.memory_map(self.path, "r") as source:
+                table = ipc.open_file(source).read_all()
+        except Exception as e:
+            logger.warning("Ignoring unreadable snapshot %s: %s", self.path, e)
+            return None
+
+        metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        if metadata.get("format_version") != FORMAT_VERSION:
+            logger.warning("Ignoring snapshot with format %s", metadata.get("format_version"))
+            return None
+
+        started = time.perf_counter()
+        columns = self._idea_table(table)
+        logger.info("Loaded %d ideas (columns) from %s in %.3fs", len(columns), self.path, time.perf_counter() - started)
+
+        high_water_mark = metadata.get("high_water_mark")
+        source = ArrowIdeaSource(
+            table,
+            self._has_offsets(table),
+            datetime.fromisoformat(high_water_mark) if high_water_mark else None
+        )
+        return columns, source
+
+    # =========================================================================
+    # CONVERSÃO
+    # =========================================================================
+
+    @staticmethod
+    def _split(dt: Optional[datetime]) -> Tuple[Optional[datetime], Optional[int]]:
+        if dt is None:
+            return None, None
+        offset = dt.utcoffset()
+        return dt.replace(tzinfo=None), int(offset.total_seconds() // 60) if offset is not None else None
+
+    def _put_date(self, row: dict, field: str, dt: Optional[datetime]) -> None:
+        row[field], row[field + OFFSET_SUFFIX] = self._split(dt)
+
+    def _to_row(self, idea: AnalyticsIdea) -> dict:
+        row = {
+            "Id": idea.id,
+            "EstadoId": idea.current_stage_id,
+            "Estado": idea.current_stage_name,
+            "status_category": idea.status_category,
+            "Titulo": idea.title,
+            "ElaboradorId": idea.creator_id,
+            "ResponsaveisImplantacao": [{"IdeiaId": i.idea_id, "Id": i.user_id, "Name": i.name} for i in idea.implementers],
+            "Etapas": []
+        }
+        self._put_date(row, "CriadoEm", idea.created_at)
+        self._put_date(row, "DataAtualizacao", idea.updated_at)
+        for stage in idea.stages:
+            stage_row = {"FluxoId": stage.flow_id, "EstadoId": stage.state_id, "LabelPt": stage.label_pt, "phase": stage.phase}
+            self._put_date(stage_row, "DataEntrada", stage.start_date)
+            self._put_date(stage_row, "DataSaida", stage.end_date)
+            row["Etapas"].append(stage_row)
+        return row
+
+    def _idea_table(self, table) -> IdeaTable:
+        """IdeaTable (see IdeaTable.from_ideas) computed column by column from the Arrow table."""
+        columns = IdeaTable()
+        columns.ids = _numpy(table.column("Id"))
+        columns.stage_id = _numpy(table.column("EstadoId"))
+        columns.created_day = _epoch_days(table.column("CriadoEm"))
+
+        # Usuários: criadores + implantadores num só dicionário (códigos = posição)
+        creators = table.column("ElaboradorId").combine_chunks()
+        implementers = table.column("ResponsaveisImplantacao").combine_chunks()
+        implementer_ids = implementers.flatten().field("Id")
+        encoded = pa.concat_arrays([creators, implementer_ids]).dictionary_encode()
+        users = encoded.dictionary.to_pylist()
+        codes = _codes(encoded.indices)
+        if "" in users:
+            codes[codes == users.index("")] = NO_CODE
+        columns.user_codes = {user_id: code for code, user_id in enumerate(users)}
+        columns.creator_code = codes[:len(creators)]
+
+        implementer_code = codes[len(creators):]
+        implementer_row = _numpy(pc.list_parent_indices(implementers)).astype(np.int32)
+        valid = implementer_code != NO_CODE
+        columns.implementer_row = implementer_row[valid]
+        columns.implementer_code = implementer_code[valid]
+
+        statuses = table.column("Estado").combine_chunks().dictionary_encode()
+        columns.status_names = statuses.dictionary.to_pylist()
+        columns.status_code = _codes(statuses.indices)
+        if statuses.null_count:
+            columns.status_code[columns.status_code == NO_CODE] = len(columns.status_names)
+            columns.status_names.append(None)
+
+        columns.sent_day, columns.sent_val_day, columns.validated_day = self._funnel_days(table)
+        columns.row_by_id = {idea_id: row for row, idea_id in enumerate(columns.ids.tolist())}
+        return columns
+
+    @staticmethod
+    def _funnel_days(table) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized StageClassifier.funnel_dates: per idea, the date of the LAST
+        stage of each phase (exit for approval / implementation, entry for implemented).
+        """
+        stages = table.column("Etapas").combine_chunks()
+        values = stages.flatten()
+        parents = _numpy(pc.list_parent_indices(stages))
+        phases = _numpy(pc.fill_null(values.field("phase"), 0)).astype(np.int32)
+
+        missing = np.flatnonzero(_numpy(values.field("phase").is_null()))
+        if len(missing):  # etapas salvas sem classificação: classifica agora
+            labels = values.field("LabelPt").take(pa.array(missing)).to_pylist()
+            flows = values.field("FluxoId").take(pa.array(missing)).to_pylist()
+            states = values.field("EstadoId").take(pa.array(missing)).to_pylist()
+            phases[missing] = [int(stage_classifier.classify_stage(*stage)) for stage in zip(labels, flows, states)]
+
+        positions = np.arange(len(values))
+        result = []
+        for bit, field in (
+            (StagePhase.APPROVAL, "DataSaida"),
+            (StagePhase.IN_IMPLEMENTATION, "DataSaida"),
+            (StagePhase.IMPLEMENTED, "DataEntrada")
+        ):
+            mask = (phases & int(bit)) != 0
+            last = np.full(table.num_rows, -1, dtype=np.int64)
+            np.maximum.at(last, parents[mask], positions[mask])
+
+            stage_days = _epoch_days(values.field(field))
+            days = np.full(table.num_rows, NO_DATE, dtype=np.int32)
+            found = last >= 0
+            days[found] = stage_days[last[found]]
+            days[days < FIRST_VALID_DAY] = NO_DATE
+            result.append(days)
+        return tuple(result)
+
+    @staticmethod
+    def _has_offsets(table) -> bool:
+        """True when any date was saved with a timezone (the common naive case skips _join_dates)."""
+        stages = table.column("Etapas").combine_chunks().flatten()
+        columns = [table.column(f + OFFSET_SUFFIX) for f in DATE_FIELDS]
+        columns += [stages.field(f + OFFSET_SUFFIX) for f in STAGE_DATE_FIELDS]
+        return any(column.null_count != len(column) for column in columns)
+
+    @staticmethod
+    def _join_dates(row: dict) -> None:
+        def join(target: dict, field: str) -> None:
+            offset = target.get(field + OFFSET_SUFFIX)
+            if offset is not None and target[field] is not None:
+                target[field] = target[field].replace(tzinfo=timezone(timedelta(minutes=offset)))
+
+        for field in DATE_FIELDS:
+            join(row, field)
+        for stage in row["Etapas"]:
+            for field in STAGE_DATE_FIELDS:
+                join(stage, field)
+
+
+class ArrowIdeaSource:
+    """
+    Rows of a loaded (memory-mapped) snapshot file, validated into AnalyticsIdea
+    models only when asked for. Backs the LazyIdeaMap of an index built from the file.
+    """
+
+    def __init__(self, table, has_offsets: bool, high_water_mark: Optional[datetime]):
+        self.table = table
+        self.has_offsets = has_offsets
+        self.high_water_mark = high_water_mark
+
+    def take(self, rows: List[int]):
+        return self.table.take(pa.array(rows, type=pa.int64()))
+
+    def load(self, rows: List[int]) -> List[AnalyticsIdea]:
+        records = self.take(rows).to_pylist()
+        if self.has_offsets:
+            for record in records:
+                IdeaSnapshotFile._join_dates(record)
+        # Validação em lote (pydantic-core) a partir de objetos Python já tipados
+        started = time.perf_counter()
+        ideas = IDEA_LIST_ADAPTER.validate_python(records)
+        metrics.observe("validation_seconds", time.perf_counter() - started, model="arrow:AnalyticsIdea")
+        metrics.inc("validation_items_total", len(ideas), model="arrow:AnalyticsIdea")
+        return ideas
+
+
+def _numpy(array) -> np.ndarray:
+    """NumPy view of an Arrow array (zero-copy for a single chunk without nulls)."""
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    return array.to_numpy(zero_copy_only=array.null_count == 0 and not pa.types.is_boolean(array.type))
+
+
+def _codes(indices) -> np.ndarray:
+    """Dictionary indices as int32 codes; nulls become NO_CODE."""
+    return _numpy(pc.fill_null(indices, NO_CODE)).astype(np.int32)
+
+
+def _epoch_days(timestamps) -> np.ndarray:
+    """Wall-clock days since 1970-01-01 (see to_epoch_day) of a timestamp[us] array; nulls become NO_DATE."""
+    if isinstance(timestamps, pa.ChunkedArray):
+        timestamps = timestamps.combine_chunks()
+    micros = _numpy(pc.fill_null(timestamps.cast(pa.int64()), 0))
+    days = (micros // MICROS_PER_DAY).astype(np.int32)
+    if timestamps.null_count:
+        days[_numpy(timestamps.is_null())] = NO_DATE
+    return days
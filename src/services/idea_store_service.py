@@ -0,0 +1,549 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.config import Config
+from src.models.idea_models import Idea, AnalyticsIdea, IdeaLike
+from src.services.idea_index import IdeaIndex
+from src.services.idea_snapshot_file import IdeaSnapshotFile
+from src.services.idea_service import idea_service
+from src.services.metrics import metrics
+from src.services.single_flight import upstream_flight
+from src.services.stage_classifier import stage_classifier
+
+# Primeira sincronização busca todo o histórico do programa
+PROGRAM_START_DATE = datetime(2024, 1, 1)
+
+logger = logging.getLogger(__name__)
+
+class IdeaStoreService:
+    """
+    Local on-disk (SQLite) store of ideas keyed by Idea.id.
+    Keeps a 'DataAtualizacao' high-water mark so each refresh only
+    downloads ideas changed since the last sync. Ideas are also tracked
+    in creation-month partitions: closed months are treated as immutable
+    and only re-checked once in a while (see revalidate_partitions).
+    """
+
+    HIGH_WATER_MARK_KEY = "ideas_updated_at_hwm"
+    REVISION_KEY = "ideas_revision"
+    DATE_FMT = "%Y-%m-%d %H:%M:%S"
+
+    def __init__(self, db_path: str, snapshot_path: Optional[str] = None):
+        self.db_path = db_path
+        self._schema_ready = False
+
+        # Cópia colunar (Arrow) do índice: reinícios não revalidam todo o JSON
+        self.snapshot_file = IdeaSnapshotFile(snapshot_path) if snapshot_path else None
+        self._snapshot_file_state = None  # (high-water mark, nº de ideias) do arquivo em disco
+
+        # Snapshot em memória (projeção enxuta + índices), criado sob demanda
+        self._index: Optional[IdeaIndex] = None
+        self._index_lock = threading.Lock()
+        self._frozen_index: Optional[IdeaIndex] = None  # última cópia entregue (nunca modificada)
+
+    # =========================================================================
+    # PART 1: SINCRONIZAÇÃO
+    # =========================================================================
+
+    def sync(self) -> int:
+        """
+        Pulls new/changed ideas from the API and upserts them into the store.
+        Returns the number of ideas written. Concurrent syncs share one run
+        (each sync window ends at 'now', so coalescing happens here, not per window).
+        """
+        return upstream_flight.do(("idea_store_sync", self.db_path), self._sync)
+
+    async def sync_async(self) -> int:
+        """Async version of sync."""
+        return await upstream_flight.do_async(("idea_store_sync", self.db_path), self._sync_async)
+
+    def _sync(self) -> int:
+        now = datetime.now()
+        high_water_mark = self.get_high_water_mark()
+
+        if high_water_mark is None:
+            logger.info("Empty store. Full sync from %s", PROGRAM_START_DATE)
+            written = self.upsert_ideas(idea_service.get_ideas_by_period(PROGRAM_START_DATE, now))
+            # Download completo: todas as partições estão validadas neste momento
+            self._save_partitions(self._months(now), now)
+        else:
+            # Inclusive lower bound: re-reading the boundary second is harmless (upsert)
+            logger.info("Incremental sync. Ideas updated since %s", high_water_mark)
+            written = self.upsert_ideas(idea_service.get_ideas_updated_since(self._naive(high_water_mark), now))
+            written += self.revalidate_partitions(now)
+
+        logger.info("Sync finished. %d ideas upserted.", written, extra={"upserted": written})
+        return written
+
+    async def _sync_async(self) -> int:
+        """Async version of _sync. SQLite work runs in a worker thread."""
+        now = datetime.now()
+        high_water_mark = await asyncio.to_thread(self.get_high_water_mark)
+
+        if high_water_mark is None:
+            logger.info("Empty store. Full sync from %s", PROGRAM_START_DATE)
+            ideas = await idea_service.get_ideas_by_period_async(PROGRAM_START_DATE, now)
+            written = await asyncio.to_thread(self.upsert_ideas, ideas)
+            await asyncio.to_thread(self._save_partitions, self._months(now), now)
+        else:
+            logger.info("Incremental sync. Ideas updated since %s", high_water_mark)
+            ideas = await idea_service.get_ideas_updated_since_async(self._naive(high_water_mark), now)
+            written = await asyncio.to_thread(self.upsert_ideas, ideas)
+            written += await self.revalidate_partitions_async(now)
+
+        logger.info("Sync finished. %d ideas upserted.", written, extra={"upserted": written})
+        return written
+
+    def upsert_ideas(self, ideas: Iterable[Idea]) -> int:
+        """Inserts or replaces ideas and advances the high-water mark."""
+        rows = []
+        max_updated_at = self.get_high_water_mark()
+
+        for idea in ideas:
+            rows.append((
+                idea.id,
+                self._to_db_date(idea.created_at),
+                self._to_db_date(idea.updated_at),
+                idea.model_dump_json(by_alias=True)
+            ))
+            if max_updated_at is None or self._naive(idea.updated_at) > self._naive(max_updated_at):
+                max_updated_at = idea.updated_at
+
+        if not rows:
+            return 0
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO ideas (id, created_at, updated_at, payload) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET "
+                "created_at = excluded.created_at, "
+                "updated_at = excluded.updated_at, "
+                "payload = excluded.payload",
+                rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                (self.HIGH_WATER_MARK_KEY, max_updated_at.isoformat())
+            )
+
+        # Mantém o snapshot em memória sincronizado sem reconstruí-lo.
+        # Mesmo recorte de get_index(): ideias criadas antes do programa (editadas
+        # depois, voltam na sync por DataAtualizacao) ficam fora do índice
+        with self._index_lock:
+            if self._index is not None:
+                changed = [AnalyticsIdea.model_validate_json(payload) for (_, _, _, payload) in rows]
+                stage_classifier.annotate(changed)
+                self._index.upsert(i for i in changed if self._in_program(i))
+                self._index.remove([i.id for i in changed if not self._in_program(i)])
+
+        return len(rows)
+
+    def get_high_water_mark(self) -> Optional[datetime]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (self.HIGH_WATER_MARK_KEY,)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    # =========================================================================
+    # PART 2: PARTIÇÕES MENSAIS
+    # =========================================================================
+
+    def revalidate_partitions(self, now: Optional[datetime] = None) -> int:
+        """
+        Re-checks the creation-month partitions that are due, at most
+        Config.IDEA_PARTITION_MAX_PER_SYNC per call. Catches what the high-water
+        mark cannot: ideas deleted upstream and edits that kept their 'DataAtualizacao'.
+        - hot (last IDEA_PARTITION_HOT_MONTHS months): re-fetched and compared to the store;
+        - closed: 1-item probe of the upstream count, re-fetched only when it differs.
+        Returns the number of ideas rewritten or removed.
+        """
+        now = now or datetime.now()
+        changed = 0
+        for month, hot in self._due_partitions(now):
+            start, end = self._month_bounds(month)
+            if not hot and idea_service.count_ideas_by_period(start, end) == self._stored_count(month):
+                self._record_validation(month, hot, "unchanged", now)
+                continue
+            changed += self._replace_partition(month, hot, idea_service.get_ideas_by_period(start, end), now)
+        return changed
+
+    async def revalidate_partitions_async(self, now: Optional[datetime] = None) -> int:
+        """Async version of revalidate_partitions. SQLite work runs in a worker thread."""
+        now = now or datetime.now()
+        changed = 0
+        for month, hot in await asyncio.to_thread(self._due_partitions, now):
+            start, end = self._month_bounds(month)
+            if not hot:
+                upstream_count = await idea_service.count_ideas_by_period_async(start, end)
+                if upstream_count == await asyncio.to_thread(self._stored_count, month):
+                    await asyncio.to_thread(self._record_validation, month, hot, "unchanged", now)
+                    continue
+            ideas = await idea_service.get_ideas_by_period_async(start, end)
+            changed += await asyncio.to_thread(self._replace_partition, month, hot, ideas, now)
+        return changed
+
+    def partition_status(self) -> List[dict]:
+        """Last validation of each creation-month partition."""
+        hot_months = self._hot_months(self._months(datetime.now()))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT month, idea_count, max_updated_at, validated_at FROM partitions ORDER BY month"
+            ).fetchall()
+        return [
+            {
+                "month": month,
+                "hot": month in hot_months,
+                "ideas": idea_count,
+                "max_updated_at": max_updated_at,
+                "validated_at": validated_at
+            }
+            for month, idea_count, max_updated_at, validated_at in rows
+        ]
+
+    def _due_partitions(self, now: datetime) -> List[Tuple[Tuple[int, int], bool]]:
+        """(month, hot) pairs whose last validation is older than their interval; hot and oldest first."""
+        months = self._months(now)
+        hot_months = self._hot_months(months)
+        with closing(self._connect()) as conn:
+            validated = {
+                month: datetime.fromisoformat(validated_at)
+                for month, validated_at in conn.execute("SELECT month, validated_at FROM partitions")
+            }
+
+        due = []
+        for month in months:
+            key = self._month_key(month)
+            hot = key in hot_months
+            interval = Config.IDEA_PARTITION_HOT_REVALIDATE_SECONDS if hot else Config.IDEA_PARTITION_CLOSED_REVALIDATE_SECONDS
+            last = validated.get(key)
+            if last is None or (now - last).total_seconds() >= interval:
+                due.append((not hot, last or datetime.min, month))
+        due.sort()
+        return [(month, not closed) for closed, _, month in due[:Config.IDEA_PARTITION_MAX_PER_SYNC]]
+
+    def _replace_partition(self, month: Tuple[int, int], hot: bool, ideas: List[Idea], now: datetime) -> int:
+        """Makes the stored partition match the one just fetched (changed payloads + deletions)."""
+        start, end = self._month_bounds(month)
+        with closing(self._connect()) as conn:
+            stored = dict(conn.execute(
+                "SELECT id, payload FROM ideas WHERE created_at >= ? AND created_at <= ?",
+                (self._to_db_date(start), self._to_db_date(end))
+            ).fetchall())
+
+        # Payload é o mesmo model_dump_json gravado por upsert_ideas: comparação exata
+        changed = [idea for idea in ideas if stored.get(idea.id) != idea.model_dump_json(by_alias=True)]
+        fetched_ids = {idea.id for idea in ideas}
+        removed = [idea_id for idea_id in stored if idea_id not in fetched_ids]
+        if not changed and not removed:
+            self._record_validation(month, hot, "unchanged", now)
+            return 0
+
+        self.upsert_ideas(changed)
+        self._delete_ideas(removed)
+        self._bump_revision()
+        self._record_validation(month, hot, "replaced", now)
+        logger.info("Partition %s re-synced: %d changed, %d removed.", self._month_key(month), len(changed), len(removed),
+                    extra={"partition": self._month_key(month), "changed": len(changed), "removed": len(removed)})
+        return len(changed) + len(removed)
+
+    def _delete_ideas(self, idea_ids: List[int]) -> None:
+        if not idea_ids:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM ideas WHERE id = ?", [(i,) for i in idea_ids])
+        with self._index_lock:
+            if self._index is not None:
+                self._index.remove(idea_ids)
+
+    def _bump_revision(self) -> None:
+        """
+        Marks a rewrite the high-water mark cannot see (deletions, edits that kept
+        their 'DataAtualizacao'): changes the snapshot version and drops the Arrow file.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES (?, '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (self.REVISION_KEY,)
+            )
+        with self._index_lock:
+            if self.snapshot_file is not None:
+                self.snapshot_file.discard()
+            self._snapshot_file_state = None
+
+    def _stored_count(self, month: Tuple[int, int]) -> int:
+        start, end = self._month_bounds(month)
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM ideas WHERE created_at >= ? AND created_at <= ?",
+                (self._to_db_date(start), self._to_db_date(end))
+            ).fetchone()[0]
+
+    def _record_validation(self, month: Tuple[int, int], hot: bool, result: str, now: datetime) -> None:
+        self._save_partitions([month], now)
+        metrics.inc("idea_partition_revalidations_total", partition="hot" if hot else "closed", result=result)
+
+    def _save_partitions(self, months: List[Tuple[int, int]], validated_at: datetime) -> None:
+        """Stores count / max 'DataAtualizacao' of each month as validated at 'validated_at'."""
+        if not months:
+            return
+        start, end = self._month_bounds(months[0])[0], self._month_bounds(months[-1])[1]
+        with closing(self._connect()) as conn, conn:
+            # created_at é 'YYYY-MM-DD HH:MM:SS': os 7 primeiros caracteres são a partição
+            summary: Dict[str, tuple] = {
+                month: (idea_count, max_updated_at)
+                for month, idea_count, max_updated_at in conn.execute(
+                    "SELECT substr(created_at, 1, 7), COUNT(*), MAX(updated_at) FROM ideas "
+                    "WHERE created_at >= ? AND created_at <= ? GROUP BY 1",
+                    (self._to_db_date(start), self._to_db_date(end))
+                )
+            }
+            conn.executemany(
+                "INSERT OR REPLACE INTO partitions (month, idea_count, max_updated_at, validated_at) VALUES (?, ?, ?, ?)",
+                [
+                    (key, *summary.get(key, (0, None)), validated_at.isoformat())
+                    for key in map(self._month_key, months)
+                ]
+            )
+
+    # =========================================================================
+    # PART 3: LEITURA
+    # =========================================================================
+
+    def get_ideas_for_period(self, start_date: datetime, end_date: datetime, lean: bool = False) -> List[IdeaLike]:
+        """
+        Store-backed replacement for IdeaService.get_ideas_by_period: stored months are
+        read locally and only the incremental sync (ideas changed since the high-water
+        mark, plus any partition checks that are due) goes to the API.
+        """
+        self.sync()
+        return self.get_ideas_by_period(start_date, end_date, lean)
+
+    def get_ideas_by_period(self, start_date: datetime, end_date: datetime, lean: bool = False) -> List[IdeaLike]:
+        """
+        Returns stored ideas CREATED inside the given period (same contract as IdeaService).
+        The store keeps full records; lean=True validates only the AnalyticsIdea projection.
+        """
+        model = AnalyticsIdea if lean else Idea
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "SELECT payload FROM ideas WHERE created_at >= ? AND created_at <= ? ORDER BY id",
+                (self._to_db_date(start_date), self._to_db_date(end_date))
+            )
+            with metrics.time("validation_seconds", model=f"stored:{model.__name__}"):
+                ideas = [model.model_validate_json(payload) for (payload,) in cursor]
+        metrics.inc("validation_items_total", len(ideas), model=f"stored:{model.__name__}")
+        stage_classifier.annotate(ideas)
+        return ideas
+
+    def iter_idea_pages(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        page_size: int = 1000,
+        lean: bool = False
+    ) -> Iterator[List[IdeaLike]]:
+        """
+        Streaming version of get_ideas_by_period: yields pages of 'page_size' ideas,
+        so only one page is validated and held in memory at a time.
+        """
+        model = AnalyticsIdea if lean else Idea
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "SELECT payload FROM ideas WHERE created_at >= ? AND created_at <= ? ORDER BY id",
+                (self._to_db_date(start_date), self._to_db_date(end_date))
+            )
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                page = [model.model_validate_json(payload) for (payload,) in rows]
+                stage_classifier.annotate(page)
+                yield page
+
+    def get_index(self) -> IdeaIndex:
+        """
+        In-memory snapshot of every stored idea (lean projection) with inverted
+        indexes. Built once on first use (from the Arrow snapshot file when
+        available, else from SQLite); later syncs update it incrementally.
+        """
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    index = self._load_snapshot_file()
+                    if index is None:
+                        ideas = self.get_ideas_by_period(PROGRAM_START_DATE, datetime.max, lean=True)
+                        index = IdeaIndex(ideas)
+                        self.save_snapshot_file(index)
+                    self._index = index
+                    logger.info("Index built with %d ideas.", len(self._index))
+        return self._index
+
+    def get_frozen_index(self) -> IdeaIndex:
+        """
+        Read-only copy of the index (for request snapshots). A new copy is only
+        made when the index changed since the last call; otherwise the previous
+        copy is returned again (it never receives upserts, so it can be shared).
+        """
+        index = self.get_index()
+        with self._index_lock:
+            if self._frozen_index is None or self._frozen_index.version != index.version:
+                self._frozen_index = index.copy()
+            return self._frozen_index
+
+    def save_snapshot_file(self, index: IdeaIndex) -> bool:
+        """
+        Persists the given index (use a frozen copy or hold _index_lock) to the
+        Arrow snapshot file. Its high-water mark comes from the saved ideas themselves:
+        the file they were loaded from plus the ideas upserted since. Ideas still
+        backed by that file are copied as Arrow rows, without becoming models.
+        """
+        if self.snapshot_file is None or not self.snapshot_file.available:
+            return False
+        ideas_by_id = index.ideas_by_id
+        changed = ideas_by_id.get_many(sorted(ideas_by_id.overrides))
+        marks = [self._naive(i.updated_at) for i in changed]
+        if ideas_by_id.base_rows and ideas_by_id.source.high_water_mark is not None:
+            marks.append(ideas_by_id.source.high_water_mark)
+        high_water_mark = max(marks, default=None)
+        if (high_water_mark, len(ideas_by_id)) == self._snapshot_file_state:
+            return False
+        saved = self.snapshot_file.save(changed, high_water_mark, kept=ideas_by_id.base_table())
+        self._snapshot_file_state = (high_water_mark, len(ideas_by_id))
+        return saved
+
+    def _load_snapshot_file(self) -> Optional[IdeaIndex]:
+        """
+        Builds the index from the Arrow snapshot (memory-mapped columns, ideas
+        materialized on demand) and applies the ideas updated in SQLite after it
+        was written. Returns None when the file is missing or stale.
+        """
+        if self.snapshot_file is None:
+            return None
+        loaded = self.snapshot_file.load()
+        if loaded is None:
+            return None
+
+        columns, source = loaded
+        index = IdeaIndex.from_table(columns, source)
+        self._snapshot_file_state = (source.high_water_mark, len(index))
+        if source.high_water_mark is not None:
+            changed = self._ideas_updated_since(source.high_water_mark)
+            index.upsert(changed)
+            logger.info("Snapshot file loaded (%d ideas), %d updated since.", len(columns), len(changed))
+
+        if len(index) != self._count_since(PROGRAM_START_DATE):
+            logger.warning("Snapshot file does not match the store. Rebuilding from SQLite.")
+            return None
+        return index
+
+    def _ideas_updated_since(self, updated_since: datetime) -> List[AnalyticsIdea]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT payload FROM ideas WHERE updated_at >= ? AND created_at >= ? ORDER BY id",
+                (self._to_db_date(updated_since), self._to_db_date(PROGRAM_START_DATE))
+            ).fetchall()
+        ideas = [AnalyticsIdea.model_validate_json(payload) for (payload,) in rows]
+        stage_classifier.annotate(ideas)
+        return ideas
+
+    def _count_since(self, start_date: datetime) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM ideas WHERE created_at >= ?", (self._to_db_date(start_date),)
+            ).fetchone()[0]
+
+    def get_snapshot_version(self) -> str:
+        """
+        Identifies the current data snapshot: changes whenever an idea is added or
+        updated, and stays stable across restarts while the data is unchanged.
+        """
+        high_water_mark = self.get_high_water_mark()
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (self.REVISION_KEY,)).fetchone()
+        revision = f":r{row[0]}" if row else ""
+        return f"{high_water_mark.isoformat() if high_water_mark else 'empty'}:{self.count()}{revision}"
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM ideas").fetchone()[0]
+
+    # =========================================================================
+    # PART 4: HELPERS PRIVADOS
+    # =========================================================================
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        # Each connection is used by one caller at a time, but streaming readers
+        # (iter_idea_pages behind a StreamingResponse) may resume on another thread
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ideas ("
+                "id INTEGER PRIMARY KEY, "
+                "created_at TEXT NOT NULL, "
+                "updated_at TEXT NOT NULL, "
+                "payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ideas_created_at ON ideas (created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS partitions ("
+                "month TEXT PRIMARY KEY, "
+                "idea_count INTEGER NOT NULL, "
+                "max_updated_at TEXT, "
+                "validated_at TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._schema_ready = True
+
+        return conn
+
+    def _in_program(self, idea: IdeaLike) -> bool:
+        return self._naive(idea.created_at) >= PROGRAM_START_DATE
+
+    def _naive(self, dt: datetime) -> datetime:
+        # Datas da API podem vir com ou sem timezone: comparamos pelo horário "de parede"
+        return dt.replace(tzinfo=None)
+
+    def _to_db_date(self, dt: datetime) -> str:
+        return self._naive(dt).strftime(self.DATE_FMT)
+
+    @staticmethod
+    def _months(now: datetime) -> List[Tuple[int, int]]:
+        """(year, month) partitions from PROGRAM_START_DATE up to the current month."""
+        months = []
+        year, month = PROGRAM_START_DATE.year, PROGRAM_START_DATE.month
+        while (year, month) <= (now.year, now.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    def _hot_months(self, months: List[Tuple[int, int]]) -> set:
+        hot = Config.IDEA_PARTITION_HOT_MONTHS
+        return {self._month_key(m) for m in months[-hot:]} if hot > 0 else set()
+
+    @staticmethod
+    def _month_bounds(month: Tuple[int, int]) -> Tuple[datetime, datetime]:
+        year, number = month
+        next_month = datetime(year + 1, 1, 1) if number == 12 else datetime(year, number + 1, 1)
+        return datetime(year, number, 1), next_month - timedelta(seconds=1)
+
+    @staticmethod
+    def _month_key(month: Tuple[int, int]) -> str:
+        return f"{month[0]:04d}-{month[1]:02d}"
+
+idea_store_service = IdeaStoreService(Config.IDEA_STORE_PATH, Config.IDEA_SNAPSHOT_PATH)
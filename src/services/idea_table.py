@@ -0,0 +1,177 @@
+import numpy as np
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.models.idea_models import IdeaLike
+
+# Datas são guardadas como "dias desde 1970-01-01" (horário de parede, sem timezone)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NO_DATE = np.iinfo(np.int32).min
+NO_CODE = -1
+
+# Recebe uma ideia e devolve (enviada p/ implantação, enviada p/ validação, validada)
+FunnelDatesFn = Callable[[IdeaLike], Tuple[Optional[datetime], Optional[datetime], Optional[datetime]]]
+
+
+def to_epoch_day(dt: Optional[datetime]) -> int:
+    if dt is None:
+        return NO_DATE
+    return dt.replace(tzinfo=None).toordinal() - EPOCH_ORDINAL
+
+
+def monthly_counts(days: np.ndarray, target_year: int) -> np.ndarray:
+    """Counts per month (12 buckets) of the dates falling inside target_year."""
+    days = days[days != NO_DATE]
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    first_month = (target_year - 1970) * 12
+    months = months[(months >= first_month) & (months < first_month + 12)] - first_month
+    return np.bincount(months, minlength=12)
+
+
+def weekly_counts(days: np.ndarray, now: datetime, weeks: int = 10) -> Tuple[List[str], np.ndarray]:
+    """
+    Counts per ISO week for the last 'weeks' weeks (current week included).
+    Returns (labels 'YYYY-Www' in chronological order, counts).
+    """
+    days = days[days != NO_DATE]
+    week_index = (days.astype(np.int64) + 3) // 7
+    first_week, current_week = _week_range(now, weeks)
+
+    selected = week_index[(week_index >= first_week) & (week_index <= current_week)] - first_week
+    counts = np.bincount(selected, minlength=weeks)
+    return week_labels(now, weeks)[0], counts
+
+
+def week_labels(now: datetime, weeks: int = 10) -> Tuple[List[str], List[int]]:
+    """
+    Labels 'YYYY-Www' and week indexes (see periods_of) of the weeks counted by
+    weekly_counts(), in chronological order.
+    """
+    first_week, _ = _week_range(now, weeks)
+    labels, indexes = [], []
+    for week in range(first_week, first_week + weeks):
+        iso = date.fromordinal(EPOCH_ORDINAL + week * 7 - 3).isocalendar()
+        labels.append(f"{iso.year}-W{iso.week:02d}")
+        indexes.append(week)
+    return labels, indexes
+
+
+def periods_of(dt: datetime) -> Tuple[int, int]:
+    """
+    (month index, week index) of a date (wall clock): months since 1970-01 and
+    Monday-aligned ISO weeks since 1970, the buckets of monthly_counts()/weekly_counts().
+    """
+    # toordinal() ignora o timezone (mesmo "dia de parede" que to_epoch_day)
+    return (dt.year - 1970) * 12 + dt.month - 1, (dt.toordinal() - EPOCH_ORDINAL + 3) // 7
+
+
+def week_window(now: datetime, weeks: int = 10) -> Tuple[date, date]:
+    """First Monday and last Sunday of the weeks counted by weekly_counts()."""
+    first_week, current_week = _week_range(now, weeks)
+    return (
+        date.fromordinal(EPOCH_ORDINAL + first_week * 7 - 3),
+        date.fromordinal(EPOCH_ORDINAL + current_week * 7 + 3)
+    )
+
+
+def _week_range(now: datetime, weeks: int) -> Tuple[int, int]:
+    # 1970-01-01 foi quinta-feira: +3 alinha as semanas na segunda-feira (ISO)
+    current_week = (to_epoch_day(now) + 3) // 7
+    return current_week - (weeks - 1), current_week
+
+
+class IdeaTable:
+    """
+    Columnar (NumPy) view of a set of ideas, built once and reused by the
+    vectorized analytics. Users and statuses are integer-coded; implementers
+    are stored CSR-style (one row per idea/implementer pair).
+    """
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.created_day = np.empty(0, dtype=np.int32)
+        self.sent_day = np.empty(0, dtype=np.int32)
+        self.sent_val_day = np.empty(0, dtype=np.int32)
+        self.validated_day = np.empty(0, dtype=np.int32)
+        self.creator_code = np.empty(0, dtype=np.int32)
+        self.status_code = np.empty(0, dtype=np.int32)
+        self.stage_id = np.empty(0, dtype=np.int64)
+        self.implementer_row = np.empty(0, dtype=np.int32)
+        self.implementer_code = np.empty(0, dtype=np.int32)
+
+        self.user_codes: Dict[str, int] = {}
+        self.status_names: List[Optional[str]] = []
+        self.row_by_id: Dict[int, int] = {}
+
+    @classmethod
+    def from_ideas(cls, ideas: Iterable[IdeaLike], funnel_dates: FunnelDatesFn) -> "IdeaTable":
+        table = cls()
+        status_codes: Dict[Optional[str], int] = {}
+
+        ids, created, sent, sent_val, validated, creators, statuses, stages = [], [], [], [], [], [], [], []
+        imp_rows, imp_codes = [], []
+
+        for row, idea in enumerate(ideas):
+            ids.append(idea.id)
+            created.append(to_epoch_day(idea.created_at))
+
+            sent_dt, sent_val_dt, validated_dt = funnel_dates(idea)
+            sent.append(to_epoch_day(sent_dt))
+            sent_val.append(to_epoch_day(sent_val_dt))
+            validated.append(to_epoch_day(validated_dt))
+
+            creators.append(table._user_code(idea.creator_id) if idea.creator_id else NO_CODE)
+
+            status = idea.current_stage_name
+            if status not in status_codes:
+                status_codes[status] = len(table.status_names)
+                table.status_names.append(status)
+            statuses.append(status_codes[status])
+            stages.append(idea.current_stage_id)
+
+            for imp in idea.implementers:
+                if imp.user_id:
+                    imp_rows.append(row)
+                    imp_codes.append(table._user_code(imp.user_id))
+
+        table.ids = np.array(ids, dtype=np.int64)
+        table.created_day = np.array(created, dtype=np.int32)
+        table.sent_day = np.array(sent, dtype=np.int32)
+        table.sent_val_day = np.array(sent_val, dtype=np.int32)
+        table.validated_day = np.array(validated, dtype=np.int32)
+        table.creator_code = np.array(creators, dtype=np.int32)
+        table.status_code = np.array(statuses, dtype=np.int32)
+        table.stage_id = np.array(stages, dtype=np.int64)
+        table.implementer_row = np.array(imp_rows, dtype=np.int32)
+        table.implementer_code = np.array(imp_codes, dtype=np.int32)
+        table.row_by_id = {idea_id: row for row, idea_id in enumerate(ids)}
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # =========================================================================
+    # SELEÇÃO DE LINHAS
+    # =========================================================================
+
+    def rows_for(self, ideas: Iterable[IdeaLike]) -> np.ndarray:
+        """Row numbers of the given ideas (ideas absent from the table are ignored)."""
+        rows = [self.row_by_id.get(idea.id) for idea in ideas]
+        return np.array([r for r in rows if r is not None], dtype=np.int64)
+
+    def codes_for(self, user_ids: Set[str]) -> np.ndarray:
+        return np.array([self.user_codes[uid] for uid in user_ids if uid in self.user_codes], dtype=np.int32)
+
+    def rows_created_by(self, user_ids: Set[str]) -> np.ndarray:
+        return np.flatnonzero(np.isin(self.creator_code, self.codes_for(user_ids)))
+
+    def rows_implemented_by(self, user_ids: Set[str]) -> np.ndarray:
+        """Rows with at least one implementer in user_ids (sorted, unique)."""
+        mask = np.isin(self.implementer_code, self.codes_for(user_ids))
+        return np.unique(self.implementer_row[mask])
+
+    def _user_code(self, user_id: str) -> int:
+        code = self.user_codes.get(user_id)
+        if code is None:
+            code = self.user_codes[user_id] = len(self.user_codes)
+        return code
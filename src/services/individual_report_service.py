@@ -1,11 +1,17 @@
-from typing import List, Optional
-from collections import Counter
+import logging
+from typing import Dict, Iterable, List, Optional
+from collections import Counter, defaultdict
 from datetime import datetime
 
 from src.models.user_model import User
-from src.models.idea_models import Idea
+from src.models.idea_models import IdeaLike
 from src.models.analytics_models import StatusDistribution, IdeaBasicInfo
 from src.models.individual_report_models import IndividualUserReport
+from src.services.idea_index import IdeaIndex
+from src.services.user_directory import UserDirectory
+from src.services.stage_classifier import stage_classifier, StatusCategory
+
+logger = logging.getLogger(__name__)
 
 class IndividualReportService:
     """
@@ -13,53 +19,73 @@ class IndividualReportService:
     Isolated from Department Analytics.
     """
 
-    # Palavras-chave para identificar status de conclusão
-    IMPLEMENTATION_COMPLETED_KEYWORDS = ["implantada", "implantação", "implantacao", "validada", "concluida"]
-
     def generate_report(
         self,
         all_users: List[User],
-        all_ideas: List[Idea],
+        all_ideas: List[IdeaLike],
         target_year: int,
-        user_matricula: str
+        user_matricula: str,
+        index: Optional[IdeaIndex] = None,
+        directory: Optional[UserDirectory] = None
     ) -> Optional[IndividualUserReport]:
+        """
+        Com 'index' (construído sobre all_ideas), só as ideias do usuário são lidas.
+        Com 'directory', a busca pela matrícula é O(1).
+        """
         
         # 1. Encontrar UUID do usuário pela Matrícula (UserName)
-        target_user = next((u for u in all_users if u.username == user_matricula), None)
+        if directory is not None:
+            target_user = directory.get_by_username(user_matricula)
+        else:
+            target_user = next((u for u in all_users if u.username == user_matricula), None)
         
         if not target_user:
-            print(f"[IndividualService] User with matricula '{user_matricula}' not found.")
+            logger.info("User with matricula '%s' not found.", user_matricula)
             return None
 
-        user_uuid = target_user.id
-        
-        # 2. Processar Ideias CRIADAS (Filtro: Criador + Ano)
-        created_ideas = []
-        for idea in all_ideas:
-            if idea.created_at and idea.created_at.year == target_year and idea.creator_id == user_uuid:
-                created_ideas.append(idea)
-        
-        # 3. Calcular Distribuição (Lógica local para isolamento)
-        dist_list = self._calculate_distribution(created_ideas)
+        # 2. Só as ideias do usuário (criadas OU implantadas) quando há índice
+        candidates = index.ideas_related_to([target_user.id]) if index is not None else all_ideas
+
+        # 3. Mesmo cálculo do modo em lote, com um único usuário
+        return self.generate_reports([target_user], candidates, target_year)[target_user.username]
 
-        # 4. Processar Ideias de IMPLANTAÇÃO (Filtro: Lista de Implantadores)
-        pending_list = []
-        completed_count = 0
+    def generate_reports(
+        self,
+        users: List[User],
+        ideas: Iterable[IdeaLike],
+        target_year: int
+    ) -> Dict[str, IndividualUserReport]:
+        """
+        Builds the individual report of every user in ONE pass over the ideas.
+        Returns {matricula: report}. Pass only the ideas related to these users
+        (IdeaIndex.ideas_related_to) to skip the rest of the tenant.
+        """
+        target_ids = {u.id for u in users}
+        created_by_user: Dict[str, List[IdeaLike]] = defaultdict(list)
+        pending_by_user: Dict[str, List[IdeaBasicInfo]] = defaultdict(list)
+        completed_by_user: Counter = Counter()
 
-        for idea in all_ideas:
-            # Verifica se o usuário está na lista de implantadores
-            is_implementer = any(imp.user_id == user_uuid for imp in idea.implementers)
-            
-            if is_implementer:
-                status_lower = (idea.current_stage_name or "").lower()
-                
+        for idea in ideas:
+            # Ideias CRIADAS (Filtro: Criador + Ano)
+            if idea.creator_id in target_ids and idea.created_at and idea.created_at.year == target_year:
+                created_by_user[idea.creator_id].append(idea)
+
+            # Ideias de IMPLANTAÇÃO (Filtro: Lista de Implantadores)
+            implementer_ids = {imp.user_id for imp in idea.implementers} & target_ids
+            if not implementer_ids:
+                continue
+
+            # Categoria classificada na ingestão (StageClassifier, com cache por status)
+            category = stage_classifier.idea_status(idea)
+
+            for user_id in implementer_ids:
                 # Check 1: Já acabou?
-                if any(k in status_lower for k in self.IMPLEMENTATION_COMPLETED_KEYWORDS):
-                    completed_count += 1
-                
+                if category == StatusCategory.COMPLETED:
+                    completed_by_user[user_id] += 1
+
                 # Check 2: Está pendente? (Não acabou E Não foi cancelada/reprovada)
-                elif "cancelada" not in status_lower and "reprovada" not in status_lower:
-                    pending_list.append(
+                elif category == StatusCategory.PENDING:
+                    pending_by_user[user_id].append(
                         IdeaBasicInfo(
                             id=idea.id,
                             title=idea.title or "Sem Título",
@@ -67,19 +93,24 @@ class IndividualReportService:
                         )
                     )
 
-        # 5. Retornar Objeto Final
-        return IndividualUserReport(
-            user_matricula=user_matricula,
-            user_name=target_user.full_name,
-            target_year=target_year,
-            created_count=len(created_ideas),
-            created_status_distribution=dist_list,
-            pending_implementation_count=len(pending_list),
-            pending_implementation_list=pending_list,
-            completed_implementation_count=completed_count
-        )
+        # Retornar Objetos Finais
+        reports = {}
+        for user in users:
+            created_ideas = created_by_user.get(user.id, [])
+            pending_list = pending_by_user.get(user.id, [])
+            reports[user.username] = IndividualUserReport(
+                user_matricula=user.username,
+                user_name=user.full_name,
+                target_year=target_year,
+                created_count=len(created_ideas),
+                created_status_distribution=self._calculate_distribution(created_ideas),
+                pending_implementation_count=len(pending_list),
+                pending_implementation_list=pending_list,
+                completed_implementation_count=completed_by_user.get(user.id, 0)
+            )
+        return reports
 
-    def _calculate_distribution(self, ideas: List[Idea]) -> List[StatusDistribution]:
+    def _calculate_distribution(self, ideas: List[IdeaLike]) -> List[StatusDistribution]:
         """Helper privado para contar status."""
         total = len(ideas)
         if total == 0: return []
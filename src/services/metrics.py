@@ -0,0 +1,237 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Buckets padrão (segundos) e para tamanhos/contagens
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 50_000_000)
+PAGES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+# Fases da requisição atual (Server-Timing); None fora de uma requisição rastreada.
+# run_in_threadpool copia o contexto, então o mesmo dict recebe as fases do worker.
+_request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry (counters, histograms and scrape-time
+    gauges) rendered in the Prometheus text format by render().
+    Recording is a dict lookup + add under a lock, cheap enough for hot paths;
+    label values must stay low-cardinality (endpoints, stages, outcomes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._definitions: Dict[str, Tuple[str, str, Optional[Tuple[float, ...]]]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, _Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    # =========================================================================
+    # PART 1: DEFINIÇÃO
+    # =========================================================================
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._definitions[name] = ("counter", help_text, None)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = SECONDS_BUCKETS) -> None:
+        self._definitions[name] = ("histogram", help_text, tuple(sorted(buckets)))
+        self._histograms.setdefault(name, {})
+
+    def gauge(self, name: str, help_text: str) -> None:
+        """Gauges are read at scrape time from the registered collectors."""
+        self._definitions[name] = ("gauge", help_text, None)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """collector() returns (gauge name, labels, value) samples when /metrics is scraped."""
+        self._collectors.append(collector)
+
+    # =========================================================================
+    # PART 2: REGISTRO
+    # =========================================================================
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        buckets = self._definitions[name][2]
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(buckets) + 1)
+            histogram.counts[bisect.bisect_left(buckets, value)] += 1
+            histogram.total += value
+            histogram.count += 1
+
+    @contextmanager
+    def time(self, name: str, phase: Optional[str] = None, **labels: str) -> Iterator[None]:
+        """
+        Observes the block's duration in seconds (also when it raises).
+        With 'phase', the duration is also added to the current request's Server-Timing.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(name, elapsed, **labels)
+            if phase is not None:
+                record_phase(phase, elapsed)
+
+    # =========================================================================
+    # PART 3: EXPOSIÇÃO
+    # =========================================================================
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        gauges: Dict[str, List[Tuple[LabelSet, float]]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                gauges.setdefault(name, []).append((self._labels(labels), value))
+
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in self._definitions.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for key, value in self._counters[name].items():
+                        lines.append(f"{name}{self._format(key)} {self._number(value)}")
+                elif kind == "gauge":
+                    for key, value in gauges.get(name, ()):
+                        lines.append(f"{name}{self._format(key)} {self._number(value)}")
+                else:
+                    for key, histogram in self._histograms[name].items():
+                        cumulative = 0
+                        for bound, count in zip(buckets + (float("inf"),), histogram.counts):
+                            cumulative += count
+                            le = "+Inf" if bound == float("inf") else self._number(bound)
+                            lines.append(f"{name}_bucket{self._format(key + (('le', le),))} {cumulative}")
+                        lines.append(f"{name}_sum{self._format(key)} {self._number(histogram.total)}")
+                        lines.append(f"{name}_count{self._format(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            for series in self._counters.values():
+                series.clear()
+            for series in self._histograms.values():
+                series.clear()
+
+    # =========================================================================
+    # PART 4: HELPERS PRIVADOS
+    # =========================================================================
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> LabelSet:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _format(key: LabelSet) -> str:
+        if not key:
+            return ""
+        escaped = (
+            f'{k}="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for k, v in key
+        )
+        return "{" + ",".join(escaped) + "}"
+
+    @staticmethod
+    def _number(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+metrics = MetricsRegistry()
+
+# =========================================================================
+# FASES POR REQUISIÇÃO (Server-Timing)
+# =========================================================================
+
+@contextmanager
+def track_request_phases() -> Iterator[Dict[str, float]]:
+    """Collects the phases recorded while the block (one request) runs."""
+    phases: Dict[str, float] = {}
+    token = _request_phases.set(phases)
+    try:
+        yield phases
+    finally:
+        _request_phases.reset(token)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Times the block as one Server-Timing phase (no histogram)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+def server_timing_header(phases: Dict[str, float]) -> str:
+    """'users;dur=0.12, analytics;dur=35.4' (durations in milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items())
+
+# =========================================================================
+# MÉTRICAS DA APLICAÇÃO
+# =========================================================================
+
+# Upstream (Aevo)
+metrics.histogram("upstream_request_seconds", "Latency of each upstream HTTP attempt, by endpoint and outcome.")
+metrics.histogram("upstream_response_bytes", "Size of each upstream response body on the wire (before gzip/deflate decoding), by endpoint.", BYTES_BUCKETS)
+metrics.counter("upstream_retries_total", "Upstream attempts that were retried, by endpoint.")
+metrics.histogram("upstream_fetch_pages", "Pages reported by the API for one paginated fetch, by endpoint.", PAGES_BUCKETS)
+metrics.counter("upstream_pages_total", "Pages fetched and validated, by endpoint.")
+
+# Store de ideias (partições por mês de criação)
+metrics.counter("idea_partition_revalidations_total", "Month partitions re-checked against the API, by partition (hot/closed) and result.")
+
+# Validação (Pydantic)
+metrics.histogram("validation_seconds", "Time spent validating payloads into models, by model.")
+metrics.counter("validation_items_total", "Records validated, by model.")
+
+# Relatórios
+metrics.histogram("analytics_stage_seconds", "Time spent in each AnalyticsService stage.")
+metrics.histogram("report_build_seconds", "Time to build and serialize a report on a cache miss, by report.")
+metrics.counter("report_cache_requests_total", "Report cache lookups, by result (hit/miss).")
+metrics.counter("report_not_modified_total", "Report requests answered with 304 Not Modified, by report.")
+
+# HTTP (ponta a ponta)
+metrics.histogram("http_request_seconds", "End-to-end latency of API requests, by route, method and status.")
+
+# Lidas no momento do scrape (coletores registrados pelo servidor)
+metrics.gauge("snapshot_ready", "1 when a data snapshot is loaded, else 0.")
+metrics.gauge("snapshot_age_seconds", "Age of the current data snapshot.")
+metrics.gauge("snapshot_ideas", "Ideas in the current data snapshot.")
+metrics.gauge("snapshot_users", "Users in the current data snapshot.")
+metrics.gauge("report_cache_entries", "Reports currently held in the response cache.")
+metrics.gauge("report_cache_hit_ratio", "Hits / lookups of the report cache since start.")
+metrics.gauge("single_flight_calls", "Upstream fetches executed vs. coalesced into an in-flight one, since start.")
+metrics.gauge("upstream_in_flight", "Upstream requests currently in flight, by host.")
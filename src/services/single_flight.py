@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, callers arriving while it is in flight wait and receive the same
+    result (or exception). Nothing is cached after the call finishes.
+    do() serves the thread-based path, do_async() the asyncio path; both share
+    one registry, so a blocking and an async caller of the same key also coalesce.
+    """
+
+    def __init__(self):
+        # Um Future (thread-safe) por chave em voo; callers async esperam via asyncio.wrap_future
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        call, leader = self._join(key)
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call, leader = self._join(key)
+        if leader:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._tasks.add(task)
+            task.add_done_callback(lambda t: self._finish_task(key, call, t))
+
+        # shield: um cliente que desconecta não cancela a busca dos demais
+        return await asyncio.shield(asyncio.wrap_future(call))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
+
+    # =========================================================================
+    # HELPERS PRIVADOS
+    # =========================================================================
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Returns the in-flight call for 'key' and whether this caller must run it."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = Future()
+            self.executed += 1
+            return call, True
+
+    def _finish(self, key: Hashable, call: Future, result: Any = None, error: BaseException = None) -> None:
+        # Sai do registro antes de acordar os demais: quem chegar depois dispara uma busca nova
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def _finish_task(self, key: Hashable, call: Future, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        error = asyncio.CancelledError() if task.cancelled() else task.exception()
+        self._finish(key, call, result=None if error is not None else task.result(), error=error)
+
+
+# Compartilhado pelos serviços que buscam dados no Aevo
+upstream_flight = SingleFlight()
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from src.config import Config
+from src.models.user_model import User
+from src.services.idea_index import IdeaIndex
+from src.services.idea_store_service import idea_store_service
+from src.services.user_directory import UserDirectory, user_directory_service
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """
+    Immutable view of users + ideas used to answer requests.
+    A new Snapshot is built on every refresh and swapped in as a whole,
+    so a request never mixes data from two refreshes.
+    """
+
+    def __init__(self, directory: UserDirectory, index: IdeaIndex, ideas_version: str, refresh_seconds: float):
+        self.directory = directory
+        self.index = index
+        self.ideas_version = ideas_version
+        self.loaded_at = datetime.now()
+        self.loaded_monotonic = time.monotonic()
+        self.refresh_seconds = refresh_seconds
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.loaded_monotonic
+
+    def department_users(self, department_id: int) -> List[User]:
+        return self.directory.department_users(department_id)
+
+
+class SnapshotService:
+    """
+    Keeps the current Snapshot and refreshes it in background:
+    syncs the idea store (incremental), reuses the user directory (own TTL) and takes the
+    store's frozen copy of the idea index (only re-copied when ideas changed).
+    Started/stopped by the FastAPI lifespan; requests get 503 until the first refresh.
+    """
+
+    def __init__(self, refresh_interval: float, retry_interval: float):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self._snapshot: Optional[Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._saved_version: Optional[str] = None
+
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.last_error: Optional[str] = None
+        self.last_attempt_at: Optional[datetime] = None
+
+    # =========================================================================
+    # PART 1: LEITURA
+    # =========================================================================
+
+    def current(self) -> Optional[Snapshot]:
+        """Latest snapshot (None until the first refresh succeeds)."""
+        return self._snapshot
+
+    @property
+    def is_ready(self) -> bool:
+        return self._snapshot is not None
+
+    def status(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "ready": snapshot is not None,
+            "loaded_at": snapshot.loaded_at.isoformat() if snapshot else None,
+            "age_seconds": round(snapshot.age_seconds, 1) if snapshot else None,
+            "last_refresh_seconds": round(snapshot.refresh_seconds, 3) if snapshot else None,
+            "ideas": len(snapshot.index) if snapshot else 0,
+            "users": len(snapshot.directory) if snapshot else 0,
+            "refresh_interval_seconds": self.refresh_interval,
+            "refresh_count": self.refresh_count,
+            "failure_count": self.failure_count,
+            "last_attempt_at": self.last_attempt_at.isoformat() if self.last_attempt_at else None,
+            "last_error": self.last_error
+        }
+
+    # =========================================================================
+    # PART 2: ATUALIZAÇÃO
+    # =========================================================================
+
+    async def refresh(self) -> Snapshot:
+        """Builds a new snapshot and swaps it in atomically."""
+        started = time.perf_counter()
+        self.last_attempt_at = datetime.now()
+
+        await idea_store_service.sync_async()
+        directory = await user_directory_service.get_directory_async()
+
+        def freeze_index():
+            # A cópia não recebe upserts futuros: o snapshot fica consistente.
+            # Sem mudanças desde o último refresh, o store devolve a mesma cópia (sem rebuild)
+            index = idea_store_service.get_frozen_index()
+            return index, idea_store_service.get_snapshot_version()
+
+        index, ideas_version = await asyncio.to_thread(freeze_index)
+
+        # Persiste o snapshot colunar quando as ideias mudaram (reinício rápido).
+        # É só um cache de reinício: uma falha aqui não impede a troca do snapshot
+        if ideas_version != self._saved_version:
+            try:
+                await asyncio.to_thread(idea_store_service.save_snapshot_file, index)
+                self._saved_version = ideas_version
+            except Exception as e:
+                logger.exception("Saving the snapshot file failed (serving the new snapshot anyway): %s", e)
+
+        snapshot = Snapshot(directory, index, ideas_version, time.perf_counter() - started)
+        self._snapshot = snapshot
+        self.refresh_count += 1
+        self.last_error = None
+        logger.info("Refreshed in %.2fs: %d ideas, %d users.", snapshot.refresh_seconds, len(index), len(directory),
+                    extra={"refresh_seconds": round(snapshot.refresh_seconds, 3)})
+        return snapshot
+
+    async def start(self) -> None:
+        """Starts the background loop (first load happens right away)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = self.refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Mantém o snapshot anterior; tenta de novo mais cedo
+                self.failure_count += 1
+                self.last_error = str(e)
+                logger.exception("Refresh failed: %s", e)
+                delay = self.retry_interval
+            await asyncio.sleep(delay)
+
+
+snapshot_service = SnapshotService(Config.SNAPSHOT_REFRESH_SECONDS, Config.SNAPSHOT_RETRY_SECONDS)
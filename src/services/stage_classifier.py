@@ -0,0 +1,134 @@
+import threading
+import unicodedata
+from datetime import datetime
+from enum import Enum, IntFlag
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.models.idea_models import IdeaLike
+
+
+class StagePhase(IntFlag):
+    """Funnel phases a stage label can match (a label may match more than one)."""
+    NONE = 0
+    APPROVAL = 1
+    IN_IMPLEMENTATION = 2
+    IMPLEMENTED = 4
+
+
+# Bits como int puro: '&' entre IntFlags cria um enum novo a cada etapa (caro no laço do funil)
+_APPROVAL = int(StagePhase.APPROVAL)
+_IN_IMPLEMENTATION = int(StagePhase.IN_IMPLEMENTATION)
+_IMPLEMENTED = int(StagePhase.IMPLEMENTED)
+
+
+class StatusCategory(str, Enum):
+    """Coarse category of an idea's current status."""
+    COMPLETED = "completed"
+    CLOSED = "closed"      # Cancelada / Reprovada
+    PENDING = "pending"
+
+
+class StageClassifier:
+    """
+    Classifies stage labels ('LabelPt') and current status names ('Estado') into
+    funnel phases/categories. Text is normalized once (accents + case) and each
+    distinct (flow_id, state_id, label) is classified once and cached.
+    Shared by AnalyticsService and IndividualReportService.
+    """
+
+    # Palavras-chave já normalizadas (sem acento, minúsculas)
+    APPROVAL_KEYWORDS = ("aprovadores", "aprovacao")
+    IN_IMPLEMENTATION_KEYWORDS = ("em implantacao", "execucao")
+    IMPLEMENTATION_KEYWORDS = ("implantada", "implantacao", "validada", "concluida")
+    CLOSED_KEYWORDS = ("cancelada", "reprovada")
+
+    def __init__(self):
+        self._stage_cache: Dict[Tuple[Optional[int], Optional[int], Optional[str]], StagePhase] = {}
+        self._status_cache: Dict[Optional[str], StatusCategory] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: Optional[str]) -> str:
+        """Lowercase and strip accents ('Implantação' -> 'implantacao')."""
+        if not text:
+            return ""
+        decomposed = unicodedata.normalize("NFKD", text.lower())
+        return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+    def classify_stage(self, label: Optional[str], flow_id: Optional[int] = None, state_id: Optional[int] = None) -> StagePhase:
+        key = (flow_id, state_id, label)
+        phase = self._stage_cache.get(key)
+        if phase is None:
+            normalized = self.normalize(label)
+            phase = StagePhase.NONE
+            if any(k in normalized for k in self.APPROVAL_KEYWORDS):
+                phase |= StagePhase.APPROVAL
+            if any(k in normalized for k in self.IN_IMPLEMENTATION_KEYWORDS):
+                phase |= StagePhase.IN_IMPLEMENTATION
+            if any(k in normalized for k in self.IMPLEMENTATION_KEYWORDS):
+                phase |= StagePhase.IMPLEMENTED
+            with self._lock:
+                self._stage_cache[key] = phase
+        return phase
+
+    def classify_status(self, status_name: Optional[str]) -> StatusCategory:
+        category = self._status_cache.get(status_name)
+        if category is None:
+            normalized = self.normalize(status_name)
+            if any(k in normalized for k in self.IMPLEMENTATION_KEYWORDS):
+                category = StatusCategory.COMPLETED
+            elif any(k in normalized for k in self.CLOSED_KEYWORDS):
+                category = StatusCategory.CLOSED
+            else:
+                category = StatusCategory.PENDING
+            with self._lock:
+                self._status_cache[status_name] = category
+        return category
+
+    def stage_phase(self, stage) -> StagePhase:
+        """Phase stored at ingestion, or classified now (cached) for non-annotated stages."""
+        if stage.phase is not None:
+            return StagePhase(stage.phase)
+        return self.classify_stage(stage.label_pt, stage.flow_id, stage.state_id)
+
+    def idea_status(self, idea: IdeaLike) -> StatusCategory:
+        """Category stored at ingestion, or classified now (cached) for non-annotated ideas."""
+        if idea.status_category is not None:
+            return StatusCategory(idea.status_category)
+        return self.classify_status(idea.current_stage_name)
+
+    def funnel_dates(self, idea: IdeaLike) -> Tuple[Optional[datetime], Optional[datetime], Optional[datetime]]:
+        """
+        Funnel dates of an idea: (sent to implementation, sent for validation, validated),
+        taken from the LAST stage of each phase. Invalid dates become None.
+        """
+        approval = in_implementation = implemented = None
+        for stage in idea.stages:
+            phase = stage.phase
+            if phase is None:
+                phase = int(self.classify_stage(stage.label_pt, stage.flow_id, stage.state_id))
+            if phase & _APPROVAL:
+                approval = stage
+            if phase & _IN_IMPLEMENTATION:
+                in_implementation = stage
+            if phase & _IMPLEMENTED:
+                implemented = stage
+
+        sent = approval.end_date if approval else None
+        sent_val = in_implementation.end_date if in_implementation else None
+        validated = implemented.start_date if implemented else None
+        return self._valid_date(sent), self._valid_date(sent_val), self._valid_date(validated)
+
+    @staticmethod
+    def _valid_date(dt: Optional[datetime]) -> Optional[datetime]:
+        # API usa '0001-01-01' como "sem data"
+        return dt if dt and dt.year >= 1900 else None
+
+    def annotate(self, ideas: Iterable[IdeaLike]) -> None:
+        """Stores the phase of every stage and the status category on each idea (ingestion time)."""
+        for idea in ideas:
+            idea.status_category = self.classify_status(idea.current_stage_name).value
+            for stage in idea.stages:
+                stage.phase = int(self.classify_stage(stage.label_pt, stage.flow_id, stage.state_id))
+
+stage_classifier = StageClassifier()
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from src.config import Config
+from src.models.user_model import User, DepartmentInfo
+from src.services.external_user_service import external_user_service
+
+logger = logging.getLogger(__name__)
+
+
+class UserDirectory:
+    """
+    Immutable index over the active user directory:
+    - user id            -> User
+    - UserName (matrícula) -> User
+    - department id      -> users
+    """
+
+    def __init__(self, users: Iterable[User]):
+        self.users: List[User] = list(users)
+        self.by_id: Dict[str, User] = {}
+        self.by_username: Dict[str, User] = {}
+        self.by_department: Dict[int, List[User]] = defaultdict(list)
+        self.departments: Dict[int, DepartmentInfo] = {}
+
+        for user in self.users:
+            self.by_id[user.id] = user
+            self.by_username[user.username] = user
+            self.by_department[user.department.id].append(user)
+            self.departments.setdefault(user.department.id, user.department)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    # =========================================================================
+    # CONSULTAS
+    # =========================================================================
+
+    def get_user(self, user_id: str) -> Optional[User]:
+        return self.by_id.get(user_id)
+
+    def get_by_username(self, username: str) -> Optional[User]:
+        """Lookup by matrícula (UserName)."""
+        return self.by_username.get(username)
+
+    def department_users(self, department_id: int) -> List[User]:
+        return list(self.by_department.get(department_id, []))
+
+
+class UserDirectoryService:
+    """
+    One cached fetch of every active user, refreshed when older than the TTL.
+    Concurrent refreshes share one upstream pull (single-flight in ExternalUserService).
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._directory: Optional[UserDirectory] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_directory(self) -> UserDirectory:
+        if self._is_fresh():
+            return self._directory
+        return self._store(external_user_service.get_all_active_users())
+
+    async def get_directory_async(self) -> UserDirectory:
+        """Async version of get_directory."""
+        if self._is_fresh():
+            return self._directory
+        users = await external_user_service.get_all_active_users_async()
+        return await asyncio.to_thread(self._store, users)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return self._directory is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    def _store(self, users: List[User]) -> UserDirectory:
+        directory = UserDirectory(users)
+        with self._lock:
+            self._directory = directory
+            self._loaded_at = time.monotonic()
+        logger.info("Loaded %d users in %d departments.", len(directory), len(directory.departments))
+        return directory
+
+
+user_directory_service = UserDirectoryService(Config.USER_DIRECTORY_TTL_SECONDS)
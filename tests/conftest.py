@@ -0,0 +1,77 @@
+import os
+import tempfile
+from datetime import datetime
+from typing import List
+
+import pytest
+
+# src.config valida o ambiente na importação: define antes de qualquer import de src
+_DATA_DIR = tempfile.mkdtemp(prefix="aevo-tests-")
+os.environ.setdefault("BASE_URL", "http://aevo.test")
+os.environ.setdefault("API_TOKEN", "test-token")
+os.environ.setdefault("IDEA_STORE_PATH", os.path.join(_DATA_DIR, "ideas.sqlite3"))
+os.environ.setdefault("IDEA_SNAPSHOT_PATH", os.path.join(_DATA_DIR, "ideas.arrow"))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from benchmarks.synthetic_data import DatasetConfig, generate_users, iter_ideas  # noqa: E402
+from src.models.idea_models import Idea  # noqa: E402
+from src.models.user_model import User  # noqa: E402
+from src.services.idea_index import IdeaIndex  # noqa: E402
+from src.services.idea_store_service import IdeaStoreService  # noqa: E402
+from src.services.report_cache import report_cache  # noqa: E402
+from src.services.snapshot_service import Snapshot, snapshot_service  # noqa: E402
+from src.services.stage_classifier import stage_classifier  # noqa: E402
+from src.services.user_directory import UserDirectory  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def dataset_config() -> DatasetConfig:
+    # Anos até o atual: as linhas do tempo semanais (relativas a 'agora') também têm dados
+    year = datetime.now().year
+    return DatasetConfig(ideas=800, departments=6, users_per_department=8, start_year=year - 1, end_year=year, seed=11)
+
+
+@pytest.fixture(scope="session")
+def raw_users(dataset_config) -> List[dict]:
+    return generate_users(dataset_config)
+
+
+@pytest.fixture(scope="session")
+def raw_ideas(dataset_config, raw_users) -> List[dict]:
+    return list(iter_ideas(dataset_config, raw_users))
+
+
+@pytest.fixture
+def users(raw_users) -> List[User]:
+    return TypeAdapter(List[User]).validate_python(raw_users)
+
+
+@pytest.fixture
+def ideas(raw_ideas) -> List[Idea]:
+    """Full ideas, annotated like the store does at ingestion."""
+    parsed = TypeAdapter(List[Idea]).validate_python(raw_ideas)
+    stage_classifier.annotate(parsed)
+    return parsed
+
+
+@pytest.fixture
+def store(tmp_path) -> IdeaStoreService:
+    """Empty store (SQLite + Arrow snapshot) in a temp dir."""
+    return IdeaStoreService(str(tmp_path / "ideas.sqlite3"), str(tmp_path / "ideas.arrow"))
+
+
+@pytest.fixture
+def snapshot(users, ideas) -> Snapshot:
+    return Snapshot(UserDirectory(users), IdeaIndex(ideas), ideas_version="test-v1", refresh_seconds=0.0)
+
+
+@pytest.fixture
+def api(monkeypatch, snapshot):
+    """TestClient over the app serving 'snapshot' (lifespan not started: no upstream calls)."""
+    from fastapi.testclient import TestClient
+    from src.api.server import app
+
+    monkeypatch.setattr(snapshot_service, "_snapshot", snapshot)
+    report_cache.clear()
+    return TestClient(app)
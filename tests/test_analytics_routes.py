@@ -0,0 +1,137 @@
+import pytest
+
+from src.api.routes.analytics_router import REPORT_TARGETS
+from src.services.analytics_service import analytics_service
+from src.services.individual_report_service import individual_report_service
+from src.services.snapshot_service import snapshot_service
+
+
+@pytest.fixture
+def year(dataset_config) -> int:
+    return dataset_config.end_year
+
+
+def expected_department_report(snapshot, ideas, department_id, year) -> dict:
+    """Reference: the streaming single-department report over every idea (no index)."""
+    report = analytics_service.generate_combined_report(
+        department_users=snapshot.department_users(department_id),
+        idea_pages=[ideas],
+        target_year=year,
+        **REPORT_TARGETS
+    )
+    return report.model_dump(mode="json")
+
+
+# =========================================================================
+# Relatório em lote por departamento
+# =========================================================================
+
+def test_batch_report_matches_one_report_per_department(api, snapshot, ideas, year):
+    response = api.get("/analytics/departments", params={"year": year})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(int(d) for d in body["reports"]) == sorted(snapshot.directory.by_department)
+    for dept_id, report in body["reports"].items():
+        assert report == expected_department_report(snapshot, ideas, int(dept_id), year)
+
+
+def test_batch_report_matches_the_single_department_route(api, year):
+    batch = api.get("/analytics/departments", params={"year": year, "department_ids": "2,3"}).json()
+
+    for dept_id in ("2", "3"):
+        single = api.get(f"/analytics/department/{dept_id}", params={"year": year})
+        assert single.status_code == 200
+        assert batch["reports"][dept_id] == single.json()
+
+
+def test_batch_report_lists_departments_without_users(api, year):
+    body = api.get("/analytics/departments", params={"year": year, "department_ids": "1,999"}).json()
+
+    assert list(body["reports"]) == ["1"]
+    assert body["departments_without_users"] == [999]
+
+
+def test_batch_report_rejects_malformed_department_ids(api, year):
+    response = api.get("/analytics/departments", params={"year": year, "department_ids": "1,abc"})
+
+    assert response.status_code == 422
+
+
+# =========================================================================
+# Relatórios individuais
+# =========================================================================
+
+def test_user_report_matches_the_linear_scan(api, users, ideas, year):
+    for user in users[::7]:
+        response = api.get(f"/analytics/user/{user.username}", params={"year": year})
+
+        expected = individual_report_service.generate_report(users, ideas, year, user.username)
+        assert response.status_code == 200
+        assert response.json() == expected.model_dump(mode="json")
+
+
+def test_unknown_matricula_is_404(api, year):
+    assert api.get("/analytics/user/no-such-user", params={"year": year}).status_code == 404
+
+
+def test_batch_user_reports_match_the_individual_route(api, users, year):
+    matriculas = [u.username for u in users[:5]]
+
+    response = api.get("/analytics/users", params={"year": year, "matriculas": ",".join(matriculas + ["zz", matriculas[0]])})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["reports"]) == matriculas
+    assert body["matriculas_not_found"] == ["zz"]
+    for matricula in matriculas:
+        single = api.get(f"/analytics/user/{matricula}", params={"year": year}).json()
+        assert body["reports"][matricula] == single
+
+
+def test_batch_user_reports_require_matriculas(api, year):
+    assert api.get("/analytics/users", params={"year": year, "matriculas": " , "}).status_code == 422
+
+
+# =========================================================================
+# Cache + ETag/304
+# =========================================================================
+
+def test_repeated_report_is_served_from_cache_with_the_same_etag(api, year, monkeypatch):
+    first = api.get("/analytics/department/1", params={"year": year})
+    monkeypatch.setattr(analytics_service, "generate_combined_report_from_index",
+                        lambda **kwargs: pytest.fail("report rebuilt despite a cached body"))
+    second = api.get("/analytics/department/1", params={"year": year})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.content == first.content
+
+
+def test_matching_if_none_match_returns_304_without_body(api, year):
+    etag = api.get("/analytics/department/1", params={"year": year}).headers["ETag"]
+
+    response = api.get("/analytics/department/1", params={"year": year}, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_etag_changes_with_the_snapshot_version(api, snapshot, year):
+    etag = api.get("/analytics/departments", params={"year": year}).headers["ETag"]
+    snapshot.ideas_version = "test-v2"
+
+    response = api.get("/analytics/departments", params={"year": year}, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_reports_answer_503_until_the_first_snapshot(api, year, monkeypatch):
+    monkeypatch.setattr(snapshot_service, "_snapshot", None)
+
+    response = api.get("/analytics/department/1", params={"year": year})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
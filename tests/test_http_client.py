@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.config import Config
+from src.services import http_client as http_client_module
+from src.services.http_client import UpstreamClient
+
+BODY = b'{"resultado":[' + b",".join(b'{"Id":1}' for _ in range(5000)) + b"]}"
+GZIPPED = gzip.compress(BODY)
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """
+    /gzip/<anything>      -> gzip body with Content-Length
+    /chunked/<anything>   -> gzip body, chunked transfer encoding
+    /flaky/<n>/<name>     -> 503 for the first <n> hits of that path, then the gzip body
+    """
+
+    protocol_version = "HTTP/1.1"
+    hits = Counter()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.hits[path] += 1
+        parts = path.strip("/").split("/")
+
+        if parts[0] == "flaky" and self.hits[path] <= int(parts[1]):
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        if parts[0] == "chunked":
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(GZIPPED), 100):
+                chunk = GZIPPED[i:i + 100]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(GZIPPED)))
+            self.end_headers()
+            self.wfile.write(GZIPPED)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "UPSTREAM_MAX_RETRIES", 3)
+    client = UpstreamClient()
+    delays = []
+    monkeypatch.setattr(client, "_backoff_delay", lambda attempt: delays.append(attempt) or 0)
+    client.delays = delays
+    return client
+
+
+# =========================================================================
+# Retries + backoff
+# =========================================================================
+
+def test_retries_5xx_until_success(upstream, client):
+    base, host = upstream
+
+    response = client.get(f"{base}/flaky/2/sync")
+
+    assert response.status_code == 200
+    assert client.delays == [0, 1]
+    stats = client.get_pool_metrics()[host]
+    assert (stats["requests"], stats["retries"], stats["errors"]) == (3, 2, 2)
+
+
+def test_returns_the_last_5xx_when_retries_run_out(upstream, client):
+    base, host = upstream
+
+    response = asyncio.run(client.get_async(f"{base}/flaky/9/async"))
+
+    assert response.status_code == 503
+    assert client.delays == [0, 1, 2]
+    assert client.get_pool_metrics()[host]["requests"] == 4
+
+
+def test_backoff_is_full_jitter_capped_at_the_maximum(monkeypatch):
+    monkeypatch.setattr(Config, "UPSTREAM_BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(Config, "UPSTREAM_BACKOFF_MAX", 3.0)
+    monkeypatch.setattr(http_client_module.random, "uniform", lambda low, high: (low, high))
+    client = UpstreamClient()
+
+    assert [client._backoff_delay(attempt) for attempt in range(4)] == [(0, 0.5), (0, 1.0), (0, 2.0), (0, 3.0)]
+
+
+# =========================================================================
+# Bytes na rede + ciclo de vida
+# =========================================================================
+
+@pytest.mark.parametrize("path, expected", [
+    ("gzip/sync", len(GZIPPED)),
+    # urllib3 não conta corpos chunked: sem Content-Length cai no tamanho descomprimido
+    ("chunked/sync", len(BODY)),
+])
+def test_blocking_get_counts_compressed_bytes(upstream, client, path, expected):
+    base, host = upstream
+
+    response = client.get(f"{base}/{path}")
+
+    assert response.content == BODY
+    assert client.get_pool_metrics()[host]["bytes_received"] == expected
+
+
+def test_async_get_counts_compressed_bytes(upstream, client):
+    base, host = upstream
+
+    response = asyncio.run(client.get_async(f"{base}/chunked/async"))
+
+    assert response.content == BODY
+    assert client.get_pool_metrics()[host]["bytes_received"] == len(GZIPPED)
+
+
+def test_async_clients_are_bound_to_their_own_event_loop(upstream, client):
+    base, host = upstream
+
+    async def fetch():
+        response = await client.get_async(f"{base}/gzip/async")
+        return response.content
+
+    # Dois asyncio.run seguidos: o segundo loop não pode herdar o client do primeiro
+    assert asyncio.run(fetch()) == BODY
+    assert asyncio.run(fetch()) == BODY
+    assert client.get_pool_metrics()[host]["bytes_received"] == 2 * len(GZIPPED)
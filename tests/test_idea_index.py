@@ -0,0 +1,73 @@
+from src.services.idea_index import IdeaIndex
+
+
+def ids(ideas):
+    return [i.id for i in ideas]
+
+
+def scan(ideas, predicate):
+    return sorted(i.id for i in ideas if predicate(i))
+
+
+def implementer_ids(idea):
+    return {imp.user_id for imp in idea.implementers if imp.user_id}
+
+
+def test_queries_match_a_linear_scan(ideas):
+    index = IdeaIndex(ideas)
+    users = sorted({i.creator_id for i in ideas})[:5]
+    year = ideas[0].created_at.year
+
+    assert ids(index.ideas_implemented_by(users)) == scan(ideas, lambda i: implementer_ids(i) & set(users))
+    assert ids(index.ideas_created_by(users)) == scan(ideas, lambda i: i.creator_id in users)
+    assert ids(index.ideas_created_by(users, year)) == scan(
+        ideas, lambda i: i.creator_id in users and i.created_at.year == year
+    )
+    assert ids(index.ideas_created_in(year, 3)) == scan(
+        ideas, lambda i: (i.created_at.year, i.created_at.month) == (year, 3)
+    )
+    assert ids(index.ideas_in_stage([1, 7])) == scan(ideas, lambda i: i.current_stage_id in (1, 7))
+
+
+def test_related_ideas_limit_only_the_created_ones_to_the_months(ideas):
+    index = IdeaIndex(ideas)
+    users = set(sorted({i.creator_id for i in ideas})[:5])
+    year = ideas[0].created_at.year
+    months = [(year, m) for m in range(1, 7)]
+
+    expected = scan(ideas, lambda i: bool(implementer_ids(i) & users) or (
+        i.creator_id in users and (i.created_at.year, i.created_at.month) in months
+    ))
+    assert ids(index.ideas_related_to(users, creation_months=months)) == expected
+    assert ids(index.ideas_related_to(users)) == scan(
+        ideas, lambda i: bool(implementer_ids(i) & users) or i.creator_id in users
+    )
+
+
+def test_upsert_and_remove_keep_every_index_consistent(ideas):
+    index = IdeaIndex(ideas[:500])
+    moved = [i.model_copy(update={"current_stage_id": 99, "creator_id": "someone-else"}) for i in ideas[:20]]
+    index.upsert(moved + ideas[500:])
+    index.remove([i.id for i in ideas[20:40]])
+
+    current = {i.id: i for i in ideas}
+    current.update({i.id: i for i in moved})
+    for idea in ideas[20:40]:
+        del current[idea.id]
+    rebuilt = IdeaIndex(current.values())
+
+    for name in ("by_implementer", "by_creator", "by_creation_month", "by_stage"):
+        assert dict(getattr(index, name)) == dict(getattr(rebuilt, name))
+    assert ids(index.ideas_in_stage([99])) == sorted(i.id for i in moved)
+
+
+def test_copy_does_not_see_later_upserts(ideas):
+    index = IdeaIndex(ideas[:-1])
+    frozen = index.copy()
+
+    index.upsert(ideas[-1:])
+    index.remove([ideas[0].id])
+
+    assert len(frozen) == len(ideas) - 1
+    assert ideas[0].id in frozen.ideas_by_id
+    assert ideas[-1].id not in frozen.ideas_by_id
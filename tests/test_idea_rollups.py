@@ -0,0 +1,101 @@
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+from src.services.analytics_service import analytics_service
+from src.services.idea_index import IdeaIndex
+from src.services.idea_rollups import IdeaRollups
+from src.services.idea_table import IdeaTable
+from src.services.stage_classifier import stage_classifier
+
+TARGETS = {
+    "plr_target_per_user": 4,
+    "dept_individual_target": 14,
+    "monthly_target_aggregate": 67,
+    "weekly_target_aggregate": 15
+}
+
+
+def rollup_state(rollups: IdeaRollups):
+    return (
+        {user: dict(counts) for user, counts in rollups.created.items()},
+        {group: dict(counts) for group, counts in rollups.funnel.items()},
+        dict(rollups.group_sizes),
+        {user: set(groups) for user, groups in rollups.groups_by_user.items()}
+    )
+
+
+@pytest.fixture
+def users_by_department(users):
+    by_department = defaultdict(list)
+    for user in users:
+        by_department[user.department.id].append(user)
+    return by_department
+
+
+def test_report_from_rollups_matches_streaming_scan(users_by_department, ideas):
+    index = IdeaIndex(ideas)
+    year = datetime.now().year
+
+    for department_users in users_by_department.values():
+        scanned = analytics_service.generate_combined_report(
+            department_users=department_users,
+            idea_pages=[ideas],
+            target_year=year,
+            **TARGETS
+        )
+        from_rollups = analytics_service.generate_combined_report_from_index(
+            department_users=department_users,
+            index=index,
+            target_year=year,
+            **TARGETS
+        )
+        assert from_rollups.model_dump() == scanned.model_dump()
+
+
+def test_batch_reports_from_rollups_match_scan(users_by_department, ideas):
+    index = IdeaIndex(ideas)
+    year = datetime.now().year
+
+    scanned = analytics_service.generate_batch_department_reports(
+        users_by_department=users_by_department, idea_pages=[ideas], target_year=year, **TARGETS
+    )
+    selected = [u.id for users in users_by_department.values() for u in users]
+    related = index.ideas_related_to(selected, creation_months=analytics_service.creation_months(year))
+    from_rollups = analytics_service.generate_batch_department_reports(
+        users_by_department=users_by_department, idea_pages=[related], target_year=year, **TARGETS, index=index
+    )
+    assert {d: r.model_dump() for d, r in from_rollups.items()} == {d: r.model_dump() for d, r in scanned.items()}
+
+
+def test_incremental_updates_match_rebuild(ideas):
+    index = IdeaIndex(ideas[:600])
+    edited = [i.model_copy(update={"implementers": list(reversed(i.implementers))[:1]}) for i in ideas[:50]]
+    index.upsert(edited + ideas[600:])
+    index.remove([i.id for i in ideas[100:150]])
+
+    expected = {i.id: i for i in ideas}
+    expected.update({i.id: i for i in edited})
+    for idea in ideas[100:150]:
+        del expected[idea.id]
+
+    assert rollup_state(index.rollups) == rollup_state(IdeaIndex(expected.values()).rollups)
+
+
+def test_removing_every_idea_leaves_empty_rollups(ideas):
+    index = IdeaIndex(ideas)
+    index.remove([i.id for i in ideas])
+
+    assert rollup_state(index.rollups) == ({}, {}, {}, {})
+
+
+def test_add_table_matches_add(ideas):
+    rollups = IdeaRollups()
+    for idea in ideas:
+        rollups.add(idea)
+
+    from_table = IdeaRollups()
+    from_table.add_table(IdeaTable.from_ideas(ideas, stage_classifier.funnel_dates))
+
+    assert rollup_state(from_table) == rollup_state(rollups)
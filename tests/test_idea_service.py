@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+import requests
+
+from src.config import Config
+from src.services import idea_service as idea_service_module
+from src.services.idea_service import idea_service
+
+PAGE_SIZE = 1000
+
+
+class FakeUpstream:
+    """Serves GetIdeias pages (1000 ideas each) from a list of raw payloads."""
+
+    def __init__(self, raw_ideas):
+        self.raw_ideas = raw_ideas
+        self.pages_requested = []
+
+    def body(self, params) -> bytes:
+        filters = json.loads(params["filtros"])
+        page, per_page = filters["pagina"], filters["itensPorPagina"]
+        self.pages_requested.append(page)
+        total_pages = max(1, -(-len(self.raw_ideas) // per_page))
+        chunk = self.raw_ideas[(page - 1) * per_page: page * per_page]
+        return json.dumps({
+            "sucesso": True, "mensagem": None, "resultado": chunk,
+            "numeroPaginas": total_pages, "paginaAtual": page, "itensPorPagina": per_page
+        }).encode()
+
+    async def get_async(self, url, params=None):
+        return httpx.Response(200, content=self.body(params), request=httpx.Request("GET", url))
+
+
+@pytest.fixture
+def many_raw_ideas(raw_ideas):
+    # 3 páginas de 1000 (ids únicos)
+    return [dict(raw, Id=n + 1) for n, raw in enumerate(raw_ideas * 4)][:2500]
+
+
+def test_async_pages_are_parsed_off_the_event_loop(many_raw_ideas, monkeypatch):
+    upstream = FakeUpstream(many_raw_ideas)
+    monkeypatch.setattr(idea_service_module, "upstream_client", upstream)
+
+    parse_page = idea_service._parse_page
+    parse_threads = []
+
+    def recording_parse(content, lean=False):
+        parse_threads.append(threading.get_ident())
+        return parse_page(content, lean)
+
+    monkeypatch.setattr(idea_service, "_parse_page", recording_parse)
+
+    async def collect():
+        loop_thread = threading.get_ident()
+        ideas = await idea_service._collect_pages_async({}, lean=True)
+        return loop_thread, ideas
+
+    loop_thread, ideas = asyncio.run(collect())
+
+    assert [i.id for i in ideas] == [raw["Id"] for raw in many_raw_ideas]
+    assert sorted(upstream.pages_requested) == [1, 2, 3]
+    assert len(parse_threads) == 3
+    assert loop_thread not in parse_threads
+
+
+class SlowUpstream:
+    """20 small pages; pages after 'fast_pages' take 'delay' seconds."""
+
+    def __init__(self, raw_ideas, delay, fast_pages=1):
+        self.raw_ideas = raw_ideas[:10]
+        self.delay = delay
+        self.fast_pages = fast_pages
+        self.started = []
+
+    def get(self, url, params=None):
+        page = json.loads(params["filtros"])["pagina"]
+        self.started.append(page)
+        if page > self.fast_pages:
+            time.sleep(self.delay)
+        body = json.dumps({"sucesso": True, "resultado": self.raw_ideas, "numeroPaginas": 20, "paginaAtual": page})
+        response = requests.Response()
+        response.status_code = 200
+        response._content = body.encode()
+        return response
+
+
+def test_sync_pages_are_fetched_concurrently_and_yielded_in_order(raw_ideas, monkeypatch):
+    upstream = SlowUpstream(raw_ideas, delay=0.05)
+    monkeypatch.setattr(idea_service_module, "upstream_client", upstream)
+    monkeypatch.setattr(Config, "UPSTREAM_MAX_CONCURRENCY", 8)
+
+    started = time.perf_counter()
+    pages = list(idea_service._iter_pages({}, lean=True))
+
+    assert len(pages) == 20
+    assert all([i.id for i in page] == [raw["Id"] for raw in upstream.raw_ideas] for page in pages)
+    assert time.perf_counter() - started < 19 * 0.05  # mais rápido que sequencial
+
+
+def test_closing_the_page_iterator_does_not_wait_for_pages_in_flight(raw_ideas, monkeypatch):
+    upstream = SlowUpstream(raw_ideas, delay=1.0, fast_pages=2)
+    monkeypatch.setattr(idea_service_module, "upstream_client", upstream)
+    monkeypatch.setattr(Config, "UPSTREAM_MAX_CONCURRENCY", 4)
+
+    pages = idea_service._iter_pages({}, lean=True)
+    next(pages)  # página 1
+    next(pages)  # página 2 (as páginas 3..5 seguem em voo, 1s cada)
+
+    started = time.perf_counter()
+    pages.close()
+
+    assert time.perf_counter() - started < 0.5
+    assert max(upstream.started) == 5  # nenhuma página nova depois do close()
@@ -0,0 +1,367 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.config import Config
+from src.services import idea_store_service as store_module
+from src.services.idea_store_service import PROGRAM_START_DATE, IdeaStoreService
+
+
+def period_of(ideas):
+    return min(i.created_at for i in ideas), max(i.created_at for i in ideas)
+
+
+# =========================================================================
+# upsert_ideas
+# =========================================================================
+
+def test_upsert_inserts_ideas_and_sets_high_water_mark(store, ideas):
+    assert store.upsert_ideas(ideas) == len(ideas)
+
+    assert store.count() == len(ideas)
+    assert store.get_high_water_mark() == max(i.updated_at for i in ideas)
+
+
+def test_upsert_replaces_existing_ideas_without_lowering_high_water_mark(store, ideas):
+    store.upsert_ideas(ideas)
+    high_water_mark = store.get_high_water_mark()
+
+    edited = ideas[0].model_copy(update={"title": "Edited", "updated_at": ideas[0].created_at})
+    assert store.upsert_ideas([edited]) == 1
+
+    assert store.count() == len(ideas)
+    assert store.get_high_water_mark() == high_water_mark
+    stored = {i.id: i for i in store.get_ideas_by_period(*period_of(ideas), lean=True)}
+    assert stored[edited.id].title == "Edited"
+
+
+def test_upsert_advances_high_water_mark(store, ideas):
+    store.upsert_ideas(ideas)
+    newer = ideas[1].model_copy(update={"updated_at": store.get_high_water_mark() + timedelta(days=1)})
+
+    store.upsert_ideas([newer])
+
+    assert store.get_high_water_mark() == newer.updated_at
+
+
+def test_upsert_with_no_ideas_is_a_no_op(store):
+    assert store.upsert_ideas([]) == 0
+    assert store.get_high_water_mark() is None
+
+
+# =========================================================================
+# sync
+# =========================================================================
+
+class FakeIdeaService:
+    """Stands in for the Aevo API: records which window each sync asked for."""
+
+    def __init__(self, full, updated=()):
+        self.full = list(full)
+        self.updated = list(updated)
+        self.calls = []
+
+    def get_ideas_by_period(self, start, end):
+        self.calls.append(("period", start))
+        return self.full
+
+    def get_ideas_updated_since(self, since, end):
+        self.calls.append(("updated_since", since))
+        return self.updated
+
+
+def test_first_sync_downloads_everything_then_only_updates(store, ideas, monkeypatch):
+    newer = ideas[0].model_copy(update={"title": "Edited", "updated_at": max(i.updated_at for i in ideas) + timedelta(days=1)})
+    fake = FakeIdeaService(ideas, [newer])
+    monkeypatch.setattr(store_module, "idea_service", fake)
+    monkeypatch.setattr(store, "revalidate_partitions", lambda now=None: 0)
+
+    assert store.sync() == len(ideas)
+    high_water_mark = store.get_high_water_mark()
+    assert store.sync() == 1
+
+    assert fake.calls == [("period", PROGRAM_START_DATE), ("updated_since", high_water_mark)]
+    assert store.count() == len(ideas)
+    assert store.get_high_water_mark() == newer.updated_at
+
+
+# =========================================================================
+# Índice em memória
+# =========================================================================
+
+def lean(ideas):
+    """Comparable view of a list of ideas (lean fields + derived annotations)."""
+    return [
+        (i.id, i.title, i.current_stage_id, i.created_at, i.updated_at, i.creator_id,
+         [imp.user_id for imp in i.implementers], [(s.state_id, s.end_date, s.phase) for s in i.stages])
+        for i in ideas
+    ]
+
+
+def test_upsert_updates_built_index_incrementally(store, ideas):
+    store.upsert_ideas(ideas[:-1])
+    index = store.get_index()
+    version = index.version
+
+    edited = ideas[0].model_copy(update={"title": "Edited"})
+    store.upsert_ideas([edited, ideas[-1]])
+
+    assert len(index) == len(ideas)
+    assert index.version > version
+    assert index.ideas_by_id[edited.id].title == "Edited"
+    rebuilt = IdeaStoreService(store.db_path).get_index()
+    assert lean(index.all_ideas()) == lean(rebuilt.all_ideas())
+
+
+def test_ideas_created_before_program_start_stay_out_of_the_index(store, ideas, caplog):
+    store.upsert_ideas(ideas)
+    index = store.get_index()
+
+    # Ideia antiga editada: volta na sync incremental por DataAtualizacao
+    old = ideas[0].model_copy(update={
+        "id": max(i.id for i in ideas) + 1,
+        "created_at": PROGRAM_START_DATE - timedelta(days=200),
+        "updated_at": store.get_high_water_mark() + timedelta(hours=1)
+    })
+    store.upsert_ideas([old])
+
+    assert old.id not in index.ideas_by_id
+    assert len(index) == len(ideas)
+    assert store.count() == len(ideas) + 1
+
+    # Reinício: o arquivo Arrow continua válido (sem reconstrução a partir do SQLite)
+    restarted = IdeaStoreService(store.db_path, store.snapshot_file.path)
+    assert len(restarted.get_index()) == len(index)
+    assert "does not match the store" not in caplog.text
+
+
+def test_idea_moved_before_program_start_leaves_the_index(store, ideas):
+    store.upsert_ideas(ideas)
+    index = store.get_index()
+
+    store.upsert_ideas([ideas[0].model_copy(update={"created_at": PROGRAM_START_DATE - timedelta(days=1)})])
+
+    assert ideas[0].id not in index.ideas_by_id
+    assert ideas[0].id not in index.by_creator.get(ideas[0].creator_id, set())
+
+
+def test_frozen_index_is_reused_until_the_index_changes(store, ideas):
+    store.upsert_ideas(ideas[:-1])
+    frozen = store.get_frozen_index()
+    assert store.get_frozen_index() is frozen
+
+    store.upsert_ideas(ideas[-1:])
+
+    assert store.get_frozen_index() is not frozen
+    assert len(frozen) == len(ideas) - 1
+
+# =========================================================================
+# Partições mensais
+# =========================================================================
+
+def month_of(idea):
+    return idea.created_at.year, idea.created_at.month
+
+
+def partition(ideas, month):
+    return [i for i in ideas if month_of(i) == month]
+
+
+class FakePartitionUpstream:
+    """Answers partition probes and re-fetches from a list of ideas; records each call."""
+
+    def __init__(self, ideas):
+        self.ideas = list(ideas)
+        self.calls = []
+
+    def _window(self, start, end):
+        return [i for i in self.ideas if start <= i.created_at <= end]
+
+    def count_ideas_by_period(self, start, end):
+        self.calls.append(("count", (start.year, start.month)))
+        return len(self._window(start, end))
+
+    def get_ideas_by_period(self, start, end):
+        self.calls.append(("fetch", (start.year, start.month)))
+        return self._window(start, end)
+
+
+@pytest.fixture
+def partitioned(store, ideas, dataset_config, monkeypatch):
+    """
+    Store holding every idea, all partitions validated at 'now' (mid-June of the
+    dataset's last year), plus a fake upstream starting with the same ideas.
+    """
+    monkeypatch.setattr(Config, "IDEA_PARTITION_HOT_MONTHS", 2)
+    monkeypatch.setattr(Config, "IDEA_PARTITION_MAX_PER_SYNC", 100)
+    now = datetime(dataset_config.end_year, 6, 15)
+    store.upsert_ideas(ideas)
+    store._save_partitions(store._months(now), now)
+    upstream = FakePartitionUpstream(ideas)
+    monkeypatch.setattr(store_module, "idea_service", upstream)
+    return store, upstream, now
+
+
+def test_replace_partition_upserts_changed_and_deletes_missing(store, ideas):
+    store.upsert_ideas(ideas)
+    index = store.get_index()
+    version = store.get_snapshot_version()
+    month = month_of(ideas[0])
+    fetched = partition(ideas, month)
+    assert len(fetched) >= 3
+
+    removed = fetched.pop()
+    edited = fetched[0].model_copy(update={"title": "Edited upstream"})  # mesma DataAtualizacao
+    fetched[0] = edited
+
+    assert store._replace_partition(month, True, fetched, datetime.now()) == 2
+
+    assert store.count() == len(ideas) - 1
+    stored = {i.id: i for i in store.get_ideas_by_period(*store._month_bounds(month), lean=True)}
+    assert removed.id not in stored
+    assert stored[edited.id].title == "Edited upstream"
+    assert removed.id not in index.ideas_by_id
+    assert index.ideas_by_id[edited.id].title == "Edited upstream"
+    # A marca d'água não muda: a versão do snapshot muda pela revisão
+    assert store.get_snapshot_version() != version
+
+
+def test_replace_partition_without_changes_keeps_version(store, ideas):
+    store.upsert_ideas(ideas)
+    version = store.get_snapshot_version()
+    month = month_of(ideas[0])
+
+    assert store._replace_partition(month, False, partition(ideas, month), datetime.now()) == 0
+
+    assert store.get_snapshot_version() == version
+    assert store.count() == len(ideas)
+
+
+def test_replace_partition_discards_snapshot_file(store, ideas, tmp_path):
+    pytest.importorskip("pyarrow")
+    store.upsert_ideas(ideas)
+    store.get_index()
+    assert (tmp_path / "ideas.arrow").exists()
+
+    month = month_of(ideas[0])
+    store._replace_partition(month, True, partition(ideas, month)[1:], datetime.now())
+
+    assert not (tmp_path / "ideas.arrow").exists()
+
+
+def test_partitions_are_not_rechecked_before_their_interval(partitioned):
+    store, upstream, now = partitioned
+
+    assert store.revalidate_partitions(now + timedelta(minutes=5)) == 0
+    assert upstream.calls == []
+
+
+def test_closed_partitions_are_probed_and_hot_ones_refetched(partitioned):
+    store, upstream, now = partitioned
+    later = now + timedelta(seconds=Config.IDEA_PARTITION_CLOSED_REVALIDATE_SECONDS)
+
+    assert store.revalidate_partitions(later) == 0
+
+    hot = [(now.year, 5), (now.year, 6)]
+    assert upstream.calls[:2] == [("fetch", month) for month in hot]
+    assert {kind for kind, _ in upstream.calls[2:]} == {"count"}
+    assert len(upstream.calls) == len(store._months(later))
+    assert store.revalidate_partitions(later) == 0  # todas revalidadas agora
+
+
+def test_deletion_in_a_closed_partition_is_caught_by_the_count_probe(partitioned, ideas):
+    store, upstream, now = partitioned
+    deleted = next(i for i in ideas if month_of(i) < (now.year, 5) and month_of(i) >= (now.year - 1, 1))
+    upstream.ideas.remove(deleted)
+    index = store.get_index()
+    version = store.get_snapshot_version()
+
+    changed = store.revalidate_partitions(now + timedelta(seconds=Config.IDEA_PARTITION_CLOSED_REVALIDATE_SECONDS))
+
+    assert changed == 1
+    assert ("fetch", month_of(deleted)) in upstream.calls
+    assert store.count() == len(ideas) - 1
+    assert deleted.id not in index.ideas_by_id
+    assert store.get_snapshot_version() != version
+
+
+def test_edit_keeping_its_update_date_is_caught_in_a_hot_partition(partitioned, ideas):
+    store, upstream, now = partitioned
+    position, original = next((n, i) for n, i in enumerate(upstream.ideas) if month_of(i) == (now.year, 6))
+    upstream.ideas[position] = original.model_copy(update={"title": "Edited upstream"})
+
+    assert store.revalidate_partitions(now + timedelta(seconds=Config.IDEA_PARTITION_HOT_REVALIDATE_SECONDS)) == 1
+
+    assert [kind for kind, _ in upstream.calls] == ["fetch", "fetch"]  # só as quentes venceram
+    assert store.get_index().ideas_by_id[original.id].title == "Edited upstream"
+
+
+# =========================================================================
+# Arquivo Arrow
+# =========================================================================
+
+def boundary_ids(store, ideas):
+    return {i.id for i in ideas if i.updated_at == store.get_high_water_mark()}
+
+
+def test_index_loaded_from_snapshot_file_matches_sqlite(store, ideas, tmp_path):
+    pytest.importorskip("pyarrow")
+    store.upsert_ideas(ideas)
+    from_sqlite = store.get_index()
+    assert (tmp_path / "ideas.arrow").exists()
+
+    restarted = IdeaStoreService(store.db_path, store.snapshot_file.path)
+    from_file = restarted.get_index()
+
+    assert lean(from_file.all_ideas()) == lean(from_sqlite.all_ideas())
+    for name in ("by_implementer", "by_creator", "by_creation_month", "by_stage"):
+        assert dict(getattr(from_file, name)) == dict(getattr(from_sqlite, name))
+    assert dict(from_file.rollups.created) == dict(from_sqlite.rollups.created)
+    assert dict(from_file.rollups.funnel) == dict(from_sqlite.rollups.funnel)
+
+
+def test_index_loaded_from_snapshot_file_materializes_ideas_on_demand(store, ideas):
+    pytest.importorskip("pyarrow")
+    store.upsert_ideas(ideas)
+    store.get_index()
+
+    index = IdeaStoreService(store.db_path, store.snapshot_file.path).get_index()
+    # Só as ideias na marca d'água (relidas do SQLite, limite inclusivo) viraram modelos
+    assert set(index.ideas_by_id.overrides) <= boundary_ids(store, ideas)
+    before = set(index.ideas_by_id._cache)
+
+    user = ideas[0].creator_id
+    created = {i.id for i in index.ideas_created_by([user])}
+    assert created == {i.id for i in ideas if i.creator_id == user}
+    assert set(index.ideas_by_id._cache) - before == created - before - set(index.ideas_by_id.overrides)
+
+
+def test_snapshot_file_load_applies_ideas_updated_after_it(store, ideas):
+    pytest.importorskip("pyarrow")
+    store.upsert_ideas(ideas)
+    store.get_index()
+
+    edited = ideas[2].model_copy(update={"title": "After file", "updated_at": store.get_high_water_mark() + timedelta(hours=1)})
+    IdeaStoreService(store.db_path).upsert_ideas([edited])  # sem índice: o arquivo fica para trás
+
+    restarted = IdeaStoreService(store.db_path, store.snapshot_file.path).get_index()
+    assert restarted.ideas_by_id[edited.id].title == "After file"
+    assert len(restarted) == len(ideas)
+
+
+def test_resaving_keeps_unchanged_rows_without_materializing_them(store, ideas):
+    pytest.importorskip("pyarrow")
+    store.upsert_ideas(ideas)
+    store.get_index()
+
+    boundary = boundary_ids(store, ideas)
+    restarted = IdeaStoreService(store.db_path, store.snapshot_file.path)
+    index = restarted.get_index()
+    restarted.upsert_ideas([ideas[3].model_copy(update={"title": "Resaved", "updated_at": store.get_high_water_mark() + timedelta(hours=1)})])
+    assert restarted.save_snapshot_file(index.copy())
+    assert set(index.ideas_by_id._cache) <= boundary | {ideas[3].id}
+
+    reloaded = IdeaStoreService(store.db_path, store.snapshot_file.path).get_index()
+    assert reloaded.ideas_by_id[ideas[3].id].title == "Resaved"
+    assert lean(reloaded.all_ideas())[4:] == lean(IdeaStoreService(store.db_path).get_index().all_ideas())[4:]
+
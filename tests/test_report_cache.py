@@ -0,0 +1,75 @@
+import pytest
+
+from src.services import report_cache as report_cache_module
+from src.services.report_cache import ReportCache, build_etag, etag_matches
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(report_cache_module.time, "monotonic", fake)
+    return fake
+
+
+def test_get_returns_cached_value_and_counts_hits(clock):
+    cache = ReportCache(max_entries=4, ttl_seconds=60)
+    assert cache.get("a") is None
+    cache.set("a", b"body")
+
+    assert cache.get("a") == b"body"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ReportCache(max_entries=4, ttl_seconds=60)
+    cache.set("a", b"body")
+
+    clock.now += 59
+    assert cache.get("a") == b"body"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ReportCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # 'b' passa a ser o menos usado
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_etag_depends_on_key_and_version():
+    etag = build_etag(("department", 1, 2025), "v1")
+
+    assert etag == build_etag(("department", 1, 2025), "v1")
+    assert etag != build_etag(("department", 1, 2025), "v2")
+    assert etag != build_etag(("department", 2, 2025), "v1")
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ('"other"', False),
+    ("{etag}", True),
+    ("W/{etag}", True),
+    ('"other", {etag}', True),
+    ("*", True),
+])
+def test_etag_matches_if_none_match(header, expected):
+    etag = build_etag("report", "v1")
+    assert etag_matches(header.format(etag=etag) if header else header, etag) is expected
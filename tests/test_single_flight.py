@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+class SlowCall:
+    """Counts executions; each one takes 'delay' seconds (blocking and async versions)."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.runs = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.runs += 1
+        time.sleep(self.delay)
+        return "result"
+
+    async def run_async(self):
+        with self._lock:
+            self.runs += 1
+        await asyncio.sleep(self.delay)
+        return "result"
+
+
+def test_concurrent_blocking_calls_share_one_execution():
+    flight, call = SingleFlight(), SlowCall()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do("key", call), range(8)))
+
+    assert results == ["result"] * 8
+    assert call.runs == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_concurrent_async_calls_share_one_execution():
+    flight, call = SingleFlight(), SlowCall()
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", call.run_async) for _ in range(8)))
+
+    assert asyncio.run(main()) == ["result"] * 8
+    assert call.runs == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_async_caller_joins_a_blocking_call_in_flight():
+    flight, call = SingleFlight(), SlowCall(delay=0.3)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        blocking = pool.submit(flight.do, "key", call)
+        time.sleep(0.05)
+        assert asyncio.run(flight.do_async("key", call.run_async)) == "result"
+        assert blocking.result() == "result"
+
+    assert call.runs == 1
+    assert flight.stats()["coalesced"] == 1
+
+
+def test_blocking_caller_joins_an_async_call_in_flight():
+    flight, call = SingleFlight(), SlowCall(delay=0.3)
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("key", call.run_async))
+        await asyncio.sleep(0.05)
+        follower = await asyncio.to_thread(flight.do, "key", call)
+        return await leader, follower
+
+    assert asyncio.run(main()) == ("result", "result")
+    assert call.runs == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait()
+        follower = pool.submit(flight.do, "key", failing)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    assert flight.do("key", lambda: "recovered") == "recovered"
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from src.services import snapshot_service as snapshot_module
+from src.services.idea_index import IdeaIndex
+from src.services.snapshot_service import SnapshotService
+from src.services.user_directory import UserDirectory
+
+
+class FakeStore:
+    """Idea store double: a fixed frozen index, an optional failing snapshot-file save."""
+
+    def __init__(self, index, version="v1", save_error=None):
+        self.index = index
+        self.version = version
+        self.save_error = save_error
+        self.saves = 0
+
+    async def sync_async(self):
+        return 0
+
+    def get_frozen_index(self):
+        return self.index
+
+    def get_snapshot_version(self):
+        return self.version
+
+    def save_snapshot_file(self, index):
+        self.saves += 1
+        if self.save_error is not None:
+            raise self.save_error
+        return True
+
+
+class FakeDirectoryService:
+    def __init__(self, users):
+        self.directory = UserDirectory(users)
+
+    async def get_directory_async(self):
+        return self.directory
+
+
+@pytest.fixture
+def fake_sources(monkeypatch, users, ideas):
+    def install(**store_options):
+        store = FakeStore(IdeaIndex(ideas), **store_options)
+        monkeypatch.setattr(snapshot_module, "idea_store_service", store)
+        monkeypatch.setattr(snapshot_module, "user_directory_service", FakeDirectoryService(users))
+        return store
+    return install
+
+
+def test_refresh_swaps_in_a_snapshot_and_saves_once_per_version(fake_sources, ideas):
+    store = fake_sources()
+    service = SnapshotService(refresh_interval=300, retry_interval=30)
+
+    snapshot = asyncio.run(service.refresh())
+    asyncio.run(service.refresh())
+
+    assert service.current() is not snapshot
+    assert service.current().index is store.index
+    assert len(service.current().index) == len(ideas)
+    assert store.saves == 1
+
+
+def test_snapshot_file_failure_does_not_block_the_swap(fake_sources, caplog):
+    store = fake_sources(save_error=OSError("disk full"))
+    service = SnapshotService(refresh_interval=300, retry_interval=30)
+
+    asyncio.run(service.refresh())
+
+    assert service.is_ready
+    assert service.current().ideas_version == "v1"
+    assert "Saving the snapshot file failed" in caplog.text
+
+    # Versão não marcada como salva: o próximo refresh tenta de novo
+    asyncio.run(service.refresh())
+    assert store.saves == 2
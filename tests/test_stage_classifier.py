@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.idea_models import AnalyticsIdea, Idea
+from src.services.stage_classifier import StageClassifier, StagePhase, StatusCategory
+
+
+def make_idea(status, stages, model=Idea):
+    return model.model_validate({
+        "Id": 1, "Estado": status, "EstadoId": 10,
+        "DataAtualizacao": "2025-03-01T00:00:00", "CriadoEm": "2025-01-01T00:00:00",
+        "Etapas": [
+            {"FluxoId": 1, "EstadoId": n, "LabelPt": label, "DataEntrada": start, "DataSaida": end}
+            for n, (label, start, end) in enumerate(stages)
+        ]
+    })
+
+
+@pytest.fixture
+def classifier():
+    return StageClassifier()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Implantação", "implantacao"),
+    ("EM EXECUÇÃO", "em execucao"),
+    ("Aprovação dos Aprovadores", "aprovacao dos aprovadores"),
+    (None, ""),
+])
+def test_normalize_strips_accents_and_case(text, expected):
+    assert StageClassifier.normalize(text) == expected
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("Aguardando Aprovação", StagePhase.APPROVAL),
+    ("Em Execução", StagePhase.IN_IMPLEMENTATION),
+    ("Ideia Implantada", StagePhase.IMPLEMENTED),
+    ("Validada pelo gestor", StagePhase.IMPLEMENTED),
+    # 'implantacao' também é palavra de implantada: a etapa casa as duas fases
+    ("Em Implantação", StagePhase.IN_IMPLEMENTATION | StagePhase.IMPLEMENTED),
+    ("Triagem", StagePhase.NONE),
+    (None, StagePhase.NONE),
+])
+def test_classify_stage(classifier, label, expected):
+    assert classifier.classify_stage(label) == expected
+
+
+@pytest.mark.parametrize("status, expected", [
+    ("Concluída", StatusCategory.COMPLETED),
+    ("Implantada", StatusCategory.COMPLETED),
+    ("Cancelada", StatusCategory.CLOSED),
+    ("REPROVADA", StatusCategory.CLOSED),
+    ("Em análise", StatusCategory.PENDING),
+    (None, StatusCategory.PENDING),
+])
+def test_classify_status(classifier, status, expected):
+    assert classifier.classify_status(status) == expected
+
+
+def test_each_distinct_stage_is_classified_once(classifier, monkeypatch):
+    calls = []
+    normalize = StageClassifier.normalize
+    monkeypatch.setattr(classifier, "normalize", lambda text: calls.append(text) or normalize(text))
+
+    for _ in range(3):
+        classifier.classify_stage("Em Execução", flow_id=1, state_id=5)
+        classifier.classify_status("Cancelada")
+
+    assert calls == ["Em Execução", "Cancelada"]
+
+
+@pytest.mark.parametrize("model", [Idea, AnalyticsIdea])
+def test_annotate_stores_phase_and_status_on_the_idea(classifier, model):
+    idea = make_idea("Cancelada", [("Aprovação", None, None), ("Triagem", None, None)], model)
+
+    classifier.annotate([idea])
+
+    assert idea.status_category == StatusCategory.CLOSED.value
+    assert [stage.phase for stage in idea.stages] == [int(StagePhase.APPROVAL), int(StagePhase.NONE)]
+    assert classifier.idea_status(idea) == StatusCategory.CLOSED
+
+
+def test_funnel_dates_use_the_last_stage_of_each_phase(classifier):
+    idea = make_idea("Implantada", [
+        ("Aprovação", "2025-01-02T00:00:00", "2025-01-05T00:00:00"),
+        ("Aprovação", "2025-01-06T00:00:00", "2025-01-10T00:00:00"),
+        ("Execução", "2025-01-10T00:00:00", "0001-01-01T00:00:00"),
+        ("Validada", "2025-02-01T00:00:00", None),
+    ])
+
+    plain = classifier.funnel_dates(idea)
+    classifier.annotate([idea])
+
+    assert plain == (datetime(2025, 1, 10), None, datetime(2025, 2, 1))
+    assert classifier.funnel_dates(idea) == plain